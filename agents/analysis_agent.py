@@ -3,13 +3,18 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
 from crewai import Agent, Task
+from data_ingestion.sentiment_store import SentimentStore
 
 class AnalysisAgent:
     """Agent for performing financial analysis on market data."""
     
-    def __init__(self):
-        """Initialize the analysis agent."""
-        pass
+    def __init__(self, sentiment_store: SentimentStore = None):
+        """Initialize the analysis agent.
+        
+        Args:
+            sentiment_store: History of sentiment readings used for trend analysis (optional)
+        """
+        self.sentiment_store = sentiment_store
         
     def create_agent(self) -> Agent:
         """Create a CrewAI agent for financial analysis operations."""
@@ -174,12 +179,24 @@ class AnalysisAgent:
         else:
             combined_sentiment = 'very positive'
         
+        sentiment_summary = f"Market sentiment is {combined_sentiment} with a score of {combined_score:.1f}/100"
+        
+        # Compare the indicator with its own history
+        trend = self.sentiment_store.trend() if self.sentiment_store else {'readings': 0, 'latest': None}
+        if trend.get('avg_7d') is not None:
+            sentiment_summary += f"; the indicator's 7-day average is {trend['avg_7d']:.1f}"
+            if trend.get('delta_7d') is not None:
+                sentiment_summary += f" and it moved {trend['delta_7d']:+.1f} points over the week"
+            if trend.get('zscore_30d') is not None and abs(trend['zscore_30d']) >= 2:
+                sentiment_summary += f" ({trend['zscore_30d']:+.1f} standard deviations from its 30-day mean)"
+        
         return {
-            'sentiment_summary': f"Market sentiment is {combined_sentiment} with a score of {combined_score:.1f}/100",
+            'sentiment_summary': sentiment_summary,
             'indicator_sentiment': overall_sentiment,
             'news_sentiment': 'positive' if avg_news_sentiment > 0 else 'negative' if avg_news_sentiment < 0 else 'neutral',
             'combined_score': combined_score,
-            'key_factors': sentiment_data.get('key_indicators', [])
+            'key_factors': sentiment_data.get('key_indicators', []),
+            'trend': trend
         }
     
     def analyze_risk_exposure(self, portfolio_data: Dict[str, Any], market_data: List[Dict[str, Any]], sentiment_data: Dict[str, Any]) -> Dict[str, Any]:
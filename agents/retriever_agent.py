@@ -1,135 +1,485 @@
 import os
-import numpy as np
-from typing import List, Dict, Any, Optional
+import time
+import heapq
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Union
 from crewai import Agent, Task
-# Import Pinecone and Langchain's Pinecone integration
-from pinecone import Pinecone, Index
-from langchain_pinecone import PineconeVectorStore
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import math
+from retrieval.vector_backend import VectorBackend, create_vector_backend, matches_filter
+from retrieval.embedding_cache import CachedEmbeddings
+from retrieval.embeddings import create_embeddings
+from retrieval.embedding_pipeline import EmbeddingPipeline
+from retrieval.chunker import Chunker
+from retrieval.record_ids import content_key, chunk_id
+from retrieval.lexical_index import BM25Index
+from retrieval.hybrid_search import hybrid_search
+from retrieval.financial_documents import financial_document
+from retrieval.query_analyzer import QueryAnalyzer
+from retrieval.record_store import RecordStore, TABLES as RECORD_TABLES
+from data_ingestion.source_registry import get_source_registry
+from data_ingestion.keyword_matcher import get_keyword_matcher
+from data_ingestion.filings_loader import FilingsLoader
+
+# Namespaces whose records are keyed by ticker symbol
+SYMBOL_NAMESPACES = ('stock_data', 'earnings')
+
+# Score of structured records listed without a symbol or date to match (latest, largest moves)
+RECENT_RECORD_SCORE = 0.75
 
 class RetrieverAgent:
     """Agent for indexing and retrieving information from a vector store."""
     
-    def __init__(self, pinecone_api_key: str = None, pinecone_environment: str = None, pinecone_index_name: str = None, openai_api_key: str = None):
-        """Initialize the retriever agent with Pinecone.
+    def __init__(self, pinecone_api_key: str = None, pinecone_environment: str = None, pinecone_index_name: str = None, openai_api_key: str = None, backend: VectorBackend = None, record_store: RecordStore = None):
+        """Initialize the retriever agent.
         
         Args:
-            pinecone_api_key: Pinecone API key
+            pinecone_api_key: Pinecone API key (only used with VECTOR_BACKEND=pinecone)
             pinecone_environment: Pinecone environment (e.g., 'gcp-starter')
             pinecone_index_name: Name of the Pinecone index
-            openai_api_key: OpenAI API key for embeddings
+            openai_api_key: OpenAI API key for embeddings (not needed with EMBEDDING_PROVIDER=local)
+            backend: Vector store backend (optional, selected with VECTOR_BACKEND from env)
+            record_store: Table store for stock data, earnings and sentiment (optional, created
+                unless STRUCTURED_RECORDS=off)
         """
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
-        self.pinecone_api_key = pinecone_api_key or os.getenv('PINECONE_API_KEY')
-        self.pinecone_environment = pinecone_environment or os.getenv('PINECONE_ENVIRONMENT')
-        self.pinecone_index_name = pinecone_index_name or os.getenv('PINECONE_INDEX_NAME')
-
-        if not self.pinecone_api_key or not self.pinecone_environment or not self.pinecone_index_name or not self.openai_api_key:
-            raise ValueError("Pinecone API key, environment, index name, and OpenAI API key must be provided or set as environment variables.")
-
-        # Initialize Pinecone client
-        self.pinecone_client = Pinecone(api_key=self.pinecone_api_key, environment=self.pinecone_environment)
-
-        # Check if index exists, create if not (optional, can be done manually)
-        # For simplicity, we'll rely on Langchain's PineconeVectorStore to handle index existence
-        
-        self.embeddings = OpenAIEmbeddings(openai_api_key=self.openai_api_key)
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        
-        # Initialize the Pinecone vector store instance
-        # Langchain's PineconeVectorStore handles connection and index reference
-        self.vector_store = PineconeVectorStore(
-            index_name=self.pinecone_index_name, 
-            embedding=self.embeddings,
-            pinecone_api_key=self.pinecone_api_key
-            #environment=self.pinecone_environment
+        self.embedding_provider = os.getenv('EMBEDDING_PROVIDER', 'openai').lower()
+        self.embedding_benchmark = None
+        
+        self.embeddings, index_model = create_embeddings(self.embedding_provider, self.openai_api_key)
+        if self.embedding_provider == 'local' and os.getenv('LOCAL_EMBEDDING_BENCHMARK', 'on').lower() != 'off':
+            self.embedding_benchmark = self.embeddings.benchmark()
+            print(f"Local embeddings ({self.embedding_benchmark['model']}, {self.embedding_benchmark['dimension']}d): {self.embedding_benchmark['embeddings_per_sec']:.0f} embeddings/sec")
+        
+        if os.getenv('EMBEDDING_CACHE', 'on').lower() != 'off':
+            # Unchanged chunks and repeated queries are not embedded again
+            self.embeddings = CachedEmbeddings(self.embeddings)
+        # Token-bounded chunks with a policy per document type; short records are indexed whole
+        self.chunker = Chunker()
+        
+        # Local FAISS by default; Pinecone when VECTOR_BACKEND=pinecone. Each embedding
+        # model gets its own FAISS directory since vector dimensions differ.
+        self.vector_backend = backend or create_vector_backend(
+            model=index_model,
+            api_key=pinecone_api_key,
+            environment=pinecone_environment,
+            index_name=pinecone_index_name
         )
+        
+        # Batched, concurrent embedding with upserts overlapping later batches
+        self.embedding_pipeline = EmbeddingPipeline(self.embeddings, self.vector_backend)
+        
+        # Namespace searches of one query run side by side
+        self.search_workers = int(os.getenv('RETRIEVER_SEARCH_WORKERS', 6))
+        self._search_executor = ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix='retriever')
+        
+        # BM25 over chunk text and metadata, fused with the vector scores
+        self.hybrid_search = os.getenv('HYBRID_SEARCH', 'on').lower() != 'off'
+        self.lexical_weight = float(os.getenv('HYBRID_LEXICAL_WEIGHT', 0.3))
+        self._lexical = {}
+        self._lexical_lock = threading.Lock()
+        self._filings_loader = None
+        
+        # Tickers, dates and intent of a query decide which namespaces are searched and how they are filtered
+        self.query_analyzer = QueryAnalyzer()
+        
+        # Stock data, earnings and sentiment are looked up by symbol and date instead of embedded
+        if record_store is None and os.getenv('STRUCTURED_RECORDS', 'on').lower() != 'off':
+            record_store = RecordStore()
+        self.record_store = record_store
+        
+        # Bumped whenever a namespace is re-indexed, so cached answers built from it expire
+        self._namespace_versions = {}
+        self._versions_lock = threading.Lock()
+        
+        # Open batches per namespace: the build their writes go to and the lexical changes applied on publish
+        self._batches = {}
 
     def create_agent(self) -> Agent:
         """Create a CrewAI agent for retrieval operations."""
         return Agent(
             role="Financial Information Retrieval Specialist",
-            goal="Efficiently index and retrieve relevant financial information from Pinecone",
+            goal="Efficiently index and retrieve relevant financial information from the vector store",
             backstory="""You are an expert in information retrieval systems with a 
-            specialization in financial data, utilizing the power of Pinecone vector 
-            database. Your expertise lies in organizing, indexing, and retrieving the 
+            specialization in financial data, utilizing the power of FAISS and Pinecone 
+            vector databases. Your expertise lies in organizing, indexing, and retrieving the 
             most relevant information from large datasets to answer specific financial 
             queries.""",
             verbose=True,
             allow_delegation=False
         )
     
-    def index_documents(self, documents: List[Dict[str, str]], namespace: str = 'default') -> bool:
-        """Index documents in the Pinecone vector store.
+    def index_documents(self, documents: List[Dict[str, Any]], namespace: str = 'default') -> bool:
+        """Index documents in the vector store.
+        
+        Chunk IDs are derived from each document's record key and chunk position, so
+        indexing a new version of a record overwrites the old one instead of adding a
+        duplicate, and re-indexing the same record is a no-op. Records are chunked as the
+        embedding pipeline asks for more input; records in an embedding batch that still
+        fails after its retries get their previous chunks back while the rest are written.
+        The chunks are written into a build of the namespace (or the open batch, see
+        batch) and published at once, so searches never see a partly indexed call.
         
         Args:
-            documents: List of documents to index (each with 'content' and 'metadata' keys)
-            namespace: Namespace for the documents in Pinecone
+            documents: List of documents to index (each with 'content' and 'metadata' keys,
+                and optionally a 'key' identifying the record; defaults to a content hash)
+            namespace: Namespace for the documents in the vector store
             
         Returns:
-            Boolean indicating success
+            Boolean indicating success (False if any record failed to index)
         """
         try:
-            # Convert to Document objects
-            doc_objects = [Document(page_content=doc['content'], metadata=doc['metadata']) for doc in documents]
+            # The last version of a record in the batch wins
+            records = {}
+            for doc in documents:
+                records[doc.get('key') or content_key(doc['content'])] = doc
+            if not records:
+                return True
             
-            # Split documents into chunks
-            splits = self.text_splitter.split_documents(doc_objects)
-
-            print(f"this is splists ${splits}")
-            print(f"this is namespace ${namespace}")
+            # Chunks of records indexed before, kept to put back if the new version fails
+            previous = self.vector_backend.fetch(namespace, [chunk_id(namespace, key, 0) for key in records])
+            old_counts = {
+                key: int(previous.get(chunk_id(namespace, key, 0), {}).get('metadata', {}).get('chunk_count', 0))
+                for key in records
+            }
+            old_ids = [chunk_id(namespace, key, index) for key, count in old_counts.items() for index in range(count)]
+            old_chunks = self.vector_backend.fetch(namespace, old_ids, include_vectors=True) if old_ids else {}
             
-            # Add documents to the Pinecone index within the specified namespace
-            # Langchain's add_documents handles batching and upserting
-
-
+            # Chunk texts are only kept when a lexical index has to be updated with them
+            lexical = self._lexical.get(namespace)
+            indexed_at = time.time()
+            chunk_counts = {}
+            owners = {}
+            added = []
             
-            self.vector_store.add_documents(splits, namespace=namespace)
+            def chunks():
+                # Split each record into chunks with stable IDs. Every chunk carries a numeric
+                # timestamp (the record's date, else the indexing time) for date range filters.
+                for key, doc in records.items():
+                    texts = self.chunker.split(doc['content'], namespace)
+                    chunk_counts[key] = len(texts)
+                    timestamp = self._record_timestamp(doc['metadata'], indexed_at)
+                    for index, text in enumerate(texts):
+                        chunk = chunk_id(namespace, key, index)
+                        metadata = dict(doc['metadata'], record_key=key, chunk_index=index, chunk_count=len(texts), timestamp=timestamp, indexed_at=indexed_at)
+                        owners[chunk] = key
+                        if lexical is not None:
+                            added.append((chunk, text, metadata))
+                        yield chunk, text, metadata
             
-            return True
+            # Embed the chunks into a build of the namespace, which searches see once it is published
+            batch = self._batches.get(namespace)
+            build = batch['build'] if batch is not None else self.vector_backend.begin_build(namespace)
+            try:
+                stats = self.embedding_pipeline.run_stream(build, chunks())
+                failed = set(owners[chunk] for chunk in stats['failed_ids'])
+                if failed:
+                    self._restore_records(build, namespace, failed, chunk_counts, old_counts, old_chunks)
+                
+                # Chunks past the end of a record's new version would otherwise linger
+                stale = []
+                for key, count in chunk_counts.items():
+                    if key not in failed:
+                        stale.extend(chunk_id(namespace, key, index) for index in range(count, old_counts[key]))
+                if stale:
+                    self.vector_backend.delete(build, stale)
+            except Exception:
+                if batch is None:
+                    self.vector_backend.abort_build(build)
+                else:
+                    # The rest of the batch is still published, so take this call's records back out of it
+                    self._restore_records(build, namespace, set(chunk_counts), chunk_counts, old_counts, old_chunks)
+                raise
+            
+            added = [(chunk, text, metadata) for chunk, text, metadata in added if owners[chunk] not in failed]
+            if batch is not None:
+                batch['added'].extend(added)
+                batch['removed'].extend(stale)
+            else:
+                self.vector_backend.publish_build(build)
+                self._published(namespace, added, stale)
+            return not failed
         except Exception as e:
-            print(f"Error indexing documents in Pinecone: {e}")
+            print(f"Error indexing documents in vector store: {e}")
             return False
     
-    def retrieve(self, query: str, namespace: str = 'default', k: int = 5) -> List[Dict[str, Any]]:
-        """Retrieve documents from the Pinecone vector store.
+    def _restore_records(self, build: str, namespace: str, keys: set, chunk_counts: Dict[str, int], old_counts: Dict[str, int], old_chunks: Dict[str, Dict[str, Any]]):
+        """Put back, in the build they were written to, the previous chunks of records whose new version was only partly written."""
+        for key in keys:
+            written = [chunk_id(namespace, key, index) for index in range(old_counts[key], chunk_counts.get(key, 0))]
+            if written:
+                self.vector_backend.delete(build, written)
+            old = {chunk: old_chunks[chunk] for chunk in (chunk_id(namespace, key, index) for index in range(old_counts[key])) if chunk in old_chunks}
+            if old:
+                ids = list(old)
+                self.vector_backend.upsert(build, ids, [old[chunk]['vector'] for chunk in ids], [old[chunk]['content'] for chunk in ids], [old[chunk]['metadata'] for chunk in ids])
+    
+    @contextmanager
+    def batch(self, namespace: str):
+        """Collect every write to a namespace made inside the block into one new version.
+        
+        Each index_documents call publishes a version of the namespace, so indexing
+        items one at a time (e.g. articles as the article pipeline fetches them) would
+        publish once per item. Inside a batch, writes go to one build that is published
+        when the block exits. An item that fails is left out of the batch; if the block
+        raises, nothing is published.
+        
+        Args:
+            namespace: Namespace written to inside the block
+        """
+        if namespace in self._batches:
+            yield
+            return
+        batch = {'build': self.vector_backend.begin_build(namespace), 'added': [], 'removed': []}
+        self._batches[namespace] = batch
+        try:
+            yield
+        except Exception:
+            self._batches.pop(namespace, None)
+            self.vector_backend.abort_build(batch['build'])
+            raise
+        self._batches.pop(namespace, None)
+        self.vector_backend.publish_build(batch['build'])
+        if batch['added'] or batch['removed']:
+            self._published(namespace, batch['added'], batch['removed'])
+    
+    def _published(self, namespace: str, added: List[tuple], removed: List[str]):
+        """Bring the namespace version and an already built lexical index in step with a published change."""
+        self._bump_version(namespace)
+        lexical = self._lexical.get(namespace)
+        if lexical is not None:
+            for chunk, text, metadata in added:
+                lexical.add(chunk, text, metadata)
+            for chunk in removed:
+                lexical.remove(chunk)
+    
+    def index_filing(self, source: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Index a PDF or HTML filing (annual report, earnings release) page by page.
+        
+        Args:
+            source: http(s) URL of the filing, or a path inside FILINGS_DIR
+            metadata: Fields stored with every chunk, e.g. 'symbol', 'title' and 'date'
+            
+        Returns:
+            Loader statistics: pages, chunks, elapsed seconds, pages per second and success
+        """
+        if self._filings_loader is None:
+            # Worker processes chunk and embed pages; the parent only writes to the store
+            self._filings_loader = FilingsLoader(self.vector_backend, openai_api_key=self.openai_api_key)
+        stats = self._filings_loader.load(source, metadata)
+        if stats['success']:
+            self._bump_version('filings')
+            with self._lexical_lock:
+                self._lexical.pop('filings', None)
+        return stats
+    
+    def delete_chunks(self, namespace: str, ids: List[str]) -> int:
+        """Delete chunks from the vector store and the lexical index.
+        
+        Inside a batch of the namespace, the deletion is published with the batch.
+        
+        Args:
+            namespace: Namespace to delete from
+            ids: Chunk IDs
+            
+        Returns:
+            Number of chunks deleted
+        """
+        batch = self._batches.get(namespace)
+        if batch is not None:
+            deleted = self.vector_backend.delete(batch['build'], ids)
+            batch['removed'].extend(ids)
+            return deleted
+        deleted = self.vector_backend.delete(namespace, ids)
+        self._published(namespace, [], ids)
+        return deleted
+    
+    def _bump_version(self, namespace: str):
+        """Record that a namespace changed, so cached answers built from it expire."""
+        with self._versions_lock:
+            self._namespace_versions[namespace] = self._namespace_versions.get(namespace, 0) + 1
+    
+    def namespace_version(self, namespace: str) -> int:
+        """Get how many times a namespace has been (re-)indexed by this agent."""
+        with self._versions_lock:
+            return self._namespace_versions.get(namespace, 0)
+    
+    def _record_timestamp(self, metadata: Dict[str, Any], default: float) -> float:
+        """Get the Unix time of a record's 'date' metadata (YYYY-MM-DD, UTC), or the default."""
+        try:
+            return datetime.strptime(str(metadata.get('date', ''))[:10], '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            return default
+    
+    def query_embedder(self, query: str) -> Callable[[], List[float]]:
+        """Get a function that embeds a query on its first call and returns the same vector afterwards.
+        
+        Lets the namespaces of one query share an embedding that is only computed if a
+        vector search actually runs; a failed embedding is not retried.
+        """
+        lock = threading.Lock()
+        outcome = {}
+        
+        def embed() -> List[float]:
+            with lock:
+                if not outcome:
+                    try:
+                        outcome['vector'] = self.embeddings.embed_query(query)
+                    except Exception as e:
+                        outcome['error'] = e
+            if 'error' in outcome:
+                raise outcome['error']
+            return outcome['vector']
+        return embed
+    
+    def needs_query_vector(self, analysis: Dict[str, Any]) -> bool:
+        """Check whether answering an analyzed query will likely run a vector search.
+        
+        Namespaces served from the record store, and symbol namespaces searched for
+        named tickers, are answered without an embedding.
+        """
+        for namespace in analysis['namespaces']:
+            if self._uses_record_store(namespace):
+                continue
+            if self.hybrid_search and namespace in SYMBOL_NAMESPACES and analysis['tickers']:
+                continue
+            return True
+        return False
+    
+    def retrieve(self, query: str, namespace: str = 'default', k: int = 5, query_vector: Union[List[float], Callable[[], List[float]]] = None, filter: Optional[Dict[str, Any]] = None, tickers: Optional[List[str]] = None, date_range: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Retrieve documents from the vector store.
         
         Args:
             query: Query string
             namespace: Namespace to search in
             k: Number of documents to retrieve
+            query_vector: Precomputed embedding of the query, or a function returning it (optional,
+                embedded when missing); only used if the ticker fast path does not apply
+            filter: Metadata filter pushed down to the vector store (optional). When nothing
+                matches it, the search is repeated without it, since chunks indexed before
+                timestamps were added have no 'timestamp' metadata.
+            tickers: Tickers named in the query (optional, extracted from the query when missing)
+            date_range: Date range of the query with start/end Unix times (optional, used for structured records)
             
         Returns:
             List of retrieved documents with content, metadata, and similarity score
         """
         try:
-            # Retrieve documents from Pinecone using similarity search
-            # Pinecone typically uses cosine similarity, where higher score is better (max 1.0)
-            docs_with_scores = self.vector_store.similarity_search_with_score(query, k=k, namespace=namespace)
+            if self._uses_record_store(namespace):
+                return self._record_results(namespace, query, k, tickers, date_range)
+            
+            lexical = self._lexical_index(namespace) if self.hybrid_search else None
+            
+            # Exact ticker fast path: symbol-keyed records are listed without a vector search
+            if lexical is not None and namespace in SYMBOL_NAMESPACES:
+                symbols = {ticker.lower() for ticker in tickers} if tickers is not None else self._query_tickers(query)
+                symbols |= lexical.known_symbols(query)
+                if symbols:
+                    results = self._symbol_results(namespace, lexical.symbol_docs(symbols), k, filter)
+                    if not results and filter:
+                        results = self._symbol_results(namespace, lexical.symbol_docs(symbols), k)
+                    if results:
+                        return results
+            
+            # Backends return cosine similarity, where higher score is better (max 1.0)
+            if query_vector is None:
+                query_vector = self.embeddings.embed_query(query)
+            elif callable(query_vector):
+                query_vector = query_vector()
+            matches = self._search(namespace, query, query_vector, lexical, k, filter)
+            if not matches and filter:
+                matches = self._search(namespace, query, query_vector, lexical, k)
             
             # Format results
             results = []
-            for doc, score in docs_with_scores:
+            for match in matches:
                 results.append({
-                    'content': doc.page_content,
-                    'metadata': doc.metadata,
-                    'score': float(score),  # Convert numpy float to Python float
-                    'confidence': self._score_to_confidence(score)
+                    'content': match['content'],
+                    'metadata': match['metadata'],
+                    'score': float(match['score']),  # Convert numpy float to Python float
+                    'confidence': self._score_to_confidence(match['score'])
                 })
             
             return results
         except Exception as e:
-            print(f"Error retrieving documents from Pinecone: {e}")
+            print(f"Error retrieving documents from vector store: {e}")
             return []
     
+    def _uses_record_store(self, namespace: str) -> bool:
+        """Check whether a namespace is served from the record store (it holds records of that type)."""
+        return self.record_store is not None and namespace in RECORD_TABLES and self.record_store.count(namespace) > 0
+    
+    def _record_results(self, namespace: str, query: str, k: int, tickers: Optional[List[str]] = None, date_range: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Look up structured records by the symbols and date range of a query.
+        
+        Records of the named symbols or period are exact matches. Without either, the
+        latest record per symbol is listed, largest moves first.
+        """
+        symbols = {ticker.upper() for ticker in tickers} if tickers is not None else {ticker.upper() for ticker in self._query_tickers(query)}
+        symbols |= self.record_store.known_symbols(query)
+        start = end = None
+        if date_range:
+            start = datetime.fromtimestamp(date_range['start'], timezone.utc).strftime('%Y-%m-%d')
+            end = (datetime.fromtimestamp(date_range['end'] - 1, timezone.utc) + timedelta(days=1)).strftime('%Y-%m-%d')
+        
+        rows = self.record_store.query(namespace, symbols, start, end, latest=not date_range, limit=k)
+        if not rows and date_range:
+            rows = self.record_store.query(namespace, symbols, limit=k)
+        score = 1.0 if symbols or date_range else RECENT_RECORD_SCORE
+        
+        results = []
+        for row in rows:
+            document = financial_document(row, namespace)
+            results.append({
+                'content': document['content'],
+                'metadata': dict(document['metadata'], record_key=document['key']),
+                'score': score,
+                'confidence': self._score_to_confidence(score)
+            })
+        return results
+    
+    def _lexical_index(self, namespace: str) -> BM25Index:
+        """Get the BM25 index of a namespace, building it from the vector store on first use."""
+        with self._lexical_lock:
+            lexical = self._lexical.get(namespace)
+            if lexical is None:
+                lexical = BM25Index()
+                ids = self.vector_backend.list_ids(namespace)
+                for start in range(0, len(ids), 100):
+                    for chunk, doc in self.vector_backend.fetch(namespace, ids[start:start + 100]).items():
+                        lexical.add(chunk, doc['content'], doc['metadata'])
+                self._lexical[namespace] = lexical
+            return lexical
+    
+    def _query_tickers(self, query: str) -> set:
+        """Get the tickers a query names, including by company name (e.g. 'TSMC' -> TSM)."""
+        return {ticker.lower() for ticker in get_keyword_matcher(get_source_registry().keywords).match(query)['tickers']}
+    
+    def _symbol_results(self, namespace: str, chunk_ids: List[str], k: int, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Format the latest chunks of the queried symbols that match the filter as exact matches."""
+        docs = [doc for doc in self.vector_backend.fetch(namespace, chunk_ids).values() if not filter or matches_filter(doc['metadata'], filter)]
+        latest = heapq.nlargest(k, docs, key=lambda doc: str(doc['metadata'].get('date', '')))
+        return [
+            {'content': doc['content'], 'metadata': doc['metadata'], 'score': 1.0, 'confidence': 100.0}
+            for doc in latest
+        ]
+    
+    def _search(self, namespace: str, query: str, query_vector: List[float], lexical: Optional[BM25Index], k: int, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Run a hybrid search when a lexical index is available, else a vector search."""
+        if lexical is not None and len(lexical):
+            return self._hybrid_search(namespace, query, query_vector, lexical, k, filter)
+        return self.vector_backend.search(namespace, query_vector, k=k, filter=filter)
+    
+    def _hybrid_search(self, namespace: str, query: str, query_vector: List[float], lexical: BM25Index, k: int, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fuse vector and BM25 candidates into one ranking (see retrieval.hybrid_search)."""
+        return hybrid_search(self.vector_backend, namespace, query, query_vector, lexical, k, self.lexical_weight, filter)
+    
     def _score_to_confidence(self, score: float) -> float:
         """Convert similarity score (cosine similarity, 0-1) to confidence percentage.
         
         Args:
-            score: Similarity score from Pinecone (typically 0 to 1 for cosine)
+            score: Cosine similarity score from the vector store (typically 0 to 1)
             
         Returns:
             Confidence percentage (0-100)
@@ -149,88 +499,49 @@ class RetrieverAgent:
         Returns:
             Boolean indicating success
         """
-        documents = []
-        
-        for item in data:
-            if data_type == 'news':
-                # Format news articles
-                content = f"Title: {item.get('title', '')}\n\nSummary: {item.get('summary', '')}\n\nSource: {item.get('source', '')}"
-                metadata = {
-                    'type': 'news',
-                    'source': item.get('source', ''),
-                    'link': item.get('link', ''),
-                    'title': item.get('title', '')
-                }
-            elif data_type == 'earnings':
-                # Format earnings data
-                surprise_pct = item.get('surprise_pct', 0.0)
-                if math.isnan(surprise_pct):
-                    surprise_pct = 0.0  # Replace NaN with 0.0 or another default value
-                content = f"Company: {item.get('name', item.get('symbol', ''))}\n\nSymbol: {item.get('symbol', '')}\n\nEPS Estimate: {item.get('eps_estimate', '')}\n\nReported EPS: {item.get('reported_eps', '')}\n\nSurprise: {surprise_pct}%"
-                metadata = {
-                    'type': 'earnings',
-                    'symbol': item.get('symbol', ''),
-                    'date': item.get('date', ''),
-                    'surprise_pct': float(surprise_pct)
-                }
-            elif data_type == 'stock_data':
-                # Format stock data
-                change_pct = item.get('change_pct', 0.0)
-                if math.isnan(change_pct):
-                    change_pct = 0.0  # Replace NaN with 0.0 or another default value
-                content = f"Company: {item.get('name', item.get('symbol', ''))}\n\nSymbol: {item.get('symbol', '')}\n\nPrice: {item.get('price', '')}\n\nChange: {change_pct}%\n\nVolume: {item.get('volume', '')}\n\nMarket Cap: {item.get('market_cap', '')}"
-                metadata = {
-                    'type': 'stock_data',
-                    'symbol': item.get('symbol', ''),
-                    'country': item.get('country', ''),
-                    'change_pct': float(change_pct)
-                }
-            elif data_type == 'sentiment':
-                # Format sentiment data
-                content = f"Overall Sentiment: {item.get('overall_sentiment', '')}\n\nSentiment Score: {item.get('sentiment_score', '')}\n\nKey Indicators: {', '.join([ind.get('headline', '') for ind in item.get('key_indicators', [])])}"
-                metadata = {
-                    'type': 'sentiment',
-                    'sentiment': item.get('overall_sentiment', ''),
-                    'score': item.get('sentiment_score', None)
-                }
-            else:
-                # Generic format for other data types
-                content = str(item)
-                metadata = {'type': data_type}
-            
-            documents.append({
-                'content': content,
-                'metadata': metadata
-            })
+        if self.record_store is not None and data_type in RECORD_TABLES:
+            # Structured records go to the record store; only free text is embedded
+            try:
+                self.record_store.upsert(data_type, data)
+            except Exception as e:
+                print(f"Error storing {data_type} records: {e}")
+                return False
+            self._bump_version(data_type)
+            return True
         
+        documents = [financial_document(item, data_type) for item in data]
         return self.index_documents(documents, namespace=data_type)
     
-    def retrieve_asia_tech_info(self, query: str, confidence_threshold: float = 60.0) -> Dict[str, Any]:
+    def retrieve_asia_tech_info(self, query: str, confidence_threshold: float = 60.0, query_vector: List[float] = None, analysis: Dict[str, Any] = None) -> Dict[str, Any]:
         """Retrieve information about Asia tech stocks.
         
         Args:
             query: Query string
             confidence_threshold: Minimum confidence threshold
+            query_vector: Precomputed embedding of the query (optional, embedded when a namespace needs it)
+            analysis: Precomputed query analysis (optional, analyzed when missing)
             
         Returns:
-            Dictionary with retrieved information and confidence scores
+            Dictionary with retrieved information, confidence scores and the query analysis
         """
-        # Namespaces to search in
-        namespaces = ['news', 'earnings', 'stock_data', 'sentiment', 'portfolio', 'finance']
+        # Only the namespaces that can answer the query's intent are searched, with its
+        # tickers and date range pushed down to the vector store as metadata filters
+        analysis = analysis or self.query_analyzer.analyze(query)
+        namespaces = analysis['namespaces']
         
-        all_results = []
-        confidence_levels = []
-        
-        for namespace in namespaces:
-            results = self.retrieve(query, namespace=namespace, k=3)
-            all_results.extend(results)
-            
-            # Track confidence levels
-            for result in results:
-                confidence_levels.append(result['confidence'])
+        # Search every namespace concurrently; the query is embedded at most once, and
+        # only if a namespace is not answered by the ticker fast path
+        if query_vector is None:
+            query_vector = self.query_embedder(query)
+        futures = [
+            self._search_executor.submit(self.retrieve, query, namespace, 3, query_vector, analysis['filters'].get(namespace), analysis['tickers'], analysis['date_range'])
+            for namespace in namespaces
+        ]
+        per_namespace = [future.result() for future in futures]
         
-        # Sort by confidence
-        all_results.sort(key=lambda x: x['confidence'], reverse=True)
+        # Each namespace's results are already best first, so a heap merge keeps them sorted by confidence
+        all_results = list(heapq.merge(*per_namespace, key=lambda x: x['confidence'], reverse=True))
+        confidence_levels = [result['confidence'] for result in all_results]
         
         # Calculate average confidence
         avg_confidence = sum(confidence_levels) / len(confidence_levels) if confidence_levels else 0
@@ -242,7 +553,8 @@ class RetrieverAgent:
             'results': filtered_results,
             'avg_confidence': avg_confidence,
             'below_threshold': avg_confidence < confidence_threshold,
-            'top_result': filtered_results[0] if filtered_results else None
+            'top_result': filtered_results[0] if filtered_results else None,
+            'query_analysis': analysis
         }
 
 # Example tasks for the retriever agent
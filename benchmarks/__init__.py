@@ -0,0 +1,2 @@
+# Benchmarks package initialization
+# This package contains performance benchmarks for the finance assistant pipelines
\ No newline at end of file
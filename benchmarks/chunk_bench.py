@@ -0,0 +1,125 @@
+"""Chunking throughput over synthetic news, filings and structured records.
+
+Compares the character splitter the retriever used before (LangChain
+``RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)``, skipped
+when LangChain is not installed) with ``Chunker`` and its per-type token
+policies, and ``Chunker.iter_stream`` fed one page at a time for filings.
+Reported per corpus: input MB/s, chunks, mean and max tokens per chunk (tiktoken
+when installed, else the 4-characters-per-token estimate) and peak traced memory.
+
+Usage:
+    python -m benchmarks.chunk_bench [--news 2000] [--filings 20] [--records 20000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from typing import List, Dict, Any, Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.chunker import Chunker
+from retrieval.embedding_pipeline import count_tokens, HAS_TIKTOKEN
+from retrieval.financial_documents import financial_document
+
+try:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    HAS_LANGCHAIN = True
+except ImportError:
+    HAS_LANGCHAIN = False
+
+WORDS = ['revenue', 'growth', 'semiconductor', 'foundry', 'margin', 'guidance', 'quarter', 'wafer', 'demand',
+         'memory', 'display', 'Taiwan', 'Korea', 'shipments', 'capex', 'inventory', 'the', 'of', 'and', 'to', 'in']
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+    return ' '.join(words).capitalize() + '.'
+
+def paragraph(rng: random.Random) -> str:
+    return ' '.join(sentence(rng) for _ in range(rng.randint(2, 7)))
+
+def news_article(rng: random.Random) -> str:
+    """Headline, summary and (for most articles) a full body of a few paragraphs."""
+    body = '\n\n'.join(paragraph(rng) for _ in range(rng.randint(3, 12))) if rng.random() < 0.7 else ''
+    return f"Title: {sentence(rng)}\n\nSummary: {paragraph(rng)}\n\nSource: Wire\n\n{body}".strip()
+
+def filing_pages(rng: random.Random, pages: int) -> List[str]:
+    """Pages of an annual report: prose paragraphs with a table on every third page."""
+    result = []
+    for page in range(pages):
+        blocks = [paragraph(rng) for _ in range(rng.randint(4, 8))]
+        if page % 3 == 2:
+            blocks.append('\n'.join(f"{rng.choice(WORDS)} | {rng.randint(100, 99999)} | {rng.randint(100, 99999)} | {rng.uniform(-20, 20):.1f}%" for _ in range(20)))
+        result.append('\n\n'.join(blocks) + '\n\n')
+    return result
+
+def structured_record(rng: random.Random) -> str:
+    item = {'symbol': f"{rng.randint(1000, 9999)}.T", 'name': 'Example Corp', 'date': '2026-10-16', 'price': rng.uniform(10, 900),
+            'change_pct': rng.uniform(-5, 5), 'volume': rng.randint(10 ** 5, 10 ** 8), 'market_cap': rng.randint(10 ** 9, 10 ** 12)}
+    return financial_document(item, 'stock_data')['content']
+
+def measure(documents: List[Any], split: Callable[[Any], List[str]], repeat: int) -> Dict[str, Any]:
+    """Time a splitter over documents (best of repeat runs) and trace its peak memory once."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = [chunk for document in documents for chunk in split(document)]
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    for document in documents:
+        for _ in split(document):
+            pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tokens = [count_tokens(chunk) for chunk in chunks]
+    return {
+        'seconds': best,
+        'chunks': len(chunks),
+        'mean_tokens': sum(tokens) / len(tokens) if tokens else 0.0,
+        'max_tokens': max(tokens, default=0),
+        'peak_mb': peak / 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--news', type=int, default=2000, help='News articles (default: 2000)')
+    parser.add_argument('--filings', type=int, default=20, help='Filings (default: 20)')
+    parser.add_argument('--pages', type=int, default=300, help='Pages per filing (default: 300)')
+    parser.add_argument('--records', type=int, default=20000, help='Structured records (default: 20000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per splitter, best kept (default: 3)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    news = [news_article(rng) for _ in range(args.news)]
+    filings = [filing_pages(rng, args.pages) for _ in range(args.filings)]
+    records = [structured_record(rng) for _ in range(args.records)]
+    chunker = Chunker()
+    baseline = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200) if HAS_LANGCHAIN else None
+
+    corpora = [
+        ('news', news, sum(map(len, news))),
+        ('filings', filings, sum(len(page) for filing in filings for page in filing)),
+        ('stock_data', records, sum(map(len, records)))
+    ]
+    print(f"Token counts: {'tiktoken cl100k_base' if HAS_TIKTOKEN else '4 characters per token estimate'}")
+    print(f"{'Corpus':<11} {'Splitter':<22} {'MB':>7} {'MB/s':>8} {'Chunks':>8} {'Mean tok':>9} {'Max tok':>8} {'Peak MB':>8}")
+    for name, documents, size in corpora:
+        splitters = []
+        if name == 'filings':
+            if baseline is not None:
+                splitters.append(('langchain 1000 chars', lambda pages: baseline.split_text(''.join(pages))))
+            splitters.append(('chunker (whole text)', lambda pages: chunker.split(''.join(pages), 'filings')))
+            splitters.append(('chunker (per page)', lambda pages: chunker.iter_stream(pages, 'filings')))
+        else:
+            if baseline is not None:
+                splitters.append(('langchain 1000 chars', baseline.split_text))
+            splitters.append(('chunker', lambda text, data_type=name: chunker.split(text, data_type)))
+        for label, split in splitters:
+            result = measure(documents, split, args.repeat)
+            print(f"{name:<11} {label:<22} {size / 1e6:>7.1f} {size / 1e6 / result['seconds']:>8.1f} {result['chunks']:>8} "
+                  f"{result['mean_tokens']:>9.0f} {result['max_tokens']:>8} {result['peak_mb']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
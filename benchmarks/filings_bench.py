@@ -0,0 +1,168 @@
+"""Filings loader throughput and memory on a synthetic 300-page annual report.
+
+Writes a text PDF (and an HTML version of the same report with page-break
+styles) of prose paragraphs and financial tables, then indexes it into a
+scratch FAISS store:
+
+- ``in-memory``: the whole document is extracted, chunked and embedded in this
+  process before anything is written (how a one-shot loader would do it)
+- ``loader wN``: ``FilingsLoader`` with N worker processes streaming page ranges
+
+Reported per variant: pages/sec, chunks indexed and peak RSS of the parent and
+of the largest worker. Embeddings default to the hashing embedder of
+retrieval_bench (no model or API); --embeddings local uses the fastembed model.
+PDF variants need pypdf.
+
+Usage:
+    python -m benchmarks.filings_bench [--pages 300] [--workers 1 2 4] [--format pdf html] [--embeddings hashing|local]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import functools
+import multiprocessing
+from typing import List, Dict, Any
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.chunk_bench import paragraph, WORDS
+from benchmarks.retrieval_bench import HashingEmbeddings
+from data_ingestion.filings_loader import FilingsLoader, iter_html_pages, HAS_PYPDF, NAMESPACE
+from retrieval.chunker import Chunker
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.record_ids import chunk_id
+
+if HAS_PYPDF:
+    from pypdf import PdfReader
+
+LINES_PER_PAGE = 60
+CHARS_PER_LINE = 95
+
+def report_pages(rng: random.Random, pages: int) -> List[List[str]]:
+    """Lines of each page of an annual report, with a table on every third page."""
+    result = []
+    for page in range(pages):
+        lines = [f"Annual Report 2025 - page {page + 1}", '']
+        while len(lines) < LINES_PER_PAGE - 22:
+            words = paragraph(rng).split()
+            line = ''
+            for word in words:
+                if len(line) + len(word) + 1 > CHARS_PER_LINE:
+                    lines.append(line)
+                    line = ''
+                line = f"{line} {word}" if line else word
+            lines.extend([line, ''])
+        if page % 3 == 2:
+            lines.extend(f"{rng.choice(WORDS):<16} {rng.randint(100, 99999):>10} {rng.randint(100, 99999):>10} {rng.uniform(-20, 20):>8.1f}%" for _ in range(20))
+        result.append(lines[:LINES_PER_PAGE])
+    return result
+
+def write_pdf(path: str, pages: List[List[str]]):
+    """Write a minimal uncompressed PDF with one Helvetica text stream per page."""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines in pages:
+        text = ''.join(f"({line.replace(chr(92), '').replace('(', '').replace(')', '')}) Tj T* " for line in lines)
+        stream = f"BT /F1 9 Tf 11 TL 40 770 Td {text}ET".encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (' '.join(f"{kid} 0 R" for kid in kids).encode(), len(kids))
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        f.writelines(b'%010d 00000 n \n' % offset for offset in offsets)
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+
+def write_html(path: str, pages: List[List[str]]):
+    """Write the report as HTML with a page-break style between pages."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<html><head><style>p { margin: 0 }</style></head><body>\n')
+        for lines in pages:
+            f.write('<div style="page-break-before: always">\n')
+            for line in lines:
+                f.write(f"<p>{line}</p>\n" if line else '<br>\n')
+            f.write('</div>\n')
+        f.write('</body></html>\n')
+
+def peak_rss_mb(who: int) -> float:
+    return resource.getrusage(who).ru_maxrss / 1024
+
+def load_in_memory(path: str, kind: str, backend: FAISSBackend, embeddings: Any) -> Dict[str, Any]:
+    """Extract, chunk and embed the whole filing in this process, then write it."""
+    start = time.perf_counter()
+    if kind == 'pdf':
+        pages = [page.extract_text() or '' for page in PdfReader(path).pages]
+    else:
+        pages = list(iter_html_pages(path))
+    chunks = Chunker().split('\n\n'.join(pages), NAMESPACE)
+    vectors = embeddings.embed_documents(chunks)
+    ids = [chunk_id(NAMESPACE, path, index) for index in range(len(chunks))]
+    backend.upsert(NAMESPACE, ids, vectors, chunks, [{'type': NAMESPACE, 'source': path}] * len(chunks))
+    elapsed = time.perf_counter() - start
+    return {'pages': len(pages), 'chunks': len(chunks), 'elapsed': elapsed, 'pages_per_sec': len(pages) / elapsed}
+
+def run_variant(variant: str, path: str, kind: str, store_path: str, factory: Any, queue: multiprocessing.Queue):
+    """Index the filing with one variant in a fresh process, so peak RSS is its own."""
+    backend = FAISSBackend(store_path=store_path)
+    if variant == 'in-memory':
+        stats = load_in_memory(path, kind, backend, factory())
+    else:
+        loader = FilingsLoader(backend, workers=int(variant[len('loader w'):]), embeddings_factory=factory, filings_dir=os.path.dirname(path))
+        stats = loader.load(path, {'symbol': 'TSM', 'date': '2025-12-31'})
+    queue.put(dict(stats, parent_mb=peak_rss_mb(resource.RUSAGE_SELF), worker_mb=peak_rss_mb(resource.RUSAGE_CHILDREN)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=300, help='Pages in the report (default: 300)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to run (default: 1 2 4)')
+    parser.add_argument('--format', nargs='+', default=['pdf', 'html'], choices=['pdf', 'html'], help='Filing formats (default: pdf html)')
+    parser.add_argument('--embeddings', default='hashing', choices=['hashing', 'local'], help='Embedding model (default: hashing)')
+    args = parser.parse_args()
+
+    if args.embeddings == 'local':
+        from retrieval.local_embeddings import LocalEmbeddings
+        factory = functools.partial(LocalEmbeddings, threads=1)
+    else:
+        factory = functools.partial(HashingEmbeddings, 384)
+
+    work_dir = tempfile.mkdtemp(prefix='filings_bench_')
+    try:
+        pages = report_pages(random.Random(0), args.pages)
+        files = {'pdf': os.path.join(work_dir, 'report.pdf'), 'html': os.path.join(work_dir, 'report.html')}
+        write_pdf(files['pdf'], pages)
+        write_html(files['html'], pages)
+
+        print(f"Embeddings: {args.embeddings}, CPUs: {os.cpu_count()}")
+        print(f"{'Format':<7} {'Variant':<11} {'MB':>6} {'Pages':>6} {'Chunks':>7} {'Pages/s':>8} {'Parent MB':>10} {'Worker MB':>10}")
+        for kind in args.format:
+            if kind == 'pdf' and not HAS_PYPDF:
+                print("pdf     skipped (pypdf not installed)")
+                continue
+            size = os.path.getsize(files[kind]) / 1e6
+            for variant in ['in-memory'] + [f"loader w{workers}" for workers in args.workers]:
+                store_path = os.path.join(work_dir, 'store')
+                shutil.rmtree(store_path, ignore_errors=True)
+                queue = multiprocessing.Queue()
+                process = multiprocessing.Process(target=run_variant, args=(variant, files[kind], kind, store_path, factory, queue))
+                process.start()
+                result = queue.get()
+                process.join()
+                print(f"{kind:<7} {variant:<11} {size:>6.1f} {result['pages']:>6} {result['chunks']:>7} {result['pages_per_sec']:>8.1f} "
+                      f"{result['parent_mb']:>10.0f} {result['worker_mb'] if variant != 'in-memory' else 0:>10.0f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
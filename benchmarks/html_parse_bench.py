@@ -0,0 +1,177 @@
+"""Micro-benchmark of HTML extraction backends over saved sample pages.
+
+Compares the original full-document ``BeautifulSoup(html, 'html.parser')`` approach
+with the strained BeautifulSoup, full lxml and streaming lxml backends of
+``HTMLExtractor`` on the pages the scrapers actually read.
+
+Usage:
+    python -m benchmarks.html_parse_bench [--pages DIR] [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import statistics
+import tracemalloc
+import multiprocessing
+from typing import List, Dict, Any, Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_ingestion.html_extract import HTMLExtractor, HAS_LXML, HAS_BS4
+
+if HAS_BS4:
+    from bs4 import BeautifulSoup
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_pages')
+
+NEWS_FIELDS = {
+    'yahoo_news.html': ('li.js-stream-content', {'title': ('h3', None), 'link': ('a', 'href'), 'summary': ('p', None)}),
+    'cnbc_asia.html': ('.Card-standardBreakerCard', {'title': ('.Card-title', None), 'link': ('a', 'href'), 'summary': ('.Card-description', None)})
+}
+
+def baseline(page: str, html: str) -> Any:
+    """Original extraction: full html.parser tree, then select."""
+    soup = BeautifulSoup(html, 'html.parser')
+    if page in NEWS_FIELDS:
+        article_selector, fields = NEWS_FIELDS[page]
+        results = []
+        for article in soup.select(article_selector)[:5]:
+            item = {}
+            for name, (selector, attr) in fields.items():
+                elem = article.select_one(selector)
+                item[name] = None if elem is None else (elem.get(attr) if attr else elem.text.strip())
+            results.append(item)
+        return results
+    if page == 'yahoo_analysis.html':
+        rows_data = []
+        for table in soup.find_all('table'):
+            table_title = table.find_previous('h2')
+            if table_title and 'Earnings Estimate' in table_title.text:
+                rows = table.find_all('tr')
+                headers = [th.text.strip() for th in rows[0].find_all('th')]
+                for row in rows[1:]:
+                    cells = row.find_all('td')
+                    if len(cells) >= len(headers):
+                        rows_data.append({headers[i]: cells[i].text.strip() for i in range(len(headers))})
+        return rows_data
+    if page == 'cnn_fear_greed.html':
+        indicator = soup.select_one('.market-fng-gauge__dial-number')
+        return [indicator.text.strip()] if indicator else []
+    articles = soup.select('.element--article')[:5]
+    return [{'headline': a.select_one('h3').text.strip() if a.select_one('h3') else None} for a in articles]
+
+def with_extractor(extractor: HTMLExtractor) -> Callable[[str, str], Any]:
+    """Build the extraction function for an HTMLExtractor configuration."""
+    def run(page: str, html: str) -> Any:
+        if page in NEWS_FIELDS:
+            article_selector, fields = NEWS_FIELDS[page]
+            return extractor.extract_articles(html, article_selector, fields, limit=5)
+        if page == 'yahoo_analysis.html':
+            return extractor.extract_tables_after_heading(html, 'Earnings Estimate')
+        if page == 'cnn_fear_greed.html':
+            return extractor.select_texts(html, '.market-fng-gauge__dial-number', limit=1)
+        return extractor.extract_articles(html, '.element--article', {'headline': ('h3', None)}, limit=5)
+    return run
+
+def variants() -> Dict[str, Callable[[str, str], Any]]:
+    """Get the extraction approaches to compare."""
+    result = {}
+    if HAS_BS4:
+        result['bs4 html.parser (current)'] = baseline
+        result['bs4 + SoupStrainer'] = with_extractor(HTMLExtractor(backend='bs4', partial=True))
+    if HAS_LXML:
+        result['lxml compiled XPath'] = with_extractor(HTMLExtractor(backend='lxml', partial=False))
+        result['lxml streaming partial'] = with_extractor(HTMLExtractor(backend='lxml', partial=True))
+    return result
+
+def _measure_memory(name: str, pages: Dict[str, str], queue):
+    """Measure peak memory of one variant in a fresh process.
+
+    tracemalloc only sees Python allocations, so the peak RSS of the process is
+    reported as well to account for libxml2's C-level trees.
+    """
+    run = variants()[name]
+    tracemalloc.start()
+    for page, html in pages.items():
+        run(page, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put((peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+
+def benchmark(pages: Dict[str, str], repeat: int) -> List[Dict[str, Any]]:
+    """Time every variant on every page and measure its memory.
+
+    Args:
+        pages: Mapping of page file name to HTML
+        repeat: Number of timed runs per page
+
+    Returns:
+        List of result rows, one per variant
+    """
+    all_variants = variants()
+    # Without beautifulsoup4 the outputs are compared with the first lxml variant instead
+    reference = baseline if HAS_BS4 else next(iter(all_variants.values()))
+    expected = {page: reference(page, html) for page, html in pages.items()}
+    rows = []
+    context = multiprocessing.get_context('spawn')  # Fresh interpreter so RSS is not inherited
+
+    for name, run in all_variants.items():
+        per_page = {}
+        matches = True
+        for page, html in pages.items():
+            matches = matches and run(page, html) == expected[page]
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run(page, html)
+                timings.append((time.perf_counter() - start) * 1000)
+            per_page[page] = statistics.median(timings)
+
+        queue = context.Queue()
+        process = context.Process(target=_measure_memory, args=(name, pages, queue))
+        process.start()
+        peak, peak_rss = queue.get()
+        process.join()
+
+        rows.append({
+            'variant': name,
+            'per_page_ms': per_page,
+            'total_ms': sum(per_page.values()),
+            'python_peak_kb': peak / 1024,
+            'peak_rss_kb': peak_rss / 1024,
+            'matches_baseline': matches
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', default=SAMPLE_DIR, help='Directory with saved sample pages')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per page')
+    args = parser.parse_args()
+
+    pages = {}
+    for file_name in sorted(os.listdir(args.pages)):
+        if file_name.endswith('.html'):
+            with open(os.path.join(args.pages, file_name), 'r', encoding='utf-8') as f:
+                pages[file_name] = f.read()
+
+    if not HAS_BS4 and not HAS_LXML:
+        print("Install beautifulsoup4 or lxml and cssselect to run this benchmark")
+        return
+    if not HAS_BS4:
+        print("beautifulsoup4 not installed, only the lxml backends are compared")
+    rows = benchmark(pages, args.repeat)
+    baseline_ms = rows[0]['total_ms']
+
+    print(f"{'variant':<28}{'total ms':>10}{'speedup':>9}{'py peak KB':>12}{'peak RSS KB':>13}  same output")
+    for row in rows:
+        print(f"{row['variant']:<28}{row['total_ms']:>10.2f}{baseline_ms / row['total_ms']:>8.1f}x{row['python_peak_kb']:>12.0f}{row['peak_rss_kb']:>13.0f}  {row['matches_baseline']}")
+    print()
+    print(f"{'page (median ms)':<28}" + ''.join(f"{row['variant'][:18]:>20}" for row in rows))
+    for page in pages:
+        print(f"{page:<28}" + ''.join(f"{row['per_page_ms'][page]:>20.2f}" for row in rows))
+
+if __name__ == "__main__":
+    main()
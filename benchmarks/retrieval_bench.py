@@ -0,0 +1,314 @@
+"""Retrieval quality vs latency over a synthetic financial corpus.
+
+Generates news, earnings, stock snapshot and sentiment items shaped like the
+inputs of ``RetrieverAgent.index_financial_data``, formats and chunks them the
+same way, and indexes them into one namespace per data type. Labeled queries
+come with the records they should retrieve: a paraphrased headline finds its
+article, and questions about a company's earnings or share price find any of its
+earnings reports or snapshots (the indexed text of those carries no date). Each
+retriever configuration is built over the same embeddings and searched like
+``retrieve_asia_tech_info``: every namespace, merged by score. Sentiment readings
+are indexed as distractors.
+
+Reported per corpus size and configuration: recall@1/5/k and MRR at the record
+level, p50/p99 search latency (query embedding excluded), resident vector memory,
+process RSS and index build time.
+
+Embeddings default to a hashing embedder (token and bigram features hashed into
+--dimension buckets), which needs no model or API and keeps 1M-chunk corpora
+feasible; --embeddings local uses the fastembed model instead.
+
+Usage:
+    python -m benchmarks.retrieval_bench [--sizes 1000 100000 1000000] [--queries 300] [--k 10]
+        [--configs flat hybrid sq8 ivfpq] [--embeddings hashing|local]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import resource
+import tempfile
+from datetime import date, timedelta
+from typing import List, Dict, Any, Tuple
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_ingestion.dedup import tokenize
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.lexical_index import BM25Index
+from retrieval.hybrid_search import hybrid_search
+from retrieval.financial_documents import financial_document
+from retrieval.chunker import Chunker
+from retrieval.record_ids import chunk_id
+
+NAMESPACES = ['news', 'earnings', 'stock_data', 'sentiment']
+
+# name -> (FAISS quantization, rerank factor, hybrid)
+CONFIGS = {
+    'flat': ('none', 0, False),
+    'hybrid': ('none', 0, True),
+    'sq8': ('sq8', 4, False),
+    'ivfpq': ('ivfpq', 4, False)
+}
+
+SYLLABLES = ['ta', 'ko', 'ri', 'sen', 'mu', 'lin', 'ga', 'vo', 'chen', 'hai', 'zu', 'pe', 'ran', 'dex', 'qi', 'no']
+SECTORS = ['Semiconductor', 'Electronics', 'Software', 'Internet', 'Display', 'Battery', 'Telecom', 'Cloud']
+COUNTRIES = ['Taiwan', 'South Korea', 'Japan', 'China', 'Hong Kong', 'Singapore']
+SUFFIXES = {'Taiwan': '.TW', 'South Korea': '.KS', 'Japan': '.T', 'China': '.SS', 'Hong Kong': '.HK', 'Singapore': '.SI'}
+SOURCES = ['Yahoo Finance', 'CNBC Asia', 'Nikkei Asia', 'Reuters', 'Bloomberg']
+EVENTS = [
+    ('raises', 'guidance after strong {product} demand', 'expects revenue growth as orders for {product} climb'),
+    ('cuts', 'outlook as {product} inventory piles up', 'warned that customers are delaying {product} purchases'),
+    ('wins', 'contract to supply {product} to a global carmaker', 'will start shipping {product} next quarter'),
+    ('faces', 'export curbs on advanced {product}', 'said new trade rules could hit {product} sales'),
+    ('expands', '{product} capacity with a new plant', 'is investing in additional {product} production lines'),
+    ('reports', 'record {product} shipments', 'shipped more {product} units than analysts expected')
+]
+PRODUCTS = ['AI accelerator', 'memory chip', 'OLED panel', 'EV battery', 'smartphone', '5G modem', 'server', 'image sensor']
+PARAPHRASES = {'raises': 'lifts', 'cuts': 'lowers', 'wins': 'secures', 'faces': 'hit by', 'expands': 'grows', 'reports': 'posts',
+               'guidance': 'forecast', 'outlook': 'forecast', 'demand': 'orders', 'contract': 'deal', 'capacity': 'production', 'record': 'all-time high'}
+MOODS = ['Bullish', 'Bearish', 'Neutral', 'Cautiously optimistic', 'Risk-off']
+
+class HashingEmbeddings:
+    """Deterministic embeddings from hashed unigram and bigram features (no model needed)."""
+
+    def __init__(self, dimension: int = 384):
+        self.model = f'hashing-{dimension}'
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype='float32')
+        tokens = tokenize(text)
+        for feature in tokens + [a + ' ' + b for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[np.ndarray]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed(text)
+
+def make_companies(count: int, rng: random.Random) -> List[Dict[str, str]]:
+    """Invent Asia tech companies with unique names and exchange-suffixed symbols."""
+    companies = []
+    for i in range(count):
+        country = rng.choice(COUNTRIES)
+        stem = ''.join(rng.choice(SYLLABLES) for _ in range(2)).capitalize()
+        companies.append({
+            'name': f"{stem}{i} {rng.choice(SECTORS)}",
+            'symbol': f"{1000 + i}{SUFFIXES[country]}",
+            'country': country
+        })
+    return companies
+
+def paraphrase(title: str) -> str:
+    """Reword a headline the way a user would ask about it."""
+    words = [PARAPHRASES.get(word.lower(), word) for word in title.split()]
+    return 'What happened with ' + ' '.join(words) + '?'
+
+def generate_corpus(target_chunks: int, chunker: Chunker, seed: int = 0) -> Tuple[Dict[str, Dict[str, list]], List[Dict[str, Any]]]:
+    """Generate records until the corpus reaches the target number of chunks.
+
+    Args:
+        target_chunks: Number of chunks to generate
+        chunker: Chunker splitting each record by its data type's policy
+        seed: Random seed
+
+    Returns:
+        (chunks per namespace as ids/texts/metadatas lists, labeled queries with namespace and record key)
+    """
+    rng = random.Random(seed)
+    companies = make_companies(max(20, target_chunks // 200), rng)
+    start = date(2023, 1, 2)
+    chunks = {namespace: {'ids': [], 'texts': [], 'metadatas': []} for namespace in NAMESPACES}
+    queries = []
+    total = 0
+    serial = 0
+
+    def add(data_type: str, item: Dict[str, Any], record_queries: List[str]):
+        nonlocal total
+        document = financial_document(item, data_type)
+        pieces = chunker.split(document['content'], data_type)
+        for index, text in enumerate(pieces):
+            chunks[data_type]['ids'].append(chunk_id(data_type, document['key'], index))
+            chunks[data_type]['texts'].append(text)
+            chunks[data_type]['metadatas'].append(dict(document['metadata'], record_key=document['key'], chunk_index=index))
+        total += len(pieces)
+        for query in record_queries:
+            queries.append({'query': query, 'namespace': data_type, 'record_key': document['key']})
+
+    while total < target_chunks:
+        serial += 1
+        company = rng.choice(companies)
+        day = (start + timedelta(days=rng.randrange(900))).isoformat()
+        kind = rng.random()
+        if kind < 0.6:
+            verb, headline, detail = rng.choice(EVENTS)
+            product = rng.choice(PRODUCTS)
+            title = f"{company['name']} {verb} {headline.format(product=product)}"
+            body = ''
+            if rng.random() < 0.3:
+                # Full articles fetched by the article pipeline span several chunks
+                body = ' '.join(f"{company['name']} {detail.format(product=product)}. Analysts at {rng.choice(SOURCES)} noted paragraph {p} of the report." for p in range(rng.randint(15, 40)))
+            add('news', {
+                'title': title,
+                'summary': f"{company['name']} {detail.format(product=product)}.",
+                'source': rng.choice(SOURCES),
+                'link': f"https://news.example.com/{serial}",
+                'tickers': [company['symbol']],
+                'body': body
+            }, [paraphrase(title)])
+        elif kind < 0.85:
+            change = round(rng.uniform(-6, 6), 2)
+            add('stock_data', {
+                'symbol': company['symbol'], 'name': company['name'], 'country': company['country'], 'date': day,
+                'price': round(rng.uniform(5, 900), 2), 'change_pct': change,
+                'volume': rng.randrange(10 ** 5, 10 ** 8), 'market_cap': rng.randrange(10 ** 9, 10 ** 12)
+            }, [f"How is {company['name']} stock trading?"] if rng.random() < 0.3 else [])
+        elif kind < 0.95:
+            estimate = round(rng.uniform(0.1, 5), 2)
+            reported = round(estimate * rng.uniform(0.7, 1.3), 2)
+            add('earnings', {
+                'symbol': company['symbol'], 'name': company['name'], 'date': day, 'eps_estimate': estimate,
+                'reported_eps': reported, 'surprise_pct': round((reported - estimate) / estimate * 100, 2)
+            }, [f"Did {company['name']} beat EPS estimates?"] if rng.random() < 0.5 else [])
+        else:
+            add('sentiment', {
+                'date': day, 'overall_sentiment': rng.choice(MOODS), 'sentiment_score': round(rng.uniform(-1, 1), 2),
+                'key_indicators': [{'headline': f"{rng.choice(companies)['name']} {rng.choice(EVENTS)[1].format(product=rng.choice(PRODUCTS))}"} for _ in range(3)]
+            }, [])
+
+    # Questions about a company's earnings or price match every record of it
+    symbol_keys = {}
+    for namespace in ('earnings', 'stock_data'):
+        for metadata in chunks[namespace]['metadatas']:
+            symbol_keys.setdefault((namespace, metadata['symbol']), set()).add(metadata['record_key'])
+    for query in queries:
+        if query['namespace'] in ('earnings', 'stock_data'):
+            query['relevant'] = symbol_keys[(query['namespace'], query['record_key'].split(':')[0])]
+        else:
+            query['relevant'] = {query['record_key']}
+    return chunks, queries
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def build(config: str, chunks: Dict[str, Dict[str, list]], vectors: Dict[str, np.ndarray], store_path: str) -> Tuple[FAISSBackend, Dict[str, BM25Index], float]:
+    """Index the embedded corpus with one retriever configuration.
+
+    Returns:
+        (backend, BM25 index per namespace or empty, build seconds)
+    """
+    quantization, rerank_factor, hybrid = CONFIGS[config]
+    start = time.perf_counter()
+    backend = FAISSBackend(store_path=store_path, use_mmap=True, quantization=quantization, rerank_factor=rerank_factor, quantize_min_vectors=1000)
+    lexical = {}
+    for namespace in NAMESPACES:
+        data = chunks[namespace]
+        if not data['ids']:
+            continue
+        # One upsert per namespace, folded into a full save so the exact vectors are memory-mapped as in serving
+        backend.upsert(namespace, data['ids'], vectors[namespace], data['texts'], data['metadatas'])
+        backend.checkpoint(namespace)
+        if hybrid:
+            lexical[namespace] = BM25Index()
+            for chunk, text, metadata in zip(data['ids'], data['texts'], data['metadatas']):
+                lexical[namespace].add(chunk, text, metadata)
+    return backend, lexical, time.perf_counter() - start
+
+def evaluate(backend: FAISSBackend, lexical: Dict[str, BM25Index], queries: List[Dict[str, Any]], query_vectors: List[np.ndarray], k: int) -> Dict[str, float]:
+    """Search every namespace for each labeled query and score the merged ranking by record."""
+    latencies = []
+    recall = {1: 0.0, 5: 0.0, k: 0.0}
+    reciprocal_rank = 0.0
+    for query, vector in zip(queries, query_vectors):
+        start = time.perf_counter()
+        matches = []
+        for namespace in NAMESPACES:
+            if namespace in lexical:
+                matches.extend(hybrid_search(backend, namespace, query['query'], vector, lexical[namespace], k))
+            else:
+                matches.extend(backend.search(namespace, vector, k=k))
+        matches.sort(key=lambda match: match['score'], reverse=True)
+        latencies.append(time.perf_counter() - start)
+
+        # Several chunks of one record count once, at the rank of the best one
+        ranked = list(dict.fromkeys(match['metadata']['record_key'] for match in matches))[:k]
+        relevant = query['relevant']
+        for cutoff in recall:
+            recall[cutoff] += len(relevant.intersection(ranked[:cutoff])) / min(len(relevant), cutoff)
+        for rank, key in enumerate(ranked, start=1):
+            if key in relevant:
+                reciprocal_rank += 1 / rank
+                break
+
+    latencies_ms = np.array(latencies) * 1000
+    result = {f'recall@{cutoff}': total / len(queries) for cutoff, total in recall.items()}
+    result.update({
+        'mrr': reciprocal_rank / len(queries),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))
+    })
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help='Corpus sizes in chunks (default: 1000 100000 1000000)')
+    parser.add_argument('--queries', type=int, default=300, help='Labeled queries sampled per size (default: 300)')
+    parser.add_argument('--k', type=int, default=10, help='Results per query (default: 10)')
+    parser.add_argument('--configs', nargs='+', choices=list(CONFIGS), default=list(CONFIGS), help='Retriever configurations (default: all)')
+    parser.add_argument('--embeddings', choices=['hashing', 'local'], default='hashing', help='Embedding model (default: hashing)')
+    parser.add_argument('--dimension', type=int, default=384, help='Hashing embedding dimension (default: 384)')
+    args = parser.parse_args()
+
+    if args.embeddings == 'local':
+        from retrieval.local_embeddings import LocalEmbeddings
+        embeddings = LocalEmbeddings()
+    else:
+        embeddings = HashingEmbeddings(args.dimension)
+    chunker = Chunker()
+
+    header = f"{'Config':<8} {'R@1':>6} {'R@5':>6} {'R@' + str(args.k):>6} {'MRR':>6} {'p50 ms':>8} {'p99 ms':>8} {'Vec MB':>8} {'RSS MB':>8} {'Build s':>8}"
+    for size in args.sizes:
+        chunks, queries = generate_corpus(size, chunker)
+        queries = random.Random(1).sample(queries, min(args.queries, len(queries)))
+        total = sum(len(chunks[namespace]['ids']) for namespace in NAMESPACES)
+
+        start = time.perf_counter()
+        vectors = {
+            namespace: np.asarray(embeddings.embed_documents(chunks[namespace]['texts']), dtype='float32').reshape(-1, getattr(embeddings, 'dimension', args.dimension))
+            for namespace in NAMESPACES
+        }
+        embed_seconds = time.perf_counter() - start
+        query_vectors = embeddings.embed_documents([query['query'] for query in queries])
+
+        counts = ', '.join(f"{namespace} {len(chunks[namespace]['ids'])}" for namespace in NAMESPACES)
+        print(f"\n{total} chunks ({counts}), {len(queries)} queries, embedded in {embed_seconds:.1f}s with {embeddings.model}")
+        print(header)
+        for config in args.configs:
+            store_path = tempfile.mkdtemp(prefix='retrieval_bench_')
+            try:
+                backend, lexical, build_seconds = build(config, chunks, vectors, store_path)
+                result = evaluate(backend, lexical, queries, query_vectors, args.k)
+                reports = [backend.memory_report(namespace) for namespace in NAMESPACES]
+                vector_mb = sum(report['resident_bytes_per_vector'] * report['vectors'] for report in reports) / 2 ** 20
+                print(f"{config:<8} {result['recall@1']:>6.3f} {result['recall@5']:>6.3f} {result[f'recall@{args.k}']:>6.3f} {result['mrr']:>6.3f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {vector_mb:>8.1f} {rss_mb():>8.0f} {build_seconds:>8.1f}")
+                del backend, lexical
+            finally:
+                shutil.rmtree(store_path, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Search latency, throughput and memory of the sharded vector store.
+
+Indexes the same synthetic clustered embeddings into one FAISSBackend and into
+ShardedBackend with each shard count, reopens each store from disk so indexes
+are memory-mapped as they would be after a restart, and searches it with
+perturbed copies of stored vectors: one query at a time for p50/p99 latency,
+then from --threads concurrent threads for queries/sec (the retriever searches
+namespaces side by side). Results of every sharded run are compared with the
+single index; with exact search they must match. Memory is the RSS the
+searching process gained over the benchmark's own data, and the private
+memory (USS) of the largest shard.
+
+Usage:
+    python -m benchmarks.shard_bench [--vectors 100000] [--dimension 384] [--shards 2 4] [--queries 500] [--threads 8]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.vector_quant_bench import synthetic_embeddings
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.sharded_backend import ShardedBackend
+
+NAMESPACE = 'bench'
+
+def rss_mb(pid: int) -> float:
+    """Resident set size of a process in MB."""
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+def private_mb(pid: int) -> float:
+    """Memory only a process holds (USS) in MB, leaving out pages shared with other processes such as libraries."""
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1])
+    return total / 1024
+
+def run(backend: Any, queries: np.ndarray, k: int, threads: int) -> Dict[str, Any]:
+    """Search one query at a time, then concurrently."""
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([match['id'] for match in backend.search(NAMESPACE, query, k=k)])
+        latencies.append(time.perf_counter() - start)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda query: backend.search(NAMESPACE, query, k=k), queries))
+        qps = len(queries) / (time.perf_counter() - start)
+    latencies.sort()
+    return {
+        'results': results,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'qps': qps
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vectors', type=int, default=100000, help='Stored vectors (default: 100000)')
+    parser.add_argument('--dimension', type=int, default=384, help='Vector dimension (default: 384)')
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4], help='Shard counts to run (default: 2 4)')
+    parser.add_argument('--queries', type=int, default=500, help='Queries (default: 500)')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent query threads (default: 8)')
+    parser.add_argument('--k', type=int, default=10, help='Results per query (default: 10)')
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors, args.dimension)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.vectors, args.queries)] + 0.1 * rng.standard_normal((args.queries, args.dimension)).astype('float32')
+    ids = [str(i) for i in range(args.vectors)]
+
+    print(f"{args.vectors} x {args.dimension} vectors, k={args.k}, {args.threads} query threads, CPUs: {os.cpu_count()}")
+    print(f"{'Store':<12} {'Build':>7} {'p50':>9} {'p99':>9} {'QPS':>7} {'Same':>6} {'Parent +MB':>10} {'Shard MB':>9}")
+    base_mb = rss_mb(os.getpid())
+    store_path = tempfile.mkdtemp(prefix='shard_bench_')
+    try:
+        baseline = None
+        for shards in [1] + args.shards:
+            path = os.path.join(store_path, str(shards))
+            writer = FAISSBackend(store_path=path) if shards == 1 else ShardedBackend(store_path=path, shards=shards)
+            start = time.perf_counter()
+            writer.upsert(NAMESPACE, ids, vectors, [''] * len(ids), [{}] * len(ids))
+            build = time.perf_counter() - start
+            if shards > 1:
+                writer.close()
+            del writer
+
+            backend = FAISSBackend(store_path=path) if shards == 1 else ShardedBackend(store_path=path, shards=shards)
+            # Load the indexes, and let spawned shards finish starting, before timing searches
+            backend.search(NAMESPACE, queries[0], k=args.k)
+            result = run(backend, queries, args.k, args.threads)
+            if baseline is None:
+                baseline = result['results']
+            same = sum(a == b for a, b in zip(result['results'], baseline)) / len(baseline)
+            shard_mb = max((private_mb(process.pid) for process in backend.processes), default=0.0) if shards > 1 else 0.0
+            label = 'single' if shards == 1 else f"{shards} shards"
+            print(f"{label:<12} {build:>6.1f}s {result['p50_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms {result['qps']:>7.0f} {same:>6.2f} "
+                  f"{rss_mb(os.getpid()) - base_mb:>10.0f} {shard_mb:>9.0f}")
+            if shards > 1:
+                backend.close()
+            del backend
+    finally:
+        shutil.rmtree(store_path, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Memory, recall and latency of the FAISS backend's quantization settings.
+
+Builds one namespace per setting from the same synthetic clustered embeddings
+(L2-normalized like the stored OpenAI vectors), then searches it with perturbed
+copies of stored vectors. Recall@k is measured against an exact brute-force
+search; memory is what a search keeps resident per vector (the exact index is
+memory-mapped and only read for re-ranked candidates).
+
+Usage:
+    python -m benchmarks.vector_quant_bench [--vectors N] [--dimension D] [--queries Q] [--k K]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from typing import List, Dict, Any
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval.faiss_backend import FAISSBackend
+
+# (label, quantization, rerank_factor, pq_m, nprobe)
+SETTINGS = [
+    ('flat (exact)', 'none', 0, None, None),
+    ('sq8', 'sq8', 0, None, None),
+    ('sq8 + rerank x4', 'sq8', 4, None, None),
+    ('ivfpq m=64 nprobe=16', 'ivfpq', 0, 64, 16),
+    ('ivfpq m=64 nprobe=16 + rerank x4', 'ivfpq', 4, 64, 16),
+    ('ivfpq m=96 nprobe=32 + rerank x4', 'ivfpq', 4, 96, 32),
+    ('ivfpq m=96 nprobe=32 + rerank x10', 'ivfpq', 10, 96, 32)
+]
+
+def synthetic_embeddings(count: int, dimension: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Generate normalized vectors grouped around topic centroids, like chunks of related articles."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dimension)).astype('float32')
+    vectors = centroids[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dimension)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def run_setting(vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, setting: tuple) -> Dict[str, Any]:
+    """Build and query one namespace with a quantization setting."""
+    label, quantization, rerank_factor, pq_m, nprobe = setting
+    store_path = tempfile.mkdtemp(prefix='quant_bench_')
+    try:
+        backend = FAISSBackend(store_path=store_path, use_mmap=True, quantization=quantization, rerank_factor=rerank_factor, pq_m=pq_m, nprobe=nprobe, quantize_min_vectors=1)
+        ids = [str(i) for i in range(len(vectors))]
+        start = time.perf_counter()
+        backend.upsert('bench', ids, vectors, [''] * len(ids), [{}] * len(ids))
+        # Fold the write into a full save, which maps the exact vectors from disk again
+        backend.checkpoint('bench')
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = backend.search('bench', query, k=k)
+            latencies.append(time.perf_counter() - start)
+            hits += len({int(result['id']) for result in results} & set(expected.tolist()))
+
+        memory = backend.memory_report('bench')
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            'setting': label,
+            'bytes_per_vector': memory['resident_bytes_per_vector'],
+            'recall': hits / (len(queries) * k),
+            'p50_ms': float(np.percentile(latencies_ms, 50)),
+            'p99_ms': float(np.percentile(latencies_ms, 99)),
+            'build_seconds': build_seconds
+        }
+    finally:
+        shutil.rmtree(store_path, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vectors', type=int, default=20000, help='Vectors in the index (default: 20000)')
+    parser.add_argument('--dimension', type=int, default=1536, help='Vector dimension (default: 1536, OpenAI ada-002)')
+    parser.add_argument('--queries', type=int, default=200, help='Queries to time (default: 200)')
+    parser.add_argument('--k', type=int, default=10, help='Results per query (default: 10)')
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors, args.dimension)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.vectors, args.queries)] + 0.3 * rng.standard_normal((args.queries, args.dimension)).astype('float32') / np.sqrt(args.dimension)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+
+    print(f"{args.vectors} vectors x {args.dimension} dims, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'Setting':<36} {'Bytes/vector':>12} {'Recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'Build s':>8}")
+    rows: List[Dict[str, Any]] = []
+    for setting in SETTINGS:
+        row = run_setting(vectors, queries, truth, args.k, setting)
+        rows.append(row)
+        print(f"{row['setting']:<36} {row['bytes_per_vector']:>12.0f} {row['recall']:>7.3f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['build_seconds']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
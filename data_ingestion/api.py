@@ -138,6 +138,7 @@ class FinancialDataAPI:
                     results.append({
                         'symbol': symbol,
                         'name': name,
+                        'date': hist.index[-1].strftime('%Y-%m-%d'),
                         'price': latest['Close'],
                         'change_pct': change_pct,
                         'volume': latest['Volume'],
@@ -0,0 +1,92 @@
+import os
+import time
+from typing import List, Dict, Any, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from data_ingestion.http_client import ScrapingClient, get_scraping_client
+from data_ingestion.html_extract import HTMLExtractor
+
+class ArticlePipeline:
+    """Fetch full article bodies with a bounded worker pool and stream them to a sink.
+
+    At most max_in_flight articles are being fetched or waiting to be consumed at any
+    time, and each article is handed to the sink (e.g. the retriever) as soon as its
+    body is extracted, then dropped. Memory therefore stays flat however many
+    articles go through the pipeline.
+    """
+
+    def __init__(self, client: ScrapingClient = None, extractor: HTMLExtractor = None, max_workers: int = None, max_in_flight: int = None, max_chars: int = None):
+        """Initialize the article pipeline.
+
+        Args:
+            client: HTTP client used for fetching pages (optional, defaults to the shared client)
+            extractor: HTML extraction backend (optional, defaults to lxml when installed)
+            max_workers: Number of concurrent article fetches (optional, can use from env)
+            max_in_flight: Maximum articles fetched but not yet consumed (optional, defaults to 2x workers)
+            max_chars: Maximum characters of body text kept per article (optional, can use from env)
+        """
+        self.client = client or get_scraping_client()
+        self.extractor = extractor or HTMLExtractor()
+        self.max_workers = max_workers or int(os.getenv('ARTICLE_FETCH_WORKERS', 4))
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.max_chars = max_chars or int(os.getenv('ARTICLE_MAX_CHARS', 20000))
+
+    def _fetch_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch one article page and attach its extracted body text."""
+        response = self.client.fetch(article['link'], source=f"{article.get('source', 'article')} article")
+        if response['status_code'] != 200 or not response['text']:
+            raise ValueError(f"status {response['status_code']}: {response['error']}")
+        body = self.extractor.extract_main_text(response['text'], max_chars=self.max_chars)
+        return dict(article, body=body)
+
+    def run(self, articles: Iterable[Dict[str, Any]], sink: Callable[[Dict[str, Any]], Any]) -> Dict[str, Any]:
+        """Fetch and extract every article, passing each one to the sink as soon as it is ready.
+
+        Articles whose page cannot be fetched are passed on with their teaser only.
+
+        Args:
+            articles: Articles with at least a 'link' key
+            sink: Called once per article with the article plus its 'body'; returning
+                False counts the article as not handed off
+
+        Returns:
+            Dictionary with counts of fetched, failed and sunk articles and the elapsed time
+        """
+        stats = {'fetched': 0, 'failed': 0, 'sunk': 0, 'sink_errors': 0, 'elapsed': 0.0}
+        start = time.perf_counter()
+        pending = {}
+
+        def consume(future):
+            article = pending.pop(future)
+            try:
+                result = future.result()
+                stats['fetched'] += 1
+            except Exception as e:
+                print(f"Error fetching full article {article.get('link')}: {e}")
+                result = dict(article, body='')
+                stats['failed'] += 1
+            try:
+                if sink(result) is False:
+                    stats['sink_errors'] += 1
+                else:
+                    stats['sunk'] += 1
+            except Exception as e:
+                print(f"Error handing off article {article.get('link')}: {e}")
+                stats['sink_errors'] += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='article') as executor:
+            for article in articles:
+                # Backpressure: wait for a slot before submitting more work
+                while len(pending) >= self.max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        consume(future)
+                pending[executor.submit(self._fetch_article, article)] = article
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    consume(future)
+
+        stats['elapsed'] = time.perf_counter() - start
+        print(f"Article pipeline: {stats['fetched']} fetched, {stats['failed']} failed, {stats['sunk']} indexed in {stats['elapsed']:.1f}s")
+        return stats
@@ -0,0 +1,223 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import random
+import threading
+from array import array
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'article_signatures.db')
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|guccounter|guce_\w+|ncid|soc_\w+|cmpid|mod|__source|tsrc|.*ref)$', re.IGNORECASE)
+TOKEN = re.compile(r'[a-z0-9]+(?:[.\'][a-z0-9]+)*')
+
+SHINGLE_SIZE = 2
+NUM_PERM = 60
+BANDS = 20  # 3 rows per band: pairs above ~0.6 Jaccard become candidates with >99% probability
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+MIN_TOKENS_FOR_NEAR_MATCH = 6
+
+# Fixed hash permutations so signatures stay comparable across runs
+_rng = random.Random(20240601)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+def normalize_url(url: str) -> str:
+    """Normalize an article URL so the same story links compare equal.
+
+    Args:
+        url: Article URL
+
+    Returns:
+        URL with lowercase scheme and host, no fragment, no tracking parameters and no trailing slash
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k)))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a text and split it into word tokens."""
+    return TOKEN.findall(text.lower())
+
+def shingles(tokens: List[str]) -> List[str]:
+    """Get the word shingles of a token sequence."""
+    if len(tokens) < SHINGLE_SIZE:
+        return [' '.join(tokens)]
+    return [' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+def minhash(tokens: List[str]) -> List[int]:
+    """Compute the MinHash signature of a token sequence over word shingles.
+
+    Args:
+        tokens: Word tokens
+
+    Returns:
+        List of NUM_PERM minimum hash values
+    """
+    hashes = {int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big') for shingle in shingles(tokens)}
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+def similarity(signature: List[int], other: List[int]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+def _bands(signature: List[int]) -> List[int]:
+    """Hash each LSH band of a MinHash signature to a signed 64-bit key."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(b''.join(row.to_bytes(8, 'big') for row in rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+def _pack(signature: List[int]) -> bytes:
+    """Serialize a MinHash signature."""
+    return array('Q', signature).tobytes()
+
+def _unpack(blob: bytes) -> List[int]:
+    """Deserialize a MinHash signature."""
+    return array('Q', blob).tolist()
+
+class ArticleDeduplicator:
+    """Drop articles that were already indexed, across sources and across runs.
+
+    An article is a duplicate when its normalized URL or its normalized text hash was
+    seen before, or when the MinHash estimate of its shingle Jaccard similarity with a
+    stored article reaches the threshold (the same wire story republished with a
+    tweaked headline or teaser). Signatures live in SQLite with a banded LSH index,
+    so a lookup only compares against a handful of candidates.
+    """
+
+    def __init__(self, db_path: str = None, threshold: float = None, retention_days: float = None):
+        """Initialize the deduplicator.
+
+        Args:
+            db_path: Path of the SQLite signature store (optional, can use from env)
+            threshold: Minimum estimated Jaccard similarity for a near duplicate (optional, can use from env)
+            retention_days: Days a signature is kept before it is pruned (optional, can use from env)
+        """
+        self.db_path = db_path or os.getenv('DEDUP_DB_PATH', DEFAULT_DB_PATH)
+        self.threshold = threshold or float(os.getenv('DEDUP_JACCARD_THRESHOLD', 0.6))
+        self.retention_days = retention_days or float(os.getenv('DEDUP_RETENTION_DAYS', 30))
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                url_hash TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                minhash BLOB NOT NULL,
+                link TEXT,
+                seen_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_signatures_content ON signatures (content_hash);
+            CREATE TABLE IF NOT EXISTS minhash_bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                url_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_minhash_bands ON minhash_bands (band, value);
+        """)
+        self.conn.commit()
+
+    def signature(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute the dedup signature of an article.
+
+        Args:
+            article: Article with 'link', 'title' and 'summary' keys
+
+        Returns:
+            Dictionary with url_hash, content_hash, minhash and token count
+        """
+        tokens = tokenize(f"{article.get('title', '')} {article.get('summary', '')}")
+        return {
+            'url_hash': hashlib.sha256(normalize_url(article.get('link', '')).encode('utf-8')).hexdigest(),
+            'content_hash': hashlib.sha256(' '.join(tokens).encode('utf-8')).hexdigest(),
+            'minhash': minhash(tokens),
+            'tokens': len(tokens)
+        }
+
+    def _find_stored(self, signature: Dict[str, Any]) -> Optional[str]:
+        """Find a stored article duplicating a signature. Must be called with the lock held."""
+        row = self.conn.execute(
+            "SELECT link FROM signatures WHERE url_hash = ? OR content_hash = ? LIMIT 1",
+            (signature['url_hash'], signature['content_hash'])
+        ).fetchone()
+        if row:
+            return row[0] or ''
+        if signature['tokens'] < MIN_TOKENS_FOR_NEAR_MATCH:
+            return None
+
+        clauses = ' OR '.join('(b.band = ? AND b.value = ?)' for _ in range(BANDS))
+        params = [p for band, value in enumerate(_bands(signature['minhash'])) for p in (band, value)]
+        for link, stored in self.conn.execute(
+            f"SELECT DISTINCT s.link, s.minhash FROM minhash_bands b JOIN signatures s ON s.url_hash = b.url_hash WHERE {clauses}",
+            params
+        ):
+            if similarity(_unpack(stored), signature['minhash']) >= self.threshold:
+                return link or ''
+        return None
+
+    def filter_new(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep only the articles that duplicate neither the store nor each other.
+
+        Nothing is recorded here; call record once the returned articles are indexed.
+
+        Args:
+            articles: Scraped articles
+
+        Returns:
+            Novel articles, in input order
+        """
+        novel = []
+        batch = []
+        with self._lock:
+            for article in articles:
+                signature = self.signature(article)
+                if self._find_stored(signature) is not None:
+                    continue
+                if any(
+                    signature['url_hash'] == other['url_hash']
+                    or signature['content_hash'] == other['content_hash']
+                    or (signature['tokens'] >= MIN_TOKENS_FOR_NEAR_MATCH and other['tokens'] >= MIN_TOKENS_FOR_NEAR_MATCH
+                        and similarity(signature['minhash'], other['minhash']) >= self.threshold)
+                    for other in batch
+                ):
+                    continue
+                batch.append(signature)
+                novel.append(article)
+
+        if len(novel) < len(articles):
+            print(f"Dropped {len(articles) - len(novel)} duplicate articles out of {len(articles)}")
+        return novel
+
+    def record(self, articles: List[Dict[str, Any]]):
+        """Store the signatures of indexed articles and prune expired ones.
+
+        Args:
+            articles: Articles that were indexed
+        """
+        now = time.time()
+        with self._lock:
+            for article in articles:
+                signature = self.signature(article)
+                self.conn.execute("DELETE FROM minhash_bands WHERE url_hash = ?", (signature['url_hash'],))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO signatures (url_hash, content_hash, minhash, link, seen_at) VALUES (?, ?, ?, ?, ?)",
+                    (signature['url_hash'], signature['content_hash'], _pack(signature['minhash']), article.get('link', ''), now)
+                )
+                self.conn.executemany(
+                    "INSERT INTO minhash_bands (band, value, url_hash) VALUES (?, ?, ?)",
+                    [(band, value, signature['url_hash']) for band, value in enumerate(_bands(signature['minhash']))]
+                )
+
+            cutoff = now - self.retention_days * 86400
+            self.conn.execute("DELETE FROM minhash_bands WHERE url_hash IN (SELECT url_hash FROM signatures WHERE seen_at < ?)", (cutoff,))
+            self.conn.execute("DELETE FROM signatures WHERE seen_at < ?", (cutoff,))
+            self.conn.commit()
@@ -0,0 +1,407 @@
+"""Load PDF and HTML filings (earnings releases, annual reports) into the filings namespace.
+
+A filing is read page by page: PDFs are split into page ranges that worker
+processes open and extract themselves, and HTML is parsed incrementally and cut
+at page breaks. Workers chunk and embed their pages, and the parent writes each
+batch into a new version of the namespace that is published once the whole
+filing is in. Run from the repository root:
+
+    python -m data_ingestion.filings_loader filings/tsmc_2025_annual_report.pdf --symbol TSM --date 2025-12-31
+    python -m data_ingestion.filings_loader https://example.com/q3-results.html --symbol 005930.KS --title "Q3 results"
+"""
+import os
+import re
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import ipaddress
+import multiprocessing
+from urllib.parse import urlparse, urljoin
+from html.parser import HTMLParser
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable, Iterator
+import numpy as np
+
+try:
+    from pypdf import PdfReader
+    HAS_PYPDF = True
+except ImportError:
+    HAS_PYPDF = False
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_ingestion.http_client import get_scraping_client
+from retrieval.chunker import Chunker
+from retrieval.embedding_cache import CachedEmbeddings
+from retrieval.embeddings import create_embeddings, index_model
+from retrieval.record_ids import record_key, chunk_prefix, chunk_id
+from retrieval.vector_backend import VectorBackend
+
+NAMESPACE = 'filings'
+
+# Local filings are only read from this directory (FILINGS_DIR); anything else must be an http(s) URL
+DEFAULT_FILINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'filings')
+MAX_REDIRECTS = 5
+
+# Chunk IDs are page * MAX_CHUNKS_PER_PAGE + position, so they stay stable when a filing is reloaded
+MAX_CHUNKS_PER_PAGE = 1000
+
+# HTML filings without page-break styles are cut into pages of about this many characters
+HTML_PAGE_CHARS = 4000
+HTML_READ_SIZE = 1 << 16
+
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'table', 'tr', 'li', 'ul', 'ol', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre'}
+SKIP_TAGS = {'script', 'style', 'head', 'noscript'}
+PAGE_BREAK = re.compile(r'page-break-(?:before|after)\s*:\s*always|break-(?:before|after)\s*:\s*page', re.IGNORECASE)
+
+class _HTMLPageParser(HTMLParser):
+    """Incremental HTML parser that collects the text of a filing page by page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pages = []
+        self._parts = []
+        self._chars = 0
+        self._skip = 0
+        self._page_breaks = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        style = dict(attrs).get('style') or ''
+        if tag == 'hr' or PAGE_BREAK.search(style):
+            self._page_breaks = True
+            self.flush()
+        elif tag in BLOCK_TAGS:
+            if not self._page_breaks and self._chars >= HTML_PAGE_CHARS:
+                self.flush()
+            self._parts.append('\n' if tag in ('br', 'tr', 'li') else '\n\n')
+        elif tag in ('td', 'th'):
+            self._parts.append(' | ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._parts.append(data)
+            self._chars += len(data)
+
+    def flush(self):
+        """End the current page."""
+        text = _clean_text(''.join(self._parts))
+        if text:
+            self.pages.append(text)
+        self._parts = []
+        self._chars = 0
+
+def _clean_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines, keeping blank lines as paragraph breaks."""
+    lines = [re.sub(r'\s+', ' ', line).strip(' |') for line in text.split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def iter_html_pages(path: str) -> Iterator[str]:
+    """Stream the text of an HTML filing page by page, reading the file in blocks."""
+    parser = _HTMLPageParser()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for block in iter(lambda: f.read(HTML_READ_SIZE), ''):
+            parser.feed(block)
+            yield from parser.pages
+            parser.pages = []
+    parser.close()
+    parser.flush()
+    yield from parser.pages
+
+def check_url(url: str, allowed_hosts: List[str] = None) -> str:
+    """Check that a filing URL is http(s) and points at a public host.
+
+    Args:
+        url: URL to check
+        allowed_hosts: Hosts (and their subdomains) filings may be fetched from (optional, can use
+            comma-separated FILINGS_ALLOWED_HOSTS from env; empty allows any public host)
+
+    Returns:
+        A checked address of the host, to connect to without resolving the host again
+
+    Raises:
+        ValueError: if the scheme, host or any address the host resolves to is not allowed
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError(f"Filing URLs must be http(s) with a host: {url}")
+    host = parsed.hostname.lower().rstrip('.')
+    if allowed_hosts is None:
+        allowed_hosts = [entry.strip().lower() for entry in os.getenv('FILINGS_ALLOWED_HOSTS', '').split(',') if entry.strip()]
+    if allowed_hosts and not any(host == allowed or host.endswith('.' + allowed) for allowed in allowed_hosts):
+        raise ValueError(f"Host {host} is not in FILINGS_ALLOWED_HOSTS")
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, parsed.port or (443 if parsed.scheme == 'https' else 80), proto=socket.IPPROTO_TCP)]
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve {host}: {e}")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError(f"Host {host} resolves to the non-public address {address}")
+    return addresses[0]
+
+def check_local_path(path: str, filings_dir: str = None) -> str:
+    """Check that a local filing lies inside the filings directory.
+
+    Args:
+        path: Path of the filing, absolute or relative to the working directory
+        filings_dir: Directory local filings are read from (optional, can use FILINGS_DIR from env)
+
+    Returns:
+        The resolved absolute path
+
+    Raises:
+        ValueError: if the path (after resolving symlinks) is outside the directory
+    """
+    root = os.path.realpath(filings_dir or os.getenv('FILINGS_DIR', DEFAULT_FILINGS_DIR))
+    resolved = os.path.realpath(path)
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Local filings must be inside {root} (FILINGS_DIR): {path}")
+    return resolved
+
+def check_source(source: str, filings_dir: str = None):
+    """Check a filing source before it is read or fetched (see check_url and check_local_path).
+
+    Raises:
+        ValueError: if the source is neither a public http(s) URL nor a file inside the filings directory
+    """
+    if '://' in source:
+        check_url(source)
+    else:
+        check_local_path(source, filings_dir)
+
+def pdf_page_count(path: str) -> int:
+    """Count the pages of a PDF without extracting them."""
+    if not HAS_PYPDF:
+        raise ValueError("pypdf must be installed to load PDF filings (pip install pypdf).")
+    return len(PdfReader(path).pages)
+
+# Per-process state of the chunk and embed workers
+_worker = {}
+
+def _init_worker(embeddings_factory: Optional[Callable[[], Any]], openai_api_key: Optional[str], threads: Optional[int]):
+    """Create the chunker and embedding model of a worker process."""
+    if embeddings_factory is not None:
+        embeddings = embeddings_factory()
+    else:
+        embeddings = create_embeddings(openai_api_key=openai_api_key, threads=threads)[0]
+        if os.getenv('EMBEDDING_CACHE', 'on').lower() != 'off':
+            embeddings = CachedEmbeddings(embeddings)
+    _worker['embeddings'] = embeddings
+    _worker['chunker'] = Chunker()
+
+def _process_pages(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract (for PDFs), chunk and embed a range of pages in a worker process."""
+    if task['kind'] == 'pdf':
+        # Workers open the file themselves and keep it open across tasks, since reading the
+        # page tree again per task costs as much as extracting the pages
+        stat = os.stat(task['path'])
+        key = (task['path'], stat.st_mtime_ns, stat.st_size)
+        if _worker.get('pdf_key') != key:
+            _worker['pdf_key'] = key
+            _worker['pdf'] = PdfReader(task['path'])
+        reader = _worker['pdf']
+        pages = [reader.pages[number].extract_text() or '' for number in range(task['first'], task['last'])]
+        # Drop the parsed objects of these pages so memory stays bounded by one task
+        reader.resolved_objects.clear()
+    else:
+        pages = task['pages']
+
+    chunks = []
+    for offset, text in enumerate(pages):
+        for position, chunk in enumerate(_worker['chunker'].split(text, NAMESPACE)[:MAX_CHUNKS_PER_PAGE]):
+            chunks.append((task['first'] + offset, position, chunk))
+    vectors = _worker['embeddings'].embed_documents([chunk for _, _, chunk in chunks]) if chunks else []
+    return {
+        'first': task['first'],
+        'pages': len(pages),
+        'chunks': chunks,
+        'vectors': np.asarray(vectors, dtype='float32')
+    }
+
+class FilingsLoader:
+    """Stream PDF and HTML filings into the vector store with a pool of worker processes.
+
+    At most max_in_flight page ranges are being processed or waiting to be written,
+    and each is upserted into the namespace build as soon as it is embedded, so
+    memory stays bounded by a few page ranges however long the filing is.
+    """
+
+    def __init__(self, backend: VectorBackend, openai_api_key: str = None, workers: int = None, pages_per_task: int = None, max_in_flight: int = None, embeddings_factory: Callable[[], Any] = None, filings_dir: str = None):
+        """Initialize the filings loader.
+
+        Args:
+            backend: Vector store the filings are indexed into
+            openai_api_key: OpenAI API key for the workers' embeddings (optional, can use from env)
+            workers: Number of worker processes (optional, can use FILINGS_WORKERS from env)
+            pages_per_task: Pages a worker processes at a time (optional, can use from env)
+            max_in_flight: Maximum page ranges processed or waiting to be written (optional, defaults to 2x workers)
+            embeddings_factory: Picklable function creating the embedding model in each worker
+                (optional, defaults to the model selected by EMBEDDING_PROVIDER)
+            filings_dir: Directory local filings may be read from (optional, can use FILINGS_DIR from env)
+        """
+        self.backend = backend
+        self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
+        self.workers = workers or int(os.getenv('FILINGS_WORKERS', min(4, os.cpu_count() or 1)))
+        self.pages_per_task = pages_per_task or int(os.getenv('FILINGS_PAGES_PER_TASK', 8))
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.embeddings_factory = embeddings_factory
+        self.filings_dir = filings_dir
+
+    def _tasks(self, path: str, kind: str) -> Iterator[Dict[str, Any]]:
+        """Split a filing into page-range tasks."""
+        if kind == 'pdf':
+            total = pdf_page_count(path)
+            for first in range(0, total, self.pages_per_task):
+                yield {'kind': 'pdf', 'path': path, 'first': first, 'last': min(first + self.pages_per_task, total)}
+            return
+        pages = []
+        first = 0
+        for text in iter_html_pages(path):
+            pages.append(text)
+            if len(pages) == self.pages_per_task:
+                yield {'kind': 'html', 'pages': pages, 'first': first}
+                first += len(pages)
+                pages = []
+        if pages:
+            yield {'kind': 'html', 'pages': pages, 'first': first}
+
+    def load(self, source: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Index a filing, replacing any earlier version of it.
+
+        Args:
+            source: http(s) URL of a PDF or HTML filing, or a path inside FILINGS_DIR
+            metadata: Fields stored with every chunk, e.g. 'symbol', 'title' and 'date' (YYYY-MM-DD)
+
+        Returns:
+            Dictionary with the pages and chunks indexed, elapsed seconds, pages per second and success
+        """
+        stats = {'source': source, 'pages': 0, 'chunks': 0, 'elapsed': 0.0, 'pages_per_sec': 0.0, 'success': False}
+        start = time.perf_counter()
+        download = None
+        try:
+            if '://' in source:
+                suffix = os.path.splitext(source.split('?')[0])[1] or '.html'
+                handle, download = tempfile.mkstemp(suffix=suffix)
+                os.close(handle)
+                path = download = self._download(source, download)
+            else:
+                source = path = check_local_path(source, self.filings_dir)
+            with open(path, 'rb') as f:
+                kind = 'pdf' if f.read(5) == b'%PDF-' else 'html'
+
+            self._index(path, kind, source, metadata or {}, stats)
+            stats['success'] = True
+        except Exception as e:
+            print(f"Error loading filing {source}: {e}")
+        finally:
+            if download and os.path.exists(download):
+                os.remove(download)
+
+        stats['elapsed'] = time.perf_counter() - start
+        stats['pages_per_sec'] = stats['pages'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        print(f"Filings loader: {stats['pages']} pages, {stats['chunks']} chunks from {source} in {stats['elapsed']:.1f}s ({stats['pages_per_sec']:.1f} pages/sec)")
+        return stats
+
+    def _download(self, url: str, path: str) -> str:
+        """Download a filing, checking the original URL and the target of every redirect.
+
+        Each request goes to the address that was checked, so the host cannot be made to
+        resolve to an internal address between the check and the download.
+
+        Returns:
+            Path of the downloaded file, renamed to .pdf when the server says it is a PDF
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            address = check_url(url)
+            result = get_scraping_client().download(url, path, source='filing', allow_redirects=False, address=address)
+            if result['status_code'] in (301, 302, 303, 307, 308) and result['location']:
+                url = urljoin(url, result['location'])
+                continue
+            if result['status_code'] != 200:
+                raise ValueError(f"status {result['status_code']}: {result['error']}")
+            if 'pdf' in (result['content_type'] or '').lower() and not path.endswith('.pdf'):
+                os.rename(path, path + '.pdf')
+                path += '.pdf'
+            return path
+        raise ValueError(f"more than {MAX_REDIRECTS} redirects")
+
+    def _index(self, path: str, kind: str, source: str, metadata: Dict[str, Any], stats: Dict[str, Any]):
+        """Chunk and embed a filing in the worker pool and publish it as one new namespace version."""
+        indexed_at = time.time()
+        base = dict(metadata, type=NAMESPACE, source=source)
+        key = record_key(NAMESPACE, base)
+        try:
+            timestamp = datetime.strptime(str(base.get('date', ''))[:10], '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            timestamp = indexed_at
+        written = set()
+
+        def write(result: Dict[str, Any]):
+            ids, texts, metadatas = [], [], []
+            for page, position, text in result['chunks']:
+                index = page * MAX_CHUNKS_PER_PAGE + position
+                ids.append(chunk_id(NAMESPACE, key, index))
+                texts.append(text)
+                metadatas.append(dict(base, record_key=key, chunk_index=index, page=page + 1, timestamp=timestamp, indexed_at=indexed_at))
+            if ids:
+                self.backend.upsert(build, ids, result['vectors'], texts, metadatas)
+                written.update(ids)
+            stats['pages'] += result['pages']
+            stats['chunks'] += len(ids)
+
+        build = self.backend.begin_build(NAMESPACE)
+        try:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # Spawned, not forked: the server process runs threads whose locks a fork would copy mid-use
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker,
+                                     initargs=(self.embeddings_factory, self.openai_api_key, threads)) as executor:
+                pending = set()
+                for task in self._tasks(path, kind):
+                    # Backpressure: wait for a slot before reading more pages
+                    while len(pending) >= self.max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            write(future.result())
+                    pending.add(executor.submit(_process_pages, task))
+                for future in wait(pending).done:
+                    write(future.result())
+
+            # Pages dropped from a reloaded filing would otherwise linger
+            prefix = chunk_prefix(NAMESPACE, key)
+            stale = [stored for stored in self.backend.list_ids(NAMESPACE) if stored.startswith(prefix) and stored not in written]
+            if stale:
+                self.backend.delete(build, stale)
+        except Exception:
+            self.backend.abort_build(build)
+            raise
+        self.backend.publish_build(build)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', nargs='+', help='Path or URL of a PDF or HTML filing')
+    parser.add_argument('--symbol', help='Ticker the filing belongs to')
+    parser.add_argument('--title', help='Title of the filing')
+    parser.add_argument('--date', help='Period end or filing date, YYYY-MM-DD')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: FILINGS_WORKERS from env)')
+    args = parser.parse_args()
+
+    import resource
+    from retrieval.vector_backend import create_vector_backend
+    # Same index directory the retriever uses for the configured embedding model
+    loader = FilingsLoader(create_vector_backend(model=index_model()), workers=args.workers)
+    metadata = {field: getattr(args, field) for field in ('symbol', 'title', 'date') if getattr(args, field)}
+    for source in args.source:
+        loader.load(source, metadata)
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+if __name__ == "__main__":
+    main()
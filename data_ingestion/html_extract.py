@@ -0,0 +1,324 @@
+import io
+import os
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+try:
+    from bs4 import BeautifulSoup, SoupStrainer
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+try:
+    from lxml import etree
+    import lxml.html
+    from cssselect import GenericTranslator
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Selectors of the form "tag", ".class" or "tag.class1.class2" can be matched while streaming
+SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)$')
+
+# Elements that never hold article body text
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'figure']
+
+# Field specification: output name -> (CSS selector relative to the article, attribute or None for text)
+FieldSpec = Dict[str, Tuple[str, Optional[str]]]
+
+@lru_cache(maxsize=256)
+def compile_selector(css: str, relative: bool = False):
+    """Compile a CSS selector to an lxml XPath evaluator once and reuse it.
+
+    Args:
+        css: CSS selector
+        relative: Match descendants of the context node only (like bs4's select_one on an element)
+
+    Returns:
+        Compiled lxml XPath object
+    """
+    prefix = 'descendant::' if relative else 'descendant-or-self::'
+    return etree.XPath(GenericTranslator().css_to_xpath(css, prefix=prefix))
+
+@lru_cache(maxsize=256)
+def _simple_predicate(css: str):
+    """Build a start-tag predicate for a simple selector, or None if the selector is not simple."""
+    match = SIMPLE_SELECTOR.match(css.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    tag = match.group(1).lower() if match.group(1) else None
+    classes = [c for c in match.group(2).split('.') if c]
+
+    def predicate(element) -> bool:
+        if tag and element.tag != tag:
+            return False
+        if classes:
+            element_classes = (element.get('class') or '').split()
+            return all(c in element_classes for c in classes)
+        return True
+    return predicate
+
+def _strainer(css: str) -> Optional['SoupStrainer']:
+    """Build a SoupStrainer for a simple selector, or None if the selector is not simple."""
+    match = SIMPLE_SELECTOR.match(css.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    classes = [c for c in match.group(2).split('.') if c]
+    attrs = {}
+    if classes:
+        attrs['class'] = lambda value: value is not None and all(c in value.split() for c in classes)
+    return SoupStrainer(match.group(1), attrs=attrs)
+
+class HTMLExtractor:
+    """Extract listing items, tables and article bodies from scraped pages.
+
+    The lxml backend evaluates CSS selectors compiled to XPath once per process. In
+    partial mode it instead streams the document for simple article selectors, keeping
+    only the selected subtrees in memory and stopping as soon as the limit is reached;
+    that wins on very large pages but costs a little on typical listing pages, so it is
+    opt-in for lxml. Without lxml the extractor falls back to BeautifulSoup restricted
+    by a SoupStrainer.
+    """
+
+    def __init__(self, backend: str = None, partial: bool = None):
+        """Initialize the extractor.
+
+        Args:
+            backend: 'lxml' or 'bs4' (optional, can use SCRAPER_PARSER from env)
+            partial: Only build the subtrees that are selected (optional, can use
+                SCRAPER_PARTIAL_PARSE from env; defaults to on for bs4 and off for lxml)
+        """
+        backend = backend or os.getenv('SCRAPER_PARSER', 'lxml' if HAS_LXML else 'bs4')
+        if backend == 'lxml' and not HAS_LXML:
+            print("lxml/cssselect not installed, falling back to BeautifulSoup")
+            backend = 'bs4'
+        if backend == 'bs4' and not HAS_BS4:
+            if not HAS_LXML:
+                raise ImportError("HTML extraction needs beautifulsoup4 or lxml and cssselect")
+            print("beautifulsoup4 not installed, using lxml")
+            backend = 'lxml'
+        self.backend = backend
+        if partial is None:
+            partial = os.getenv('SCRAPER_PARTIAL_PARSE', 'on' if backend == 'bs4' else 'off').lower() == 'on'
+        self.partial = partial
+
+    def extract_articles(self, html: str, article_selector: str, fields: FieldSpec, limit: int = None) -> List[Dict[str, Optional[str]]]:
+        """Extract one dictionary per element matching the article selector.
+
+        Args:
+            html: Page HTML
+            article_selector: CSS selector of the article elements
+            fields: Mapping of output name to (relative CSS selector, attribute or None for text)
+            limit: Maximum number of articles to extract
+
+        Returns:
+            List of dictionaries with one value (or None when missing) per field
+        """
+        if self.backend == 'lxml':
+            predicate = _simple_predicate(article_selector) if self.partial else None
+            if predicate:
+                nodes = self._iter_matching(html, predicate)
+            else:
+                nodes = iter(compile_selector(article_selector)(self._document(html)))
+
+            articles = []
+            for node in nodes:
+                articles.append({name: self._lxml_field(node, selector, attr) for name, (selector, attr) in fields.items()})
+                if limit is not None and len(articles) >= limit:
+                    break
+            return articles
+
+        soup = self._soup(html, _strainer(article_selector) if self.partial else None)
+        articles = []
+        for node in soup.select(article_selector, limit=limit or 0):
+            item = {}
+            for name, (selector, attr) in fields.items():
+                elem = node.select_one(selector)
+                if elem is None:
+                    item[name] = None
+                else:
+                    item[name] = elem.get(attr) if attr else elem.text.strip()
+            articles.append(item)
+        return articles
+
+    def select_texts(self, html: str, selector: str, limit: int = None) -> List[str]:
+        """Get the stripped text of elements matching a selector.
+
+        Args:
+            html: Page HTML
+            selector: CSS selector
+            limit: Maximum number of elements
+
+        Returns:
+            List of element texts
+        """
+        if self.backend == 'lxml':
+            predicate = _simple_predicate(selector) if self.partial else None
+            nodes = self._iter_matching(html, predicate) if predicate else iter(compile_selector(selector)(self._document(html)))
+            texts = []
+            for node in nodes:
+                texts.append(_text(node).strip())
+                if limit is not None and len(texts) >= limit:
+                    break
+            return texts
+
+        soup = self._soup(html, _strainer(selector) if self.partial else None)
+        return [node.text.strip() for node in soup.select(selector, limit=limit or 0)]
+
+    def extract_tables_after_heading(self, html: str, heading_text: str) -> List[Dict[str, str]]:
+        """Extract the rows of every table whose closest preceding <h2> contains a text.
+
+        Args:
+            html: Page HTML
+            heading_text: Text the preceding <h2> must contain
+
+        Returns:
+            List of dictionaries mapping header cell text to row cell text
+        """
+        tables = []
+        if self.backend == 'lxml':
+            if self.partial:
+                tables = list(self._iter_tables_after_heading(html, heading_text))
+            else:
+                xpath = compile_xpath("//table[preceding::h2[1][contains(., $heading)]]")
+                for table in xpath(self._document(html), heading=heading_text):
+                    tables.append([
+                        ([_text(th).strip() for th in row.iterfind('th')], [_text(td).strip() for td in row.iterfind('td')])
+                        for row in table.iter('tr')
+                    ])
+        else:
+            soup = self._soup(html, SoupStrainer(['h2', 'table']) if self.partial else None)
+            for table in soup.find_all('table'):
+                table_title = table.find_previous('h2')
+                if table_title and heading_text in table_title.text:
+                    tables.append([
+                        ([th.text.strip() for th in row.find_all('th')], [td.text.strip() for td in row.find_all('td')])
+                        for row in table.find_all('tr')
+                    ])
+
+        rows_data = []
+        for rows in tables:
+            if not rows:
+                continue
+            headers = rows[0][0]
+            for _, cells in rows[1:]:
+                if len(cells) >= len(headers):
+                    rows_data.append({headers[i]: cells[i] for i in range(len(headers))})
+        return rows_data
+
+    def extract_main_text(self, html: str, max_chars: int = None) -> str:
+        """Extract the main body text of an article page.
+
+        Boilerplate containers are dropped, then the paragraphs of the <article> element
+        are used, or else those of the element holding the most paragraph text.
+
+        Args:
+            html: Page HTML
+            max_chars: Maximum number of characters to return
+
+        Returns:
+            Paragraphs of the article body separated by blank lines
+        """
+        if self.backend == 'lxml':
+            doc = self._document(html)
+            etree.strip_elements(doc, *BOILERPLATE_TAGS, with_tail=False)
+            paragraphs = [(p.getparent(), _text(p).strip()) for p in doc.iter('p')]
+            articles = [el for el in doc.iter('article') if any(True for _ in el.iter('p'))]
+            if articles:
+                paragraphs = [(articles[0], _text(p).strip()) for p in articles[0].iter('p')]
+        else:
+            soup = self._soup(html, None)
+            for element in soup.find_all(BOILERPLATE_TAGS):
+                element.decompose()
+            article = next((el for el in soup.find_all('article') if el.find('p')), None)
+            if article is not None:
+                paragraphs = [(article, p.get_text().strip()) for p in article.find_all('p')]
+            else:
+                paragraphs = [(p.parent, p.get_text().strip()) for p in soup.find_all('p')]
+
+        scores = {}
+        for parent, text in paragraphs:
+            scores[id(parent)] = scores.get(id(parent), 0) + len(text)
+        if not scores:
+            return ''
+        best = max(scores, key=scores.get)
+
+        body = '\n\n'.join(text for parent, text in paragraphs if id(parent) == best and text)
+        return body[:max_chars] if max_chars else body
+
+    def _soup(self, html: str, strainer: Optional['SoupStrainer']) -> 'BeautifulSoup':
+        """Parse HTML with BeautifulSoup, restricted to the strainer when given."""
+        parser = 'lxml' if HAS_LXML else 'html.parser'
+        return BeautifulSoup(html, parser, parse_only=strainer) if strainer else BeautifulSoup(html, parser)
+
+    def _document(self, html: str):
+        """Parse a full HTML document with lxml."""
+        return lxml.html.document_fromstring(html.encode('utf-8'), parser=_utf8_parser())
+
+    def _lxml_field(self, node, selector: str, attr: Optional[str]) -> Optional[str]:
+        """Get the text or attribute of the first descendant matching a selector."""
+        matches = compile_selector(selector, relative=True)(node)
+        if not matches:
+            return None
+        return matches[0].get(attr) if attr else _text(matches[0]).strip()
+
+    def _iter_matching(self, html: str, predicate) -> Iterator[Any]:
+        """Stream a document and yield each complete element matching the predicate.
+
+        Everything outside the matched subtrees is discarded as soon as it has been
+        parsed, so memory stays proportional to the selected content. Stopping the
+        iteration stops parsing the rest of the document.
+        """
+        depth = 0
+        for event, element in etree.iterparse(io.BytesIO(html.encode('utf-8')), events=('start', 'end'), html=True, encoding='utf-8', recover=True):
+            if event == 'start':
+                if depth or predicate(element):
+                    depth += 1
+                continue
+
+            if depth:
+                depth -= 1
+                if depth == 0:
+                    yield element
+                    _discard(element)
+            else:
+                _discard(element)
+
+    def _iter_tables_after_heading(self, html: str, heading_text: str) -> Iterator[List[Tuple[List[str], List[str]]]]:
+        """Stream a document and yield the rows of tables following a matching <h2>."""
+        last_heading = None
+        for event, element in etree.iterparse(io.BytesIO(html.encode('utf-8')), events=('end',), tag=('h2', 'table'), html=True, encoding='utf-8', recover=True):
+            if element.tag == 'h2':
+                last_heading = _text(element)
+            elif last_heading is not None and heading_text in last_heading:
+                yield [
+                    ([_text(th).strip() for th in row.iterfind('th')], [_text(td).strip() for td in row.iterfind('td')])
+                    for row in element.iter('tr')
+                ]
+            _discard(element)
+
+def _text(element) -> str:
+    """Get the text content of an element and its descendants (works for streamed elements too)."""
+    return _string_value(element)
+
+@lru_cache(maxsize=64)
+def compile_xpath(expression: str):
+    """Compile an XPath expression once and reuse it."""
+    return etree.XPath(expression)
+
+if HAS_LXML:
+    _string_value = etree.XPath('string()')
+
+@lru_cache(maxsize=1)
+def _utf8_parser():
+    """Shared lxml HTML parser for UTF-8 encoded input."""
+    return lxml.html.HTMLParser(encoding='utf-8')
+
+def _discard(element):
+    """Free an element that has been processed, together with its already parsed siblings."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
@@ -0,0 +1,174 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'http')
+
+class HTTPCache:
+    """On-disk cache of scraped pages with HTTP validators and parsed results.
+
+    Bodies are stored gzip-compressed, one file per URL. A SQLite index keeps the
+    ETag/Last-Modified validators, fetch times and the parsed form of each page, so
+    every change writes one row rather than the whole index. Least recently used
+    entries are evicted once the size budget is exceeded.
+    """
+
+    COLUMNS = ('etag', 'last_modified', 'fetched_at', 'accessed_at', 'size', 'parsed')
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """Initialize the HTTP cache.
+
+        Args:
+            cache_dir: Directory for cached bodies and the index (optional, can use from env)
+            max_bytes: Budget for compressed bodies on disk in bytes (optional, can use from env)
+        """
+        self.cache_dir = cache_dir or os.getenv('SCRAPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes or int(os.getenv('SCRAPER_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+        self.index_path = os.path.join(self.cache_dir, 'index.db')
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                parsed TEXT
+            );
+            CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+        """)
+        self.conn.commit()
+        self._total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def _body_path(self, url: str) -> str:
+        """Get the path of the compressed body for a URL."""
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.gz')
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the cache entry for a URL.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Copy of the entry (validators, fetched_at, parsed) or None if not cached
+        """
+        with self._lock:
+            row = self.conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(self.COLUMNS, row))
+        entry['parsed'] = json.loads(entry['parsed']) if entry['parsed'] is not None else None
+        return entry
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build the conditional request headers for a URL.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Dictionary with If-None-Match / If-Modified-Since when validators are known
+        """
+        entry = self.lookup(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, url: str) -> Optional[str]:
+        """Read the cached body of a URL.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Decoded page text or None if the body is missing
+        """
+        try:
+            with gzip.open(self._body_path(url), 'rt', encoding='utf-8') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return body
+
+    def store(self, url: str, text: str, etag: str = None, last_modified: str = None):
+        """Store a freshly downloaded page, dropping any parsed result of the old version.
+
+        Args:
+            url: Page URL
+            text: Page text
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        body_path = self._body_path(url)
+        tmp_path = body_path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(text)
+        os.replace(tmp_path, body_path)
+
+        now = time.time()
+        size = os.path.getsize(body_path)
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, fetched_at, accessed_at, size, parsed) VALUES (?, ?, ?, ?, ?, ?, NULL)",
+                (url, etag, last_modified, now, now, size)
+            )
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, url: str):
+        """Mark a cached page as revalidated (after a 304 response).
+
+        Args:
+            url: Page URL
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self.conn.commit()
+
+    def store_parsed(self, url: str, parsed: Any):
+        """Attach the parsed form of a cached page so unchanged pages skip parsing.
+
+        Args:
+            url: Page URL
+            parsed: JSON-serializable extraction result
+        """
+        with self._lock:
+            self.conn.execute("UPDATE pages SET parsed = ? WHERE url = ?", (json.dumps(parsed), url))
+            self.conn.commit()
+
+    def _evict(self):
+        """Evict least recently used bodies until the size budget is met. Must be called with the lock held."""
+        if self._total <= self.max_bytes:
+            return
+        evicted = []
+        for url, size in self.conn.execute("SELECT url, size FROM pages ORDER BY accessed_at"):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(url))
+            except FileNotFoundError:
+                pass
+            self._total -= size
+            evicted.append((url,))
+        self.conn.executemany("DELETE FROM pages WHERE url = ?", evicted)
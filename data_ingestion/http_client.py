@@ -0,0 +1,288 @@
+import os
+import time
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from data_ingestion.http_cache import HTTPCache
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Connection': 'keep-alive'
+}
+
+class PinnedHostAdapter(HTTPAdapter):
+    """HTTPS adapter for requests sent to a fixed IP address of a host.
+
+    The URL carries the address, so no second DNS lookup can send the request elsewhere,
+    while TLS still uses the host name for SNI and certificate verification.
+    """
+
+    def __init__(self, host: str, **kwargs):
+        self.host = host
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.update(server_hostname=self.host, assert_hostname=self.host)
+        super().init_poolmanager(*args, **kwargs)
+
+class ScrapingClient:
+    """Shared HTTP client for the scrapers with pooling, timeouts, per-host limits and caching."""
+
+    def __init__(self, connect_timeout: float = None, read_timeout: float = None, max_workers: int = None, per_host_limit: int = None, pool_size: int = None, cache: HTTPCache = None):
+        """Initialize the scraping client.
+
+        Args:
+            connect_timeout: Seconds to wait for a TCP/TLS connection (optional, can use from env)
+            read_timeout: Seconds to wait between bytes of the response (optional, can use from env)
+            max_workers: Maximum number of concurrent fetches across all hosts
+            per_host_limit: Maximum number of concurrent fetches against a single host
+            pool_size: Number of keep-alive connections kept per host
+            cache: Conditional-GET cache for page bodies (optional, disabled with SCRAPER_CACHE=off)
+        """
+        self.connect_timeout = connect_timeout or float(os.getenv('SCRAPER_CONNECT_TIMEOUT', 5))
+        self.read_timeout = read_timeout or float(os.getenv('SCRAPER_READ_TIMEOUT', 15))
+        self.max_workers = max_workers or int(os.getenv('SCRAPER_MAX_WORKERS', 8))
+        self.per_host_limit = per_host_limit or int(os.getenv('SCRAPER_PER_HOST_LIMIT', 2))
+        pool_size = pool_size or max(self.per_host_limit, 4)
+        if cache is None and os.getenv('SCRAPER_CACHE', 'on').lower() != 'off':
+            cache = HTTPCache()
+        self.cache = cache
+
+        # One session means one urllib3 pool per host, so connections are reused across calls
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scraper')
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._latencies = {}
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        """Get the semaphore capping concurrent requests to the host of a URL."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _record_latency(self, source: str, latency: float):
+        """Record the latency of a fetch for a source."""
+        with self._lock:
+            stats = self._latencies.setdefault(source, {'count': 0, 'total': 0.0, 'last': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += latency
+            stats['last'] = latency
+            stats['max'] = max(stats['max'], latency)
+
+    def fetch(self, url: str, source: str = None, headers: Dict[str, str] = None, min_interval: float = None) -> Dict[str, Any]:
+        """Fetch a single URL, revalidating against the cache when possible.
+
+        Args:
+            url: URL to fetch
+            source: Name of the source, used for latency reporting
+            headers: Extra request headers
+            min_interval: Minimum seconds between network fetches of this URL; a cached
+                copy younger than this is served without contacting the host
+
+        Returns:
+            Dictionary with the source, url, status code, text, latency and error (if any).
+            'not_modified' is True when the cached copy is still current; in that case
+            'parsed' holds the stored extraction result and 'text' is only loaded if
+            nothing was parsed yet. 'fetched_at' is the Unix time the host last sent or
+            confirmed the page, which is in the past for pages served from the cache.
+        """
+        source = source or urlparse(url).netloc
+        result = {
+            'source': source,
+            'url': url,
+            'status_code': None,
+            'text': None,
+            'latency': None,
+            'error': None,
+            'not_modified': False,
+            'from_cache': False,
+            'parsed': None,
+            'fetched_at': None
+        }
+
+        start = time.perf_counter()
+        entry = self.cache.lookup(url) if self.cache else None
+        try:
+            if entry and min_interval and time.time() - entry['fetched_at'] < min_interval:
+                # Too soon to ask the host again
+                result['status_code'] = 200
+                result['from_cache'] = True
+                result['not_modified'] = True
+                result['fetched_at'] = entry['fetched_at']
+            else:
+                request_headers = dict(headers or {})
+                if entry:
+                    request_headers.update(self.cache.conditional_headers(url))
+                with self._host_slot(url):
+                    response = self.session.get(url, headers=request_headers, timeout=(self.connect_timeout, self.read_timeout))
+                result['fetched_at'] = time.time()
+
+                if response.status_code == 304 and entry:
+                    self.cache.touch(url)
+                    result['status_code'] = 200
+                    result['not_modified'] = True
+                else:
+                    result['status_code'] = response.status_code
+                    result['text'] = response.text
+                    if self.cache and response.status_code == 200:
+                        self.cache.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+            if result['not_modified']:
+                result['parsed'] = entry.get('parsed')
+                if result['parsed'] is None:
+                    result['text'] = self.cache.read_body(url)
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Error fetching {source} ({url}): {e}")
+
+        result['latency'] = time.perf_counter() - start
+        self._record_latency(source, result['latency'])
+        return result
+
+    def store_parsed(self, url: str, parsed: Any):
+        """Remember the extraction result of a page so unchanged pages skip parsing.
+
+        Args:
+            url: Page URL
+            parsed: JSON-serializable extraction result
+        """
+        if self.cache:
+            self.cache.store_parsed(url, parsed)
+
+    def parse_response(self, result: Dict[str, Any], parser: Callable[[str], Any]) -> Any:
+        """Extract data from a fetch result, skipping the parse for unchanged pages.
+
+        Args:
+            result: Fetch result returned by fetch or fetch_all
+            parser: Function turning page text into a JSON-serializable result
+
+        Returns:
+            Parsed result, or None if the fetch failed
+        """
+        if result['status_code'] != 200:
+            return None
+        if result['parsed'] is not None:
+            return result['parsed']
+        if result['text'] is None:
+            return None
+        parsed = parser(result['text'])
+        self.store_parsed(result['url'], parsed)
+        return parsed
+
+    def download(self, url: str, path: str, source: str = None, chunk_size: int = 1 << 16, allow_redirects: bool = True, address: str = None) -> Dict[str, Any]:
+        """Stream a response body to a file without holding it in memory (e.g. a PDF filing).
+
+        Args:
+            url: URL to download
+            path: File the body is written to
+            source: Name of the source, used for latency reporting
+            chunk_size: Bytes read from the connection at a time
+            allow_redirects: Follow redirects; when False a redirect is returned with its 'location'
+                so the caller can check the target first
+            address: IP address to connect to instead of resolving the host again, e.g. one the
+                caller has already checked (the host still goes in the Host header and TLS)
+
+        Returns:
+            Dictionary with the source, url, status code, content type, redirect location, bytes
+            written, latency and error (if any)
+        """
+        source = source or urlparse(url).netloc
+        result = {'source': source, 'url': url, 'status_code': None, 'content_type': None, 'location': None, 'bytes': 0, 'latency': None, 'error': None}
+        start = time.perf_counter()
+        session, request_url = self.session, url
+        if address:
+            session, request_url = self._pinned_session(url, address)
+        try:
+            with self._host_slot(url):
+                with session.get(request_url, stream=True, allow_redirects=allow_redirects, timeout=(self.connect_timeout, self.read_timeout)) as response:
+                    result['status_code'] = response.status_code
+                    result['content_type'] = response.headers.get('Content-Type')
+                    result['location'] = response.headers.get('Location')
+                    if response.status_code == 200:
+                        with open(path, 'wb') as f:
+                            for block in response.iter_content(chunk_size=chunk_size):
+                                f.write(block)
+                                result['bytes'] += len(block)
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Error downloading {source} ({url}): {e}")
+        finally:
+            if session is not self.session:
+                session.close()
+
+        result['latency'] = time.perf_counter() - start
+        self._record_latency(source, result['latency'])
+        return result
+
+    def _pinned_session(self, url: str, address: str) -> Tuple[requests.Session, str]:
+        """Build a one-off session and the URL that reach the host of a URL at a fixed address."""
+        parsed = urlparse(url)
+        netloc = f'[{address}]' if ':' in address else address
+        if parsed.port:
+            netloc += f':{parsed.port}'
+        session = requests.Session()
+        # A proxy from the environment would resolve the host itself
+        session.trust_env = False
+        session.headers.update(DEFAULT_HEADERS)
+        session.headers['Host'] = parsed.netloc.rsplit('@', 1)[-1]
+        session.mount('https://', PinnedHostAdapter(parsed.hostname))
+        return session, parsed._replace(netloc=netloc).geturl()
+
+    def fetch_all(self, targets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetch several URLs concurrently.
+
+        Args:
+            targets: List of dictionaries with 'url' and optional 'name', 'headers' and 'min_interval' keys
+
+        Returns:
+            List of fetch results (see fetch), in the same order as targets
+        """
+        futures = [
+            self._executor.submit(self.fetch, target['url'], target.get('name'), target.get('headers'), target.get('min_interval'))
+            for target in targets
+        ]
+        return [future.result() for future in futures]
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        """Get per-source latency statistics in seconds.
+
+        Returns:
+            Dictionary mapping source name to count, last, average and max latency
+        """
+        with self._lock:
+            return {
+                source: {
+                    'count': stats['count'],
+                    'last': stats['last'],
+                    'avg': stats['total'] / stats['count'] if stats['count'] else 0.0,
+                    'max': stats['max']
+                }
+                for source, stats in self._latencies.items()
+            }
+
+    def close(self):
+        """Shut down the worker pool and close pooled connections."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_scraping_client() -> ScrapingClient:
+    """Get the process-wide scraping client shared by all scrapers."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = ScrapingClient()
+        return _shared_client
@@ -0,0 +1,133 @@
+from collections import deque
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+class KeywordMatcher:
+    """Aho-Corasick matcher for a fixed keyword set with word-boundary checks.
+
+    The automaton is built once; matching scans the lowercased text a single time no
+    matter how many keywords there are. A match only counts when it is not glued to a
+    letter or digit on either side, so 'JD' matches 'JD.com' and 'JD shares' but not
+    'JDX' or 'ajd'.
+    """
+
+    def __init__(self, keywords: Dict[str, Optional[str]]):
+        """Build the automaton.
+
+        Args:
+            keywords: Mapping of keyword to the ticker it refers to (None for topic keywords)
+        """
+        self.keywords = []
+        self.labels = []
+        self._lengths = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for keyword, label in keywords.items():
+            pattern = keyword.lower().strip()
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(len(self.keywords))
+            self.keywords.append(keyword)
+            self.labels.append(label)
+            self._lengths.append(len(pattern))
+
+        # Breadth-first pass to link every state to its longest proper suffix state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[child] = candidate if candidate != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Find every whole-word keyword occurrence in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of (start, end, keyword index) tuples
+        """
+        lowered = text.lower()
+        length = len(lowered)
+        matches = []
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                start = position - self._lengths[index] + 1
+                end = position + 1
+                if (start == 0 or not lowered[start - 1].isalnum()) and (end == length or not lowered[end].isalnum()):
+                    matches.append((start, end, index))
+        return matches
+
+    def match(self, *texts: str) -> Dict[str, List[str]]:
+        """Match several fields of an article in one pass each.
+
+        Args:
+            texts: Texts to scan (e.g. title and summary)
+
+        Returns:
+            Dictionary with the sorted matched 'keywords' and the 'tickers' they refer to
+        """
+        indices = set()
+        for text in texts:
+            if text:
+                indices.update(index for _, _, index in self.find(text))
+        return {
+            'keywords': sorted({self.keywords[i] for i in indices}),
+            'tickers': sorted({self.labels[i] for i in indices if self.labels[i]})
+        }
+
+@lru_cache(maxsize=32)
+def _cached_matcher(items: Tuple[Tuple[str, Optional[str]], ...]) -> KeywordMatcher:
+    return KeywordMatcher(dict(items))
+
+def get_keyword_matcher(keywords: Any) -> KeywordMatcher:
+    """Get the matcher for a keyword set, building it only the first time it is seen.
+
+    Args:
+        keywords: List of keywords, or mapping of keyword to ticker
+
+    Returns:
+        Compiled KeywordMatcher
+    """
+    if isinstance(keywords, dict):
+        items = tuple(sorted(keywords.items()))
+    else:
+        items = tuple(sorted((keyword, None) for keyword in keywords))
+    return _cached_matcher(items)
+
+def ticker_keywords(tickers: Dict[str, Iterable[str]], topics: Iterable[str] = ()) -> Dict[str, Optional[str]]:
+    """Flatten ticker aliases and topic keywords into a keyword -> ticker mapping.
+
+    Args:
+        tickers: Mapping of ticker to the names it is referred to by
+        topics: Keywords that do not refer to a single ticker
+
+    Returns:
+        Mapping of keyword to ticker (None for topics)
+    """
+    keywords = {topic: None for topic in topics}
+    for ticker, aliases in tickers.items():
+        keywords[ticker] = ticker
+        for alias in aliases:
+            keywords[alias] = ticker
+    return keywords
@@ -1,88 +1,111 @@
 import os
-import requests
 from typing import List, Dict, Any
-from bs4 import BeautifulSoup
 import pandas as pd
+from data_ingestion.http_client import ScrapingClient, get_scraping_client
+from data_ingestion.html_extract import HTMLExtractor
+from data_ingestion.source_registry import SourceRegistry, get_source_registry
+from data_ingestion.keyword_matcher import get_keyword_matcher
 
 class FinancialScraper:
     """Class for scraping financial news and filings from web sources."""
     
-    def __init__(self):
-        """Initialize the financial scraper."""
-        self.headers = {'User-Agent': 'Mozilla/5.0'}
+    def __init__(self, client: ScrapingClient = None, extractor: HTMLExtractor = None, registry: SourceRegistry = None):
+        """Initialize the financial scraper.
+        
+        Args:
+            client: HTTP client used for fetching pages (optional, defaults to the shared client)
+            extractor: HTML extraction backend (optional, defaults to lxml when installed)
+            registry: News source registry (optional, defaults to the shared registry)
+        """
+        self.client = client or get_scraping_client()
+        self.extractor = extractor or HTMLExtractor()
+        self.registry = registry or get_source_registry()
     
-    def scrape_financial_news(self, keywords: List[str] = None) -> List[Dict[str, Any]]:
-        """Scrape financial news related to Asia tech stocks.
+    def scrape_financial_news(self, keywords: Any = None, force: bool = False) -> List[Dict[str, Any]]:
+        """Scrape new financial news related to Asia tech stocks.
+        
+        Only sources whose crawl interval has elapsed are fetched, and only articles
+        newer than each source's watermark are returned.
         
         Args:
-            keywords: List of keywords to filter news by
+            keywords: Keywords to filter news by, as a list or a keyword -> ticker mapping
+                (defaults to the registry's tickers and topics)
+            force: Crawl every source regardless of its schedule
             
         Returns:
-            List of dictionaries with news data
+            List of dictionaries with news data, including the matched keywords and tickers
         """
         if keywords is None:
-            keywords = ['Asia tech', 'semiconductor', 'TSMC', 'Samsung', 'Alibaba']
-        
-        news_sources = [
-            {
-                'name': 'Yahoo Finance',
-                'url': 'https://finance.yahoo.com/news/',
-                'article_selector': 'li.js-stream-content',
-                'title_selector': 'h3',
-                'link_selector': 'a',
-                'summary_selector': 'p'
-            },
-            {
-                'name': 'CNBC Asia',
-                'url': 'https://www.cnbc.com/asia-news/',
-                'article_selector': '.Card-standardBreakerCard',
-                'title_selector': '.Card-title',
-                'link_selector': 'a',
-                'summary_selector': '.Card-description'
-            }
-        ]
+            keywords = self.registry.keywords
+        elif not isinstance(keywords, dict):
+            # Tag known ticker names even when the caller passes a plain keyword list
+            keywords = {keyword: self.registry.keywords.get(keyword) for keyword in keywords}
+        matcher = get_keyword_matcher(keywords)
         
+        news_sources = self.registry.due_sources(force=force)
         all_news = []
         
-        for source in news_sources:
+        # Fetch every due source concurrently, then parse the pages in order
+        responses = self.client.fetch_all([{'name': source['name'], 'url': source['url']} for source in news_sources])
+        
+        for source, response in zip(news_sources, responses):
             try:
-                response = requests.get(source['url'], headers=self.headers)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    articles = soup.select(source['article_selector'])
-                    
-                    for article in articles[:10]:  # Limit to 10 articles per source
-                        try:
-                            title_elem = article.select_one(source['title_selector'])
-                            link_elem = article.select_one(source['link_selector'])
-                            summary_elem = article.select_one(source['summary_selector'])
-                            
-                            if title_elem and link_elem:
-                                title = title_elem.text.strip()
-                                link = link_elem.get('href')
-                                if not link.startswith('http'):
-                                    # Handle relative URLs
-                                    if link.startswith('/'):
-                                        base_url = '/'.join(source['url'].split('/')[:3])
-                                        link = base_url + link
-                                
-                                summary = summary_elem.text.strip() if summary_elem else ''
-                                
-                                # Check if article matches any keywords
-                                if any(keyword.lower() in title.lower() or keyword.lower() in summary.lower() for keyword in keywords):
-                                    all_news.append({
-                                        'source': source['name'],
-                                        'title': title,
-                                        'link': link,
-                                        'summary': summary
-                                    })
-                        except Exception as e:
-                            print(f"Error parsing article from {source['name']}: {e}")
+                # Unchanged pages reuse the articles parsed on the previous fetch
+                articles = self.client.parse_response(response, lambda html, source=source: self._parse_news_page(source, html))
+                if articles is None:
+                    continue  # Leave the schedule untouched so the source is retried next time
+                
+                fresh_articles = self.registry.new_articles(source, articles)
+                self.registry.mark_crawled(source, fresh_articles)
+                
+                for article in fresh_articles:
+                    # One pass over title and summary finds every keyword and ticker at once
+                    matches = matcher.match(article['title'], article['summary'])
+                    if matches['keywords']:
+                        all_news.append(dict(article, matched_keywords=matches['keywords'], tickers=matches['tickers']))
             except Exception as e:
                 print(f"Error scraping {source['name']}: {e}")
         
         return all_news
     
+    def _parse_news_page(self, source: Dict[str, Any], html: str) -> List[Dict[str, str]]:
+        """Extract the articles listed on a news page.
+        
+        Args:
+            source: News source configuration
+            html: Page HTML
+            
+        Returns:
+            List of dictionaries with source, title, link and summary
+        """
+        fields = {
+            'title': (source['title_selector'], None),
+            'link': (source['link_selector'], 'href'),
+            'summary': (source['summary_selector'], None)
+        }
+        articles = []
+        
+        for article in self.extractor.extract_articles(html, source['article_selector'], fields):
+            try:
+                if article['title'] and article['link']:
+                    link = article['link']
+                    if not link.startswith('http'):
+                        # Handle relative URLs
+                        if link.startswith('/'):
+                            base_url = '/'.join(source['url'].split('/')[:3])
+                            link = base_url + link
+                    
+                    articles.append({
+                        'source': source['name'],
+                        'title': article['title'],
+                        'link': link,
+                        'summary': article['summary'] or ''
+                    })
+            except Exception as e:
+                print(f"Error parsing article from {source['name']}: {e}")
+        
+        return articles
+    
     def scrape_earnings_reports(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
         """Scrape recent earnings reports for specified symbols.
         
@@ -98,33 +121,41 @@ class FinancialScraper:
         earnings_data = []
         
         # For demonstration, we'll use a simplified approach that scrapes Yahoo Finance earnings pages
-        for symbol in symbols:
+        responses = self.client.fetch_all([
+            {
+                'name': f"Yahoo Finance {symbol} analysis",
+                'url': f"https://finance.yahoo.com/quote/{symbol}/analysis",
+                'min_interval': 6 * 3600  # Estimates change a few times a day at most
+            }
+            for symbol in symbols
+        ])
+        
+        for symbol, response in zip(symbols, responses):
             try:
-                url = f"https://finance.yahoo.com/quote/{symbol}/analysis"
-                response = requests.get(url, headers=self.headers)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract earnings data from the page
-                    earnings_tables = soup.find_all('table')
-                    for table in earnings_tables:
-                        table_title = table.find_previous('h2')
-                        if table_title and 'Earnings Estimate' in table_title.text:
-                            rows = table.find_all('tr')
-                            headers = [th.text.strip() for th in rows[0].find_all('th')]
-                            
-                            for row in rows[1:]:
-                                cells = row.find_all('td')
-                                if len(cells) >= len(headers):
-                                    row_data = {headers[i]: cells[i].text.strip() for i in range(len(headers))}
-                                    row_data['symbol'] = symbol
-                                    earnings_data.append(row_data)
+                rows = self.client.parse_response(response, lambda html, symbol=symbol: self._parse_earnings_page(symbol, html))
+                earnings_data.extend(dict(row) for row in rows or [])
             except Exception as e:
                 print(f"Error scraping earnings for {symbol}: {e}")
         
         return earnings_data
     
+    def _parse_earnings_page(self, symbol: str, html: str) -> List[Dict[str, str]]:
+        """Extract the earnings estimate rows from a Yahoo Finance analysis page.
+        
+        Args:
+            symbol: Stock symbol the page belongs to
+            html: Page HTML
+            
+        Returns:
+            List of dictionaries with one earnings estimate row each
+        """
+        # Extract earnings data from the page
+        earnings_data = self.extractor.extract_tables_after_heading(html, 'Earnings Estimate')
+        for row_data in earnings_data:
+            row_data['symbol'] = symbol
+        
+        return earnings_data
+    
     def scrape_market_sentiment(self) -> Dict[str, Any]:
         """Scrape market sentiment indicators for Asia tech sector.
         
@@ -135,12 +166,14 @@ class FinancialScraper:
             {
                 'name': 'CNN Fear & Greed Index',
                 'url': 'https://www.cnn.com/markets/fear-and-greed',
-                'indicator_selector': '.market-fng-gauge__dial-number'
+                'indicator_selector': '.market-fng-gauge__dial-number',
+                'min_refresh': 900
             },
             {
                 'name': 'MarketWatch Asia Markets',
                 'url': 'https://www.marketwatch.com/markets/asia',
-                'indicator_selector': '.element--article'
+                'indicator_selector': '.element--article',
+                'min_refresh': 600
             }
         ]
         
@@ -151,51 +184,70 @@ class FinancialScraper:
             'key_indicators': []
         }
         
-        for source in sentiment_sources:
+        responses = self.client.fetch_all([
+            {'name': source['name'], 'url': source['url'], 'min_interval': source['min_refresh']}
+            for source in sentiment_sources
+        ])
+        
+        for source, response in zip(sentiment_sources, responses):
             try:
-                response = requests.get(source['url'], headers=self.headers)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    if source['name'] == 'CNN Fear & Greed Index':
-                        indicator = soup.select_one(source['indicator_selector'])
-                        if indicator:
-                            try:
-                                score = int(indicator.text.strip())
-                                sentiment_data['sentiment_score'] = score
-                                
-                                # Determine sentiment based on score
-                                if score <= 25:
-                                    sentiment = 'extreme fear'
-                                elif score <= 45:
-                                    sentiment = 'fear'
-                                elif score <= 55:
-                                    sentiment = 'neutral'
-                                elif score <= 75:
-                                    sentiment = 'greed'
-                                else:
-                                    sentiment = 'extreme greed'
-                                    
-                                sentiment_data['overall_sentiment'] = sentiment
-                                sentiment_data['sources'].append({
-                                    'name': source['name'],
-                                    'score': score,
-                                    'sentiment': sentiment
-                                })
-                            except ValueError:
-                                pass
+                parsed = self.client.parse_response(response, lambda html, source=source: self._parse_sentiment_page(source, html))
+                if not parsed:
+                    continue
+                
+                if source['name'] == 'CNN Fear & Greed Index' and parsed.get('score') is not None:
+                    score = parsed['score']
+                    sentiment_data['sentiment_score'] = score
                     
-                    elif source['name'] == 'MarketWatch Asia Markets':
-                        articles = soup.select(source['indicator_selector'])[:5]  # Get top 5 articles
-                        for article in articles:
-                            title_elem = article.select_one('h3')
-                            if title_elem:
-                                title = title_elem.text.strip()
-                                sentiment_data['key_indicators'].append({
-                                    'source': 'MarketWatch',
-                                    'headline': title
-                                })
+                    # Determine sentiment based on score
+                    if score <= 25:
+                        sentiment = 'extreme fear'
+                    elif score <= 45:
+                        sentiment = 'fear'
+                    elif score <= 55:
+                        sentiment = 'neutral'
+                    elif score <= 75:
+                        sentiment = 'greed'
+                    else:
+                        sentiment = 'extreme greed'
+                        
+                    sentiment_data['overall_sentiment'] = sentiment
+                    sentiment_data['sources'].append({
+                        'name': source['name'],
+                        'score': score,
+                        'sentiment': sentiment,
+                        'fetched_at': response['fetched_at']
+                    })
+                
+                elif source['name'] == 'MarketWatch Asia Markets':
+                    for title in parsed.get('headlines', []):
+                        sentiment_data['key_indicators'].append({
+                            'source': 'MarketWatch',
+                            'headline': title
+                        })
             except Exception as e:
                 print(f"Error scraping sentiment from {source['name']}: {e}")
         
-        return sentiment_data
\ No newline at end of file
+        return sentiment_data
+    
+    def _parse_sentiment_page(self, source: Dict[str, Any], html: str) -> Dict[str, Any]:
+        """Extract the sentiment indicator from a sentiment source page.
+        
+        Args:
+            source: Sentiment source configuration
+            html: Page HTML
+            
+        Returns:
+            Dictionary with a 'score' (Fear & Greed) or 'headlines' (MarketWatch)
+        """
+        if source['name'] == 'CNN Fear & Greed Index':
+            indicator = self.extractor.select_texts(html, source['indicator_selector'], limit=1)
+            if indicator:
+                try:
+                    return {'score': int(indicator[0])}
+                except ValueError:
+                    pass
+            return {'score': None}
+        
+        articles = self.extractor.extract_articles(html, source['indicator_selector'], {'headline': ('h3', None)}, limit=5)  # Get top 5 articles
+        return {'headlines': [article['headline'] for article in articles if article['headline']]}
\ No newline at end of file
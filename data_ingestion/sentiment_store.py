@@ -0,0 +1,201 @@
+import os
+import mmap
+import time
+import struct
+import threading
+from typing import Dict, Any, Optional
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'sentiment_readings.bin')
+
+# One reading: timestamp, score, running sum of scores, running sum of squared scores
+RECORD = struct.Struct('<dddd')
+
+# Windows reported by trend(), in seconds
+TREND_WINDOWS = {
+    '1d': 86400,
+    '7d': 7 * 86400,
+    '30d': 30 * 86400
+}
+
+class SentimentStore:
+    """Append-only time series of market sentiment readings.
+
+    Readings are fixed-size binary records in timestamp order, each carrying the running
+    sum and sum of squares of all scores up to it. Any window's count, mean and standard
+    deviation therefore come from two binary searches and two record reads, so trend
+    queries stay O(log n) however long the history grows.
+    """
+
+    def __init__(self, store_path: str = None, min_interval: float = None):
+        """Initialize the sentiment store.
+
+        Args:
+            store_path: Path of the readings file (optional, can use from env)
+            min_interval: Minimum seconds between two stored readings, so repeated briefs
+                do not over-weight a single period (optional, can use from env)
+        """
+        self.store_path = store_path or os.getenv('SENTIMENT_STORE_PATH', DEFAULT_STORE_PATH)
+        self.min_interval = min_interval if min_interval is not None else float(os.getenv('SENTIMENT_MIN_INTERVAL', 900))
+        self._lock = threading.Lock()
+        self._map = None
+
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        with open(self.store_path, 'ab') as f:
+            size = f.tell()
+            if size % RECORD.size:
+                # Drop a reading torn by a crash mid-write
+                f.truncate(size - size % RECORD.size)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def _count(self) -> int:
+        """Number of stored readings. Must be called with the lock held."""
+        view = self._view()
+        return len(view) // RECORD.size if view is not None else 0
+
+    def _view(self) -> Optional[mmap.mmap]:
+        """Memory-map the readings file, remapping after appends. Must be called with the lock held."""
+        if self._map is None:
+            if os.path.getsize(self.store_path) == 0:
+                return None
+            with open(self.store_path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _record(self, index: int) -> tuple:
+        """Read the reading at an index. Must be called with the lock held."""
+        return RECORD.unpack_from(self._view(), index * RECORD.size)
+
+    def _bisect(self, timestamp: float) -> int:
+        """Count the readings taken at or before a timestamp. Must be called with the lock held."""
+        low, high = 0, self._count()
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _prefix(self, count: int) -> tuple:
+        """Get the running (sum, sum of squares) over the first count readings. Must be called with the lock held."""
+        if count == 0:
+            return 0.0, 0.0
+        _, _, total, squares = self._record(count - 1)
+        return total, squares
+
+    def append(self, score: float, timestamp: float = None) -> bool:
+        """Store a sentiment reading.
+
+        Args:
+            score: Sentiment score (0-100)
+            timestamp: Unix time of the reading (defaults to now)
+
+        Returns:
+            True if stored, False if it came too soon after, or before, the latest reading
+        """
+        timestamp = timestamp or time.time()
+        with self._lock:
+            count = self._count()
+            total, squares = 0.0, 0.0
+            if count:
+                last_timestamp, _, total, squares = self._record(count - 1)
+                if timestamp <= last_timestamp or timestamp < last_timestamp + self.min_interval:
+                    return False
+
+            with open(self.store_path, 'ab') as f:
+                f.write(RECORD.pack(timestamp, score, total + score, squares + score * score))
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+        return True
+
+    def record(self, sentiment_data: Dict[str, Any]) -> bool:
+        """Store the indicator score of scraped sentiment data, if any source provided one.
+
+        The reading is timestamped with the time the indicator page was fetched, so a
+        page served again from the scraper cache is not stored as a new reading.
+
+        Args:
+            sentiment_data: Result of scrape_market_sentiment
+
+        Returns:
+            True if a reading was stored
+        """
+        sources = [source for source in sentiment_data.get('sources', []) if source.get('score') is not None]
+        if not sources:
+            # Only the default score is present, which is not a reading
+            return False
+        return self.append(float(sources[0]['score']), timestamp=sources[0].get('fetched_at'))
+
+    def window(self, start: float, end: float = None) -> Dict[str, Any]:
+        """Get statistics over the readings taken in (start, end].
+
+        Args:
+            start: Window start as Unix time (exclusive)
+            end: Window end as Unix time (inclusive, defaults to now)
+
+        Returns:
+            Dictionary with the count, mean and standard deviation (None when empty)
+        """
+        end = end or time.time()
+        with self._lock:
+            low, high = self._bisect(start), self._bisect(end)
+            low_total, low_squares = self._prefix(low)
+            high_total, high_squares = self._prefix(high)
+
+        count = high - low
+        if count <= 0:
+            return {'count': 0, 'mean': None, 'std': None}
+        mean = (high_total - low_total) / count
+        variance = max((high_squares - low_squares) / count - mean * mean, 0.0)
+        return {'count': count, 'mean': mean, 'std': variance ** 0.5}
+
+    def value_at(self, timestamp: float) -> Optional[float]:
+        """Get the latest score recorded at or before a time.
+
+        Args:
+            timestamp: Unix time
+
+        Returns:
+            Score, or None if there was no reading yet
+        """
+        with self._lock:
+            index = self._bisect(timestamp)
+            return self._record(index - 1)[1] if index else None
+
+    def trend(self, now: float = None) -> Dict[str, Any]:
+        """Summarize the sentiment trend over the last day, week and month.
+
+        Args:
+            now: Reference Unix time (defaults to now)
+
+        Returns:
+            Dictionary with the latest reading and, per window, the average, the change of
+            the latest score against the reading at the start of the window, and the
+            z-score of the latest score within the window
+        """
+        now = now or time.time()
+        with self._lock:
+            index = self._bisect(now)
+            latest = self._record(index - 1) if index else None
+        if latest is None:
+            return {'readings': 0, 'latest': None}
+
+        summary = {'readings': index, 'latest': latest[1], 'latest_at': latest[0]}
+        for name, seconds in TREND_WINDOWS.items():
+            stats = self.window(now - seconds, now)
+            previous = self.value_at(now - seconds)
+            summary[f'avg_{name}'] = stats['mean']
+            summary[f'delta_{name}'] = latest[1] - previous if previous is not None else None
+            summary[f'zscore_{name}'] = (latest[1] - stats['mean']) / stats['std'] if stats['std'] else None
+        return summary
+
+    def close(self):
+        """Release the memory map."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import threading
+from typing import List, Dict, Any
+from data_ingestion.keyword_matcher import ticker_keywords
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.json')
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'source_state.json')
+
+# Number of most recent article links remembered per source as its watermark
+WATERMARK_SIZE = 500
+
+class SourceRegistry:
+    """Registry of news sources loaded from config, with crawl schedules and watermarks.
+
+    Each source declares its selectors, a crawl interval in seconds and the maximum
+    number of new articles taken per crawl. The config also lists the tickers of the
+    universe with the names they appear under in headlines, plus sector topics. The
+    registry remembers when each source was last crawled and the links it has already
+    returned, so a crawl only yields articles that appeared since the previous one.
+    """
+
+    def __init__(self, config_path: str = None, state_path: str = None):
+        """Initialize the source registry.
+
+        Args:
+            config_path: Path of the JSON source config (optional, can use from env)
+            state_path: Path of the JSON file holding schedules and watermarks (optional, can use from env)
+        """
+        self.config_path = config_path or os.getenv('NEWS_SOURCES_CONFIG', DEFAULT_CONFIG_PATH)
+        self.state_path = state_path or os.getenv('NEWS_SOURCE_STATE', DEFAULT_STATE_PATH)
+        self._lock = threading.Lock()
+
+        with open(self.config_path, 'r') as f:
+            config = json.load(f)
+        self.tickers = config.get('tickers', {})
+        # Keyword -> ticker (None for sector topics), used for news filtering and tagging
+        self.keywords = ticker_keywords(self.tickers, config.get('topics', []))
+        self.sources = config.get('news_sources', [])
+        for source in self.sources:
+            source.setdefault('crawl_interval', 900)
+            source.setdefault('max_articles', 20)
+
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        """Load crawl times and watermarks from disk."""
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading news source state, starting fresh: {e}")
+            return {}
+
+    def _save_state(self):
+        """Write crawl times and watermarks atomically. Must be called with the lock held."""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def due_sources(self, force: bool = False) -> List[Dict[str, Any]]:
+        """Get the sources whose crawl interval has elapsed.
+
+        Args:
+            force: Return every source regardless of its schedule
+
+        Returns:
+            List of source configurations to crawl now
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                source for source in self.sources
+                if force or now - self.state.get(source['name'], {}).get('last_crawled_at', 0) >= source['crawl_interval']
+            ]
+
+    def new_articles(self, source: Dict[str, Any], articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep only the articles not seen in earlier crawls of a source.
+
+        Args:
+            source: Source configuration
+            articles: Articles parsed from the source listing, newest first
+
+        Returns:
+            Unseen articles, capped at the source's max_articles
+        """
+        with self._lock:
+            seen = set(self.state.get(source['name'], {}).get('watermark', []))
+        fresh = [article for article in articles if article['link'] not in seen]
+        return fresh[:source['max_articles']]
+
+    def mark_crawled(self, source: Dict[str, Any], articles: List[Dict[str, Any]]):
+        """Record a completed crawl and advance the source's watermark.
+
+        Args:
+            source: Source configuration
+            articles: New articles returned by the crawl
+        """
+        with self._lock:
+            state = self.state.setdefault(source['name'], {'last_crawled_at': 0, 'watermark': []})
+            state['last_crawled_at'] = time.time()
+            links = [article['link'] for article in articles]
+            new_links = set(links)
+            state['watermark'] = (links + [link for link in state['watermark'] if link not in new_links])[:WATERMARK_SIZE]
+            self._save_state()
+
+_shared_registry = None
+_shared_registry_lock = threading.Lock()
+
+def get_source_registry() -> SourceRegistry:
+    """Get the process-wide news source registry shared by all scrapers."""
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            _shared_registry = SourceRegistry()
+        return _shared_registry
@@ -1,5 +1,6 @@
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Query
 from fastapi.responses import FileResponse, JSONResponse
@@ -18,6 +19,12 @@ from agents.retriever_agent import RetrieverAgent, create_retriever_tasks
 from agents.analysis_agent import AnalysisAgent, create_analysis_tasks
 from agents.language_agent import LanguageAgent, create_language_tasks
 from agents.voice_agent import VoiceAgent, create_voice_tasks
+from data_ingestion.dedup import ArticleDeduplicator
+from data_ingestion.article_pipeline import ArticlePipeline
+from data_ingestion.sentiment_store import SentimentStore
+from retrieval.query_cache import QueryCache, analysis_scope
+from retrieval.retention import RetentionJob
+from data_ingestion.filings_loader import check_source
 
 # Create FastAPI app
 app = FastAPI(title="Finance Assistant API", description="API for the multi-agent finance assistant")
@@ -41,7 +48,14 @@ scraping_agent_instance = scraping_agent.create_agent()
 retriever_agent = RetrieverAgent()
 retriever_agent_instance = retriever_agent.create_agent()
 
-analysis_agent = AnalysisAgent()
+# Answers to near-duplicate queries, expired when their namespaces are re-indexed
+query_cache = QueryCache(retriever_agent.namespace_version) if os.getenv('QUERY_CACHE', 'on').lower() != 'off' else None
+
+# Expires old news, snapshots and sentiment so the namespaces stay bounded
+retention_job = RetentionJob(retriever_agent.vector_backend, delete_chunks=retriever_agent.delete_chunks, record_store=retriever_agent.record_store)
+
+sentiment_store = SentimentStore()
+analysis_agent = AnalysisAgent(sentiment_store=sentiment_store)
 analysis_agent_instance = analysis_agent.create_agent()
 
 language_agent = LanguageAgent()
@@ -50,6 +64,13 @@ language_agent_instance = language_agent.create_agent()
 voice_agent = VoiceAgent()
 voice_agent_instance = voice_agent.create_agent()
 
+# Drops news already indexed from another source or an earlier run
+article_deduplicator = ArticleDeduplicator()
+
+# Optional stage that indexes full article bodies instead of listing teasers
+full_article_fetch = os.getenv('FULL_ARTICLE_FETCH', 'off').lower() == 'on'
+article_pipeline = ArticlePipeline() if full_article_fetch else None
+
 # Create tasks for each agent
 api_tasks = create_api_tasks(api_agent_instance)
 scraping_tasks = create_scraping_tasks(scraping_agent_instance)
@@ -86,6 +107,19 @@ class QueryResponse(BaseModel):
     confidence: float
     sources: List[Dict[str, Any]]
 
+class FilingRequest(BaseModel):
+    source: str
+    symbol: Optional[str] = None
+    title: Optional[str] = None
+    date: Optional[str] = None
+
+def index_full_article(article: Dict[str, Any]) -> bool:
+    """Index one fetched article as soon as the article pipeline hands it over."""
+    if not retriever_agent.index_financial_data([article], 'news'):
+        return False
+    article_deduplicator.record([article])
+    return True
+
 # Background task for data collection and indexing
 def collect_and_index_data():
     """Background task to collect and index financial data."""
@@ -94,15 +128,27 @@ def collect_and_index_data():
     earnings_surprises = api_agent.get_earnings_surprises()
     portfolio_data = api_agent.calculate_asia_tech_exposure()
     
-    # Collect data from web scraping
-    financial_news = scraping_agent.scrape_financial_news()
-    market_sentiment = scraping_agent.scrape_market_sentiment()
+    # Collect data from web scraping (news and sentiment sources are fetched side by side)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        news_future = executor.submit(scraping_agent.scrape_financial_news)
+        sentiment_future = executor.submit(scraping_agent.scrape_market_sentiment)
+        financial_news = news_future.result()
+        market_sentiment = sentiment_future.result()
+    
+    # Only embed news that is not a copy of an already indexed story
+    novel_news = article_deduplicator.filter_new(financial_news)
     
     # Index data in vector store
     retriever_agent.index_financial_data(asia_tech_stocks, 'stock_data')
     retriever_agent.index_financial_data(earnings_surprises, 'earnings')
-    retriever_agent.index_financial_data(financial_news, 'news')
+    if novel_news and article_pipeline:
+        # Articles are indexed as they arrive but published as one new version of the namespace
+        with retriever_agent.batch('news'):
+            article_pipeline.run(novel_news, sink=index_full_article)
+    elif novel_news and retriever_agent.index_financial_data(novel_news, 'news'):
+        article_deduplicator.record(novel_news)
     retriever_agent.index_financial_data([market_sentiment], 'sentiment')
+    sentiment_store.record(market_sentiment)
     
     return {
         'asia_tech_stocks': asia_tech_stocks,
@@ -167,8 +213,38 @@ async def get_market_brief(background_tasks: BackgroundTasks, voice_output: bool
 async def answer_query(query: TextQuery, voice_output: bool = Query(True)):
     """Answer a specific query about Asia tech stocks."""
     try:
+        # Near-duplicates of a recent query reuse its answer, sources and audio. Queries
+        # answered by ticker lookups alone need no embedding, so they are only cached by
+        # their normalized text; the others are also looked up by embedding similarity.
+        query_vector = None
+        analysis = None
+        if query_cache is not None:
+            try:
+                analysis = retriever_agent.query_analyzer.analyze(query.query)
+                if retriever_agent.needs_query_vector(analysis):
+                    query_vector = retriever_agent.embeddings.embed_query(query.query)
+            except Exception as e:
+                print(f"Error preparing query cache lookup: {e}")
+                analysis = None
+                query_vector = None
+        if analysis is not None:
+            scope = analysis_scope(analysis)
+            cached = query_cache.lookup(query_vector, scope, query=query.query)
+            if cached is not None:
+                if voice_output and not cached['audio_file']:
+                    audio_file = os.path.join(tempfile.gettempdir(), 'query_response.mp3')
+                    if voice_agent.text_to_speech(cached['answer'], audio_file)['success']:
+                        query_cache.attach_audio(cached, audio_file)
+                return QueryResponse(
+                    answer=cached['answer'],
+                    audio_url=f"/audio/{os.path.basename(cached['audio_file'])}" if voice_output and cached['audio_file'] else None,
+                    confidence=cached['confidence'],
+                    sources=cached['sources']
+                )
+            versions = query_cache.versions(analysis['namespaces'])
+        
         # Retrieve relevant information
-        retrieved_info = retriever_agent.retrieve_asia_tech_info(query.query)
+        retrieved_info = retriever_agent.retrieve_asia_tech_info(query.query, query_vector=query_vector, analysis=analysis)
         
         # Check confidence level
         if retrieved_info['below_threshold']:
@@ -191,15 +267,26 @@ async def answer_query(query: TextQuery, voice_output: bool = Query(True)):
             if tts_result['success']:
                 audio_url = f"/audio/{os.path.basename(audio_file)}"
         
+        sources = [{
+            'content': r['content'],
+            'metadata': r['metadata'],
+            'confidence': r['confidence']
+        } for r in retrieved_info['results']]
+        if analysis is not None and not retrieved_info['below_threshold']:
+            query_cache.store(
+                query_vector,
+                scope,
+                versions,
+                {'answer': answer, 'confidence': confidence, 'sources': sources},
+                audio_file=audio_file if audio_url else None,
+                query=query.query
+            )
+        
         return QueryResponse(
             answer=answer,
             audio_url=audio_url,
             confidence=confidence,
-            sources=[{
-                'content': r['content'],
-                'metadata': r['metadata'],
-                'confidence': r['confidence']
-            } for r in retrieved_info['results']]
+            sources=sources
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -233,6 +320,42 @@ async def process_voice_query(file: UploadFile = File(...), voice_output: bool =
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/filings")
+async def index_filing(request: FilingRequest, background_tasks: BackgroundTasks):
+    """Index a PDF or HTML filing from a public http(s) URL or a file inside FILINGS_DIR in the background."""
+    try:
+        check_source(request.source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    metadata = {field: value for field, value in (('symbol', request.symbol), ('title', request.title), ('date', request.date)) if value}
+    background_tasks.add_task(retriever_agent.index_filing, request.source, metadata)
+    return {'status': 'indexing', 'source': request.source}
+
+@app.get("/scraper-latency")
+async def get_scraper_latency():
+    """Report fetch latency per scraped source."""
+    return scraping_agent.client.latency_report()
+
+@app.get("/embedding-cache")
+async def get_embedding_cache_stats():
+    """Report hit rate and size of the embedding cache."""
+    cache = getattr(retriever_agent.embeddings, 'cache', None)
+    if cache is None:
+        return {'enabled': False}
+    return dict(cache.stats(), enabled=True)
+
+@app.get("/query-cache")
+async def get_query_cache_stats():
+    """Report hit rate and size of the /query result cache."""
+    if query_cache is None:
+        return {'enabled': False}
+    return dict(query_cache.stats(), enabled=True)
+
+@app.get("/index-size")
+async def get_index_size(limit: int = Query(500)):
+    """Report namespace sizes recorded by the retention job over time."""
+    return {'policies': retention_job.policies, 'history': retention_job.history(limit)}
+
 @app.get("/audio/{filename}")
 async def get_audio(filename: str):
     """Serve audio files."""
@@ -250,6 +373,8 @@ async def startup_event():
     # Start background data collection
     background_tasks = BackgroundTasks()
     background_tasks.add_task(collect_and_index_data)
+    if os.getenv('RETENTION', 'on').lower() != 'off':
+        retention_job.start()
 
 # Run the FastAPI app
 if __name__ == "__main__":
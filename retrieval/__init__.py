@@ -0,0 +1,2 @@
+# Retrieval package initialization
+# This package contains the vector store backends used by the retriever agent
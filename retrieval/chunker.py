@@ -0,0 +1,171 @@
+import os
+import re
+from collections import deque
+from typing import List, Dict, Iterable, Iterator, Tuple
+from retrieval.embedding_pipeline import count_tokens, MAX_INPUT_TOKENS
+
+# Token limits per document type; max_tokens 0 indexes every record as a single chunk
+CHUNK_POLICIES = {
+    'news': {'max_tokens': 256, 'overlap_tokens': 32},
+    'filings': {'max_tokens': 512, 'overlap_tokens': 64},
+    'earnings': {'max_tokens': 0, 'overlap_tokens': 0},
+    'stock_data': {'max_tokens': 0, 'overlap_tokens': 0},
+    'sentiment': {'max_tokens': 0, 'overlap_tokens': 0},
+    'default': {'max_tokens': 256, 'overlap_tokens': 32}
+}
+
+# Boundaries tried in order: paragraphs, lines, sentences, words
+SEPARATORS = [re.compile(r'\n\s*\n'), re.compile(r'\n'), re.compile(r'(?<=[.!?])\s+'), re.compile(r'\s+')]
+
+# A piece this many times longer in characters than the token limit is split without counting its tokens
+MAX_CHARS_PER_TOKEN = 8
+
+def load_chunk_policies() -> Dict[str, Dict[str, int]]:
+    """Get the chunking policy of each document type, with env overrides applied.
+
+    Returns:
+        Mapping of document type to max_tokens and overlap_tokens
+    """
+    policies = {}
+    for data_type, policy in CHUNK_POLICIES.items():
+        prefix = f"CHUNK_{data_type.upper()}"
+        policies[data_type] = {
+            'max_tokens': int(os.getenv(f"{prefix}_TOKENS", policy['max_tokens'])),
+            'overlap_tokens': int(os.getenv(f"{prefix}_OVERLAP", policy['overlap_tokens']))
+        }
+    return policies
+
+class Chunker:
+    """Split documents into chunks bounded by token count, with a policy per document type.
+
+    Records that fit in one chunk are returned whole without being tokenized when
+    their length alone proves they fit. Longer texts are cut at the coarsest
+    boundary (paragraph, line, sentence, word) that keeps every piece under the
+    limit, and adjacent pieces are packed into chunks. Chunks are slices of the
+    input between piece offsets, so the text is never split into a list and joined
+    again, and iter_stream chunks a sequence of parts (e.g. pages) while holding no
+    more than one part and one unfinished chunk.
+    """
+
+    def __init__(self, policies: Dict[str, Dict[str, int]] = None):
+        """Initialize the chunker.
+
+        Args:
+            policies: Chunking policy per document type (optional, can use CHUNK_<TYPE>_TOKENS /
+                CHUNK_<TYPE>_OVERLAP from env)
+        """
+        self.policies = policies or load_chunk_policies()
+
+    def policy(self, data_type: str) -> Tuple[int, int]:
+        """Get the token limit and overlap of a document type."""
+        policy = self.policies.get(data_type, self.policies['default'])
+        max_tokens = policy['max_tokens'] or MAX_INPUT_TOKENS
+        return max_tokens, min(policy['overlap_tokens'], max_tokens // 2)
+
+    def split(self, text: str, data_type: str = 'default') -> List[str]:
+        """Split a document into chunks.
+
+        Args:
+            text: Document text
+            data_type: Document type selecting the policy (e.g. 'news', 'filings')
+
+        Returns:
+            List of chunk texts (empty for a blank document)
+        """
+        max_tokens, overlap = self.policy(data_type)
+        if self._fits(text, max_tokens):
+            return [text.strip()] if text.strip() else []
+        chunks, _ = self._pack(text, max_tokens, overlap, final=True)
+        return chunks
+
+    def iter_stream(self, parts: Iterable[str], data_type: str = 'default') -> Iterator[str]:
+        """Chunk a document that arrives in parts, yielding chunks as soon as they are complete.
+
+        Chunks may span parts. A part is joined only with the unfinished tail of the
+        previous one, so memory stays bounded by the largest part. Parts are joined
+        as paragraphs unless whitespace already separates them.
+
+        Args:
+            parts: Consecutive pieces of one document (e.g. the text of each page)
+            data_type: Document type selecting the policy
+
+        Returns:
+            Iterator of chunk texts in document order
+        """
+        max_tokens, overlap = self.policy(data_type)
+        tail = ''
+        for part in parts:
+            if not part:
+                continue
+            if not tail:
+                buffer = part
+            elif tail[-1].isspace() or part[0].isspace():
+                buffer = tail + part
+            else:
+                buffer = tail + '\n\n' + part
+            chunks, rest = self._pack(buffer, max_tokens, overlap, final=False)
+            yield from chunks
+            tail = buffer[rest:]
+        if tail.strip():
+            chunks, _ = self._pack(tail, max_tokens, overlap, final=True)
+            yield from chunks
+
+    def _fits(self, text: str, max_tokens: int) -> bool:
+        # Byte-level BPE never yields more tokens than bytes, and ASCII has a byte per character
+        if text.isascii() and len(text) <= max_tokens:
+            return True
+        return len(text) <= max_tokens * MAX_CHARS_PER_TOKEN and count_tokens(text) <= max_tokens
+
+    def _pieces(self, text: str, start: int, end: int, max_tokens: int, level: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """Cover text[start:end] with (start, end, tokens) pieces of at most max_tokens each."""
+        position = start
+        for match in SEPARATORS[level].finditer(text, start, end):
+            if match.end() > position:
+                yield from self._piece(text, position, match.end(), max_tokens, level)
+                position = match.end()
+        if position < end:
+            yield from self._piece(text, position, end, max_tokens, level)
+
+    def _piece(self, text: str, start: int, end: int, max_tokens: int, level: int) -> Iterator[Tuple[int, int, int]]:
+        if end - start <= max_tokens * MAX_CHARS_PER_TOKEN:
+            tokens = count_tokens(text[start:end])
+            if tokens <= max_tokens:
+                yield start, end, tokens
+                return
+        if level + 1 < len(SEPARATORS):
+            yield from self._pieces(text, start, end, max_tokens, level + 1)
+            return
+        # A single word longer than the limit: cut it into character runs
+        for offset in range(start, end, max_tokens):
+            stop = min(offset + max_tokens, end)
+            yield offset, stop, count_tokens(text[offset:stop])
+
+    def _pack(self, text: str, max_tokens: int, overlap: int, final: bool) -> Tuple[List[str], int]:
+        """Pack consecutive pieces into chunks of at most max_tokens.
+
+        Returns:
+            (finished chunks, offset where the unfinished chunk starts); with final the
+            unfinished chunk is returned as well
+        """
+        chunks = []
+        window = deque()
+        window_tokens = 0
+        for piece in self._pieces(text, 0, len(text), max_tokens):
+            if window and window_tokens + piece[2] > max_tokens:
+                chunk = text[window[0][0]:window[-1][1]].strip()
+                if chunk:
+                    chunks.append(chunk)
+                # Carry the trailing pieces that fit in the overlap into the next chunk
+                while window and (window_tokens > overlap or window_tokens + piece[2] > max_tokens):
+                    window_tokens -= window.popleft()[2]
+            window.append(piece)
+            window_tokens += piece[2]
+
+        if not window:
+            return chunks, len(text)
+        if final:
+            chunk = text[window[0][0]:window[-1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            return chunks, len(text)
+        return chunks, window[0][0]
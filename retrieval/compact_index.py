@@ -0,0 +1,84 @@
+"""Remove duplicate chunks left in the vector store by earlier indexing runs.
+
+Before vector IDs were derived from record keys, every run added a fresh copy of
+each record. For every record key this keeps the chunks stored under the
+deterministic IDs when any exist and deletes the older random-ID copies.
+Stock data, earnings and sentiment records fit in one chunk, so those only
+stored under random IDs keep their newest chunk (latest indexed_at, else the
+last stored, as legacy runs appended); other records keep one chunk per
+distinct text.
+
+Run from the repository root:
+
+    python -m retrieval.compact_index --dry-run
+    python -m retrieval.compact_index --namespace news --namespace earnings
+"""
+import hashlib
+import argparse
+from typing import List, Dict, Any
+from retrieval.vector_backend import VectorBackend, create_vector_backend
+from retrieval.record_ids import record_key, content_key, chunk_prefix
+from retrieval.embeddings import index_model
+
+FETCH_BATCH_SIZE = 100
+
+# Namespaces of short structured records, indexed as one chunk per version
+RECORD_NAMESPACES = ('stock_data', 'earnings', 'sentiment')
+
+def compact_namespace(backend: VectorBackend, namespace: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Delete the superseded and duplicate chunks of one namespace.
+
+    Args:
+        backend: Vector store backend
+        namespace: Namespace to compact
+        dry_run: Only count what would be deleted
+
+    Returns:
+        Dictionary with the number of chunks, records and removed chunks
+    """
+    ids = backend.list_ids(namespace)
+    groups = {}
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        for stored_id, chunk in backend.fetch(namespace, ids[start:start + FETCH_BATCH_SIZE]).items():
+            metadata = chunk['metadata']
+            key = metadata.get('record_key') or record_key(namespace, metadata) or content_key(chunk['content'])
+            digest = hashlib.sha256(chunk['content'].encode('utf-8')).digest()
+            groups.setdefault(key, []).append((stored_id, digest, float(metadata.get('indexed_at') or 0)))
+
+    stale = []
+    for key, chunks in groups.items():
+        prefix = chunk_prefix(namespace, key)
+        if any(stored_id.startswith(prefix) for stored_id, _, _ in chunks):
+            stale.extend(stored_id for stored_id, _, _ in chunks if not stored_id.startswith(prefix))
+        elif namespace in RECORD_NAMESPACES:
+            # Every copy is a version of the record; ties on indexed_at go to the last stored
+            newest = max(range(len(chunks)), key=lambda position: (chunks[position][2], position))
+            stale.extend(stored_id for position, (stored_id, _, _) in enumerate(chunks) if position != newest)
+        else:
+            seen = set()
+            for stored_id, digest, _ in chunks:
+                if digest in seen:
+                    stale.append(stored_id)
+                seen.add(digest)
+
+    if stale and not dry_run:
+        backend.delete(namespace, stale)
+    return {'namespace': namespace, 'chunks': len(ids), 'records': len(groups), 'removed': len(stale)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--namespace', action='append', help='Namespace to compact (default: all)')
+    parser.add_argument('--backend', help='faiss, sharded or pinecone (default: VECTOR_BACKEND from env)')
+    parser.add_argument('--dry-run', action='store_true', help='Report duplicates without deleting them')
+    args = parser.parse_args()
+
+    # Same index directory the retriever uses for the configured embedding model
+    backend = create_vector_backend(args.backend, model=index_model())
+    namespaces: List[str] = args.namespace or backend.namespaces()
+    for namespace in namespaces:
+        result = compact_namespace(backend, namespace, args.dry_run)
+        action = 'would remove' if args.dry_run else 'removed'
+        print(f"{namespace}: {result['chunks']} chunks, {result['records']} records, {action} {result['removed']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'embeddings.db')
+
+# SQLite caps the number of bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+def text_hash(text: str) -> bytes:
+    """Hash the exact text that is sent to the embedding model."""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+class EmbeddingCache:
+    """Content-addressed cache of embeddings keyed by (model, sha256(text)).
+
+    Vectors are stored as float32 blobs in SQLite so they survive restarts, with an
+    in-memory LRU in front for the texts seen most recently (repeated queries,
+    re-scraped records that did not change).
+    """
+
+    def __init__(self, db_path: str = None, memory_items: int = None):
+        """Initialize the embedding cache.
+
+        Args:
+            db_path: Path of the SQLite cache (optional, can use from env)
+            memory_items: Number of vectors kept in the in-memory LRU (optional, can use from env)
+        """
+        self.db_path = db_path or os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_DB_PATH)
+        self.memory_items = memory_items or int(os.getenv('EMBEDDING_CACHE_MEMORY_ITEMS', 2048))
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+    def _remember(self, key: tuple, vector: np.ndarray):
+        """Put a vector in the in-memory LRU. Must be called with the lock held."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up the cached embeddings of several texts.
+
+        Args:
+            model: Embedding model name
+            texts: Texts to look up
+
+        Returns:
+            One float32 vector per text, or None where the text is not cached
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = [None] * len(texts)
+        with self._lock:
+            missing = {}
+            for position, digest in enumerate(hashes):
+                vector = self._memory.get((model, digest))
+                if vector is not None:
+                    self._memory.move_to_end((model, digest))
+                    found[position] = vector
+                    self._stats['memory_hits'] += 1
+                else:
+                    missing.setdefault(digest, []).append(position)
+
+            digests = list(missing)
+            for start in range(0, len(digests), LOOKUP_BATCH_SIZE):
+                batch = digests[start:start + LOOKUP_BATCH_SIZE]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model] + batch
+                ).fetchall()
+                for digest, blob in rows:
+                    vector = np.frombuffer(blob, dtype='float32')
+                    self._remember((model, digest), vector)
+                    for position in missing.pop(digest):
+                        found[position] = vector
+                        self._stats['disk_hits'] += 1
+
+            self._stats['misses'] += sum(len(positions) for positions in missing.values())
+        return found
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store the embeddings of several texts.
+
+        Args:
+            model: Embedding model name
+            texts: Embedded texts
+            vectors: Embedding of each text
+        """
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                digest = text_hash(text)
+                array = np.asarray(vector, dtype='float32')
+                self._remember((model, digest), array)
+                rows.append((model, digest, array.tobytes(), now))
+            self.conn.executemany("INSERT OR REPLACE INTO embeddings (model, text_hash, vector, created_at) VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit statistics.
+
+        Returns:
+            Dictionary with memory/disk hits, misses, hit rate and entry counts
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_items'] = len(self._memory)
+            stats['disk_items'] = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+class CachedEmbeddings:
+    """Embeddings wrapper that only sends texts missing from the cache to the model.
+
+    Exposes embed_documents/embed_query like the wrapped LangChain embeddings, so the
+    index and query paths share one cache.
+    """
+
+    def __init__(self, embeddings: Any, cache: EmbeddingCache = None, model: str = None):
+        """Initialize the cached embeddings.
+
+        Args:
+            embeddings: Object with embed_documents and embed_query (e.g. OpenAIEmbeddings)
+            cache: Embedding cache (optional, created from env)
+            model: Model name used in cache keys (optional, read from the embeddings)
+        """
+        self.embeddings = embeddings
+        self.cache = cache or EmbeddingCache()
+        self.model = model or getattr(embeddings, 'model', None) or type(embeddings).__name__
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the model once for all cache misses.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per text
+        """
+        vectors = self.cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            self.cache.put_many(self.model, missing, [computed[text] for text in missing])
+            vectors = [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+        return [vector.tolist() if isinstance(vector, np.ndarray) else vector for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query text through the cache.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Query embedding
+        """
+        vector = self.cache.get_many(self.model, [text])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many(self.model, [text], [vector])
+            return vector
+        return vector.tolist()
@@ -0,0 +1,175 @@
+import os
+import time
+import random
+import itertools
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from retrieval.vector_backend import VectorBackend
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# Embedding models cap the tokens of a single input
+MAX_INPUT_TOKENS = 8191
+MAX_RETRY_DELAY = 60.0
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding('cl100k_base')
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text, or estimate them (~4 characters each) without tiktoken."""
+    if HAS_TIKTOKEN:
+        return len(_encoding().encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+class EmbeddingPipeline:
+    """Embed chunks in token-bounded batches and upsert them while later batches embed.
+
+    Batches are sized by token count as well as by number of inputs, embedded by a
+    small pool of concurrent requests and retried with exponential backoff. A single
+    writer upserts each batch as soon as its vectors arrive, and no more than
+    max_in_flight batches are embedding or waiting to be written at any time. Chunks
+    are pulled from the input only as batches are formed, so a generator feeding the
+    pipeline is held back along with it. A batch that still fails after its retries
+    is dropped and reported; the other batches are written.
+    """
+
+    def __init__(self, embeddings: Any, backend: VectorBackend, max_batch_tokens: int = None, max_batch_size: int = None, concurrency: int = None, max_retries: int = None, retry_delay: float = None, max_in_flight: int = None):
+        """Initialize the embedding pipeline.
+
+        Args:
+            embeddings: Object with embed_documents (e.g. OpenAIEmbeddings or CachedEmbeddings)
+            backend: Vector store the embedded chunks are written to
+            max_batch_tokens: Maximum tokens per embedding request (optional, can use from env)
+            max_batch_size: Maximum inputs per embedding request (optional, can use from env)
+            concurrency: Number of concurrent embedding requests (optional, can use from env)
+            max_retries: Retries of a failed request before the batch is dropped (optional, can use from env)
+            retry_delay: Initial backoff in seconds, doubled on every retry (optional, can use from env)
+            max_in_flight: Maximum batches embedding or waiting to be written (optional, defaults to 2x concurrency)
+        """
+        self.embeddings = embeddings
+        self.backend = backend
+        self.max_batch_tokens = max_batch_tokens or int(os.getenv('EMBED_BATCH_TOKENS', 20000))
+        self.max_batch_size = max_batch_size or int(os.getenv('EMBED_BATCH_SIZE', 256))
+        self.concurrency = concurrency or int(os.getenv('EMBED_CONCURRENCY', 4))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('EMBED_MAX_RETRIES', 5))
+        self.retry_delay = retry_delay or float(os.getenv('EMBED_RETRY_DELAY', 1.0))
+        self.max_in_flight = max_in_flight or self.concurrency * 2
+
+    def batches(self, chunks: Iterable[Tuple[str, str, Dict[str, Any]]]) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]]]]:
+        """Group chunks into batches bounded by token count and number of inputs.
+
+        Args:
+            chunks: (chunk ID, text, metadata) of each chunk, e.g. from a generator
+
+        Returns:
+            Iterator of (ids, texts, metadatas) batches in input order
+        """
+        batch = ([], [], [])
+        batch_tokens = 0
+        for chunk_id, text, metadata in chunks:
+            tokens = min(count_tokens(text), MAX_INPUT_TOKENS)
+            if batch[0] and (batch_tokens + tokens > self.max_batch_tokens or len(batch[0]) >= self.max_batch_size):
+                yield batch
+                batch = ([], [], [])
+                batch_tokens = 0
+            batch[0].append(chunk_id)
+            batch[1].append(text)
+            batch[2].append(metadata)
+            batch_tokens += tokens
+        if batch[0]:
+            yield batch
+
+    def _with_retry(self, action: Callable[[], Any], description: str) -> Any:
+        """Run an action, retrying with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return action()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(self.retry_delay * (2 ** attempt), MAX_RETRY_DELAY) * random.uniform(0.5, 1.5)
+                print(f"Error {description} (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def _embed(self, batch: tuple) -> List[List[float]]:
+        return self._with_retry(lambda: self.embeddings.embed_documents(batch[1]), f"embedding {len(batch[1])} chunks")
+
+    def _upsert(self, namespace: str, batch: tuple, vectors: List[List[float]]) -> int:
+        return self._with_retry(lambda: self.backend.upsert(namespace, batch[0], vectors, batch[1], batch[2]), f"upserting {len(batch[0])} chunks")
+
+    def run(self, namespace: str, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Embed and upsert chunks given as parallel lists (see run_stream)."""
+        return self.run_stream(namespace, zip(ids, texts, metadatas))
+
+    def run_stream(self, namespace: str, chunks: Iterable[Tuple[str, str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Embed and upsert chunks.
+
+        Args:
+            namespace: Namespace to write to
+            chunks: (chunk ID, text, metadata) of each chunk, consumed as batches are formed
+
+        Returns:
+            Dictionary with counts of batches, upserted and failed chunks, the IDs of the
+            failed chunks and the elapsed time
+        """
+        stats = {'batches': 0, 'upserted': 0, 'failed': 0, 'failed_ids': [], 'elapsed': 0.0}
+        start = time.perf_counter()
+        batches = self.batches(chunks)
+
+        first = next(batches, None)
+        second = next(batches, None)
+        if first is None:
+            return stats
+        if second is None:
+            # A single batch gains nothing from the worker pools
+            stats['batches'] = 1
+            try:
+                stats['upserted'] = self._upsert(namespace, first, self._embed(first))
+            except Exception as e:
+                print(f"Error indexing {len(first[0])} chunks in {namespace}: {e}")
+                stats['failed'] = len(first[0])
+                stats['failed_ids'].extend(first[0])
+            stats['elapsed'] = time.perf_counter() - start
+            return stats
+
+        pending = {}
+
+        def consume(future):
+            stage, batch = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error indexing {len(batch[0])} chunks in {namespace}: {e}")
+                stats['failed'] += len(batch[0])
+                stats['failed_ids'].extend(batch[0])
+                return
+            if stage == 'embed':
+                pending[writer.submit(self._upsert, namespace, batch, result)] = ('upsert', batch)
+            else:
+                stats['upserted'] += result
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='embed') as embedder, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='upsert') as writer:
+            for batch in itertools.chain((first, second), batches):
+                # Backpressure: wait for a slot before embedding more batches
+                while len(pending) >= self.max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        consume(future)
+                stats['batches'] += 1
+                pending[embedder.submit(self._embed, batch)] = ('embed', batch)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    consume(future)
+
+        stats['elapsed'] = time.perf_counter() - start
+        print(f"Embedding pipeline ({namespace}): {stats['upserted']} chunks upserted in {stats['batches']} batches, {stats['failed']} failed in {stats['elapsed']:.1f}s")
+        return stats
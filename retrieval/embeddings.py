@@ -0,0 +1,39 @@
+import os
+from typing import Any, Optional, Tuple
+from retrieval.local_embeddings import LocalEmbeddings, DEFAULT_MODEL
+
+def index_model(provider: str = None) -> Optional[str]:
+    """Get the model name keying the FAISS index directory of the configured embeddings, without loading them.
+
+    Args:
+        provider: 'openai' or 'local' (optional, can use EMBEDDING_PROVIDER from env)
+
+    Returns:
+        The local model name, or None for the default OpenAI model
+    """
+    provider = (provider or os.getenv('EMBEDDING_PROVIDER', 'openai')).lower()
+    return os.getenv('LOCAL_EMBEDDING_MODEL', DEFAULT_MODEL) if provider == 'local' else None
+
+def create_embeddings(provider: str = None, openai_api_key: str = None, threads: int = None) -> Tuple[Any, Optional[str]]:
+    """Create the embedding model selected by configuration.
+
+    Args:
+        provider: 'openai' or 'local' (optional, can use EMBEDDING_PROVIDER from env)
+        openai_api_key: OpenAI API key (optional, can use from env; not needed for local)
+        threads: CPU threads of the local model (optional, defaults to all cores)
+
+    Returns:
+        (embeddings, model name keying the FAISS index directory, or None for the default OpenAI model)
+    """
+    provider = (provider or os.getenv('EMBEDDING_PROVIDER', 'openai')).lower()
+    if provider == 'local':
+        # Quantized sentence model on the CPU; no API calls for indexing or queries
+        embeddings = LocalEmbeddings(threads=threads)
+        return embeddings, embeddings.model
+
+    # Imported here so the local model and worker processes don't need LangChain
+    from langchain.embeddings.openai import OpenAIEmbeddings
+    openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
+    if not openai_api_key:
+        raise ValueError("OpenAI API key must be provided or set as an environment variable.")
+    return OpenAIEmbeddings(openai_api_key=openai_api_key), None
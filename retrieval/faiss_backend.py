@@ -0,0 +1,965 @@
+import os
+import re
+import json
+import base64
+import bisect
+import time
+import uuid
+import pickle
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+import numpy as np
+import faiss
+from retrieval.vector_backend import VectorBackend, matches_filter
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'orchestrator', 'vector_store')
+
+INDEX_FILE = 'vectors.faiss'
+DOCSTORE_FILE = 'docstore.json'
+CHANGE_LOG_FILE = 'changes.log'
+
+# The change log is folded into a full save once it outgrows this share of the saved files
+CHECKPOINT_RATIO = 0.5
+CHECKPOINT_MIN_BYTES = 4 * 1024 * 1024
+
+# Files written by LangChain's FAISS.save_local, converted on first load
+LEGACY_INDEX_FILE = 'index.faiss'
+LEGACY_DOCSTORE_FILE = 'index.pkl'
+
+# Compressed search indexes kept next to the exact one, rebuilt when the namespace doubles in size
+QUANTIZED_INDEX_FILE = 'vectors.{}.faiss'
+QUANTIZATIONS = ('none', 'sq8', 'ivfpq')
+REBUILD_GROWTH = 2.0
+MAX_TRAINING_VECTORS = 50000
+
+# Metadata indexed by value and by numeric range, so filtered searches only check the chunks they can match
+KEYWORD_FIELDS = ('symbol', 'symbols')
+RANGE_FIELD = 'timestamp'
+
+# Each published build is a version directory of the namespace, and CURRENT names the one that loads
+VERSION_POINTER_FILE = 'CURRENT'
+VERSION_DIR = 'v{:010d}'
+VERSION_PATTERN = re.compile(r'^v(\d{10})(\.tmp)?$')
+# Builds are addressed as "<namespace>@<build id>"
+BUILD_SEPARATOR = '@'
+# Half-written version directories left by a crashed process are removed after this long
+STALE_BUILD_SECONDS = 3600
+# Held by the writer of a namespace across processes while it changes the namespace files
+LOCK_FILE = '.lock'
+
+# Map flat vector storage straight from the page cache where this FAISS build supports it
+MMAP_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+def model_store_path(model: str = None, store_path: str = None) -> str:
+    """Get the index directory for an embedding model.
+
+    Args:
+        model: Embedding model name, or None for the default OpenAI model
+        store_path: Base directory (optional, can use VECTOR_STORE_PATH from env)
+
+    Returns:
+        The base directory for the default model, else a per-model sub-directory
+    """
+    store_path = store_path or os.getenv('VECTOR_STORE_PATH', DEFAULT_STORE_PATH)
+    if not model:
+        return store_path
+    return os.path.join(store_path, 'models', re.sub(r'[^\w.-]+', '_', model))
+
+def faiss_id(chunk_id: str) -> int:
+    """Map a string chunk ID to the signed 64-bit ID stored in the FAISS index."""
+    return int.from_bytes(hashlib.blake2b(chunk_id.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+def _encode_change(change: Dict[str, Any]) -> bytes:
+    """Serialize a change log entry as one JSON line, with vectors as base64 float32."""
+    if 'vectors' in change:
+        vectors = change['vectors']
+        change = dict(change, vectors=base64.b64encode(vectors.tobytes()).decode('ascii'), dim=int(vectors.shape[1]))
+    return (json.dumps(change) + '\n').encode('utf-8')
+
+def _read_changes(path: str, offset: int = 0) -> tuple:
+    """Read the change log of a namespace from a byte offset up to its last complete entry.
+
+    An entry torn by a crash mid-write, or still being written by another process, is
+    not returned; the next writer truncates it.
+
+    Returns:
+        The changes and the offset just past the last complete one
+    """
+    changes = []
+    if not os.path.exists(path):
+        return changes, offset
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                change = json.loads(line)
+            except ValueError:
+                break
+            if 'vectors' in change:
+                change['vectors'] = np.frombuffer(base64.b64decode(change['vectors']), dtype='float32').reshape(-1, change['dim']).copy()
+            changes.append(change)
+            offset += len(line)
+    return changes, offset
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def _file_id(path: str) -> Optional[tuple]:
+    """Identify the saved version of a file, which changes whenever it is atomically replaced."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+def _link_or_copy(source: str, target: str):
+    """Hard-link a file, copying it on filesystems without hard links."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def _keyword_values(value: Any) -> List[Any]:
+    """Get the hashable values of a keyword metadata field (each item of a list)."""
+    values = value if isinstance(value, list) else [value]
+    return [item for item in values if isinstance(item, (str, int, float, bool))]
+
+def _range_value(value: Any) -> Optional[float]:
+    """Get the value of a range metadata field, or None if it is not a number."""
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def _keyword_candidates(postings: Dict[Any, set], condition: Any) -> Optional[set]:
+    """Get the int IDs a keyword field's $eq/$in condition allows, or None for other operators."""
+    if not isinstance(condition, dict):
+        condition = {'$eq': condition}
+    allowed = None
+    for operator, operand in condition.items():
+        if operator == '$eq':
+            found = set(postings.get(operand, ())) if isinstance(operand, (str, int, float, bool)) else set()
+        elif operator == '$in':
+            found = set().union(*(postings.get(value, ()) for value in operand if isinstance(value, (str, int, float, bool))))
+        else:
+            continue
+        allowed = found if allowed is None else allowed & found
+    return allowed
+
+def _range_candidates(timestamps: List[tuple], condition: Any) -> Optional[set]:
+    """Get the int IDs in a sorted (value, int ID) list a $gt/$gte/$lt/$lte condition allows, or None for other operators."""
+    if not isinstance(condition, dict):
+        return None
+    start, end = 0, len(timestamps)
+    bounded = False
+    for operator, operand in condition.items():
+        if _range_value(operand) is None:
+            continue
+        if operator == '$gte':
+            start = max(start, bisect.bisect_left(timestamps, (operand, -2 ** 63)))
+        elif operator == '$gt':
+            start = max(start, bisect.bisect_right(timestamps, (operand, 2 ** 63)))
+        elif operator == '$lt':
+            end = min(end, bisect.bisect_left(timestamps, (operand, -2 ** 63)))
+        elif operator == '$lte':
+            end = min(end, bisect.bisect_right(timestamps, (operand, 2 ** 63)))
+        else:
+            continue
+        bounded = True
+    if not bounded:
+        return None
+    return set(int_id for _, int_id in timestamps[start:end])
+
+class _LegacyRecord:
+    """Stand-in for the LangChain docstore classes pickled in legacy index.pkl files."""
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            self.__dict__.update(state.get('__dict__', state))
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Unpickle a LangChain docstore without importing LangChain or running arbitrary classes."""
+
+    ALLOWED = {
+        ('langchain_community.docstore.in_memory', 'InMemoryDocstore'),
+        ('langchain.docstore.in_memory', 'InMemoryDocstore'),
+        ('langchain_core.documents.base', 'Document'),
+        ('langchain.schema.document', 'Document')
+    }
+
+    # Numpy scalars appear in metadata that was indexed without converting to Python types
+    NUMPY = {
+        ('numpy', 'dtype'),
+        ('numpy._core.multiarray', 'scalar'),
+        ('numpy.core.multiarray', 'scalar')
+    }
+
+    def find_class(self, module, name):
+        if (module, name) in self.ALLOWED:
+            return _LegacyRecord
+        if (module, name) in self.NUMPY:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Unexpected class in legacy docstore: {module}.{name}")
+
+class FAISSBackend(VectorBackend):
+    """Local FAISS vector store with one index per namespace directory.
+
+    Each namespace holds an ID-mapped inner-product index over L2-normalized vectors
+    (so scores are cosine similarities) and a JSON docstore of chunk texts and metadata.
+    Indexes are memory-mapped read-only when loaded, which keeps startup fast and lets
+    several processes share the pages; the first write to a namespace loads a private
+    copy. Writes change that copy in place and append themselves to a change log that
+    is replayed on load, so a write costs time proportional to its own size; the log is
+    folded into a full atomic save once it outgrows half the size of the saved files.
+
+    With quantization enabled, namespaces of at least quantize_min_vectors chunks are
+    also indexed with int8 scalar quantization (sq8, 4x smaller) or IVF-PQ (ivfpq,
+    ~pq_m bytes per vector). Searches scan the compressed index held in memory and
+    re-rank the top k * rerank_factor candidates with the exact vectors, which are
+    memory-mapped from disk again after each full save so only the candidates' pages
+    are read.
+
+    A re-index goes through begin_build/publish_build: its writes are collected and
+    published together as a new version directory of the namespace, which hard-links
+    the saved files of the current version, carries a copy of its change log with the
+    build appended, and becomes current when the CURRENT pointer file is atomically
+    replaced. Saved files are only ever replaced, never changed in place, so older
+    versions stay intact for rollback; the newest keep_versions are kept. Writers of a
+    namespace hold a file lock across processes, and every process picks up versions,
+    logged writes and rollbacks of other processes within reload_interval seconds.
+    """
+
+    def __init__(self, store_path: str = None, use_mmap: bool = None, quantization: str = None, rerank_factor: int = None, pq_m: int = None, nprobe: int = None, quantize_min_vectors: int = None, keep_versions: int = None, reload_interval: float = None):
+        """Initialize the FAISS backend.
+
+        Args:
+            store_path: Directory holding one sub-directory per namespace (optional, can use
+                VECTOR_STORE_PATH from env)
+            use_mmap: Memory-map indexes when loading (optional, can use FAISS_MMAP from env)
+            quantization: 'none', 'sq8' or 'ivfpq' (optional, can use FAISS_QUANTIZATION from env)
+            rerank_factor: Candidates per result re-ranked exactly, 0 to skip re-ranking (optional, can use from env)
+            pq_m: Bytes per vector of the PQ codes (optional, can use FAISS_PQ_M from env)
+            nprobe: IVF lists scanned per query (optional, can use FAISS_IVF_NPROBE from env)
+            quantize_min_vectors: Smallest namespace that gets a compressed index (optional, can use from env)
+            keep_versions: Published versions kept on disk per namespace, including the current
+                one (optional, can use FAISS_KEEP_VERSIONS from env)
+            reload_interval: Seconds between checks of a namespace for writes by other processes
+                (optional, can use FAISS_RELOAD_INTERVAL from env)
+        """
+        self.store_path = store_path or os.getenv('VECTOR_STORE_PATH', DEFAULT_STORE_PATH)
+        if use_mmap is None:
+            use_mmap = os.getenv('FAISS_MMAP', 'on').lower() == 'on'
+        self.use_mmap = use_mmap
+        self.quantization = (quantization or os.getenv('FAISS_QUANTIZATION', 'none')).lower()
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown FAISS quantization: {self.quantization} (expected one of {', '.join(QUANTIZATIONS)})")
+        self.rerank_factor = rerank_factor if rerank_factor is not None else int(os.getenv('FAISS_RERANK_FACTOR', 4))
+        self.pq_m = pq_m or int(os.getenv('FAISS_PQ_M', 64))
+        self.nprobe = nprobe or int(os.getenv('FAISS_IVF_NPROBE', 16))
+        self.quantize_min_vectors = quantize_min_vectors if quantize_min_vectors is not None else int(os.getenv('FAISS_QUANTIZE_MIN_VECTORS', 1000))
+        self.keep_versions = max(1, keep_versions or int(os.getenv('FAISS_KEEP_VERSIONS', 2)))
+        self.reload_interval = reload_interval if reload_interval is not None else float(os.getenv('FAISS_RELOAD_INTERVAL', 1.0))
+        self._namespaces = {}
+        self._builds = {}
+        self._write_locks = {}
+        self._lock = threading.Lock()
+
+    def _namespace_dir(self, namespace: str) -> str:
+        return os.path.join(self.store_path, namespace)
+
+    def _version_dir(self, namespace: str, version: Optional[str]) -> str:
+        """Get the directory of a namespace version; files written before the first build sit in the namespace directory."""
+        directory = self._namespace_dir(namespace)
+        return os.path.join(directory, version) if version else directory
+
+    def current_version(self, namespace: str) -> Optional[str]:
+        """Get the version of a namespace that loads from disk, or None before its first published build."""
+        pointer_path = os.path.join(self._namespace_dir(namespace), VERSION_POINTER_FILE)
+        if not os.path.exists(pointer_path):
+            return None
+        with open(pointer_path) as f:
+            return f.read().strip() or None
+
+    def _empty_state(self) -> Dict[str, Any]:
+        return {'index': None, 'docs': {}, 'ids': {}, 'keywords': {field: {} for field in KEYWORD_FIELDS}, 'timestamps': [],
+                'owned': True, 'quantized': None, 'trained_on': 0, 'lock': threading.RLock(), 'base_bytes': 0, 'log_bytes': 0,
+                'version': None, 'base_id': None, 'checked': time.monotonic()}
+
+    def _state(self, namespace: str) -> Dict[str, Any]:
+        """Get the loaded state of a namespace, loading it from disk on first use."""
+        if BUILD_SEPARATOR in namespace:
+            raise ValueError(f"FAISS build {namespace} can only be written to until it is published")
+        with self._lock:
+            state = self._namespaces.get(namespace)
+            if state is None:
+                state = self._empty_state()
+                try:
+                    self._load(namespace, state, self.current_version(namespace))
+                except Exception as e:
+                    print(f"Error loading FAISS namespace {namespace}, starting empty: {e}")
+                    state = self._empty_state()
+                self._namespaces[namespace] = state
+            return state
+
+    def _fresh_state(self, namespace: str) -> Dict[str, Any]:
+        """Get the state of a namespace for a read, checking every reload_interval seconds for writes by other processes."""
+        state = self._state(namespace)
+        if time.monotonic() - state['checked'] > self.reload_interval:
+            try:
+                state = self._catch_up(namespace, state)
+            except Exception as e:
+                print(f"Error reloading FAISS namespace {namespace}, keeping the loaded state: {e}")
+        return state
+
+    def _catch_up(self, namespace: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Bring a loaded namespace up to date with the store.
+
+        Changes another process appended to the log of the loaded version are replayed
+        in place; a new version, a rollback or a checkpoint loads the namespace again.
+
+        Returns:
+            The up-to-date state
+        """
+        with state['lock']:
+            state['checked'] = time.monotonic()
+            version = self.current_version(namespace)
+            directory = self._version_dir(namespace, version)
+            if version == state['version'] and _file_id(os.path.join(directory, INDEX_FILE)) == state['base_id']:
+                log_path = os.path.join(directory, CHANGE_LOG_FILE)
+                size = _file_size(log_path)
+                if size >= state['log_bytes']:
+                    if size > state['log_bytes']:
+                        changes, state['log_bytes'] = _read_changes(log_path, state['log_bytes'])
+                        for change in changes:
+                            self._apply(namespace, state, change)
+                    return state
+        fresh = self._empty_state()
+        self._load(namespace, fresh, version)
+        with self._lock:
+            self._namespaces[namespace] = fresh
+        return fresh
+
+    def _load(self, namespace: str, state: Dict[str, Any], version: Optional[str]):
+        """Load a namespace version's index and docstore, converting the LangChain format if needed,
+        and replay the changes logged since they were saved."""
+        directory = self._version_dir(namespace, version)
+        state['version'] = version
+        index_path = os.path.join(directory, INDEX_FILE)
+        docstore_path = os.path.join(directory, DOCSTORE_FILE)
+        if os.path.exists(index_path):
+            with open(docstore_path, 'r') as f:
+                state['docs'] = json.load(f)
+            state['index'] = faiss.read_index(index_path, MMAP_FLAGS) if self.use_mmap else faiss.read_index(index_path)
+            state['owned'] = not self.use_mmap
+            state['base_bytes'] = os.path.getsize(index_path) + os.path.getsize(docstore_path)
+            state['base_id'] = _file_id(index_path)
+        elif os.path.exists(os.path.join(directory, LEGACY_INDEX_FILE)):
+            state['index'], state['docs'] = self._convert_legacy(directory)
+            state['owned'] = True
+        state['ids'] = {faiss_id(chunk_id): chunk_id for chunk_id in state['docs']}
+        self._index_metadata(state, state['ids'].items())
+
+        # A saved compressed index matches the saved exact one; logged changes are replayed on both
+        quantized_path = os.path.join(directory, QUANTIZED_INDEX_FILE.format(self.quantization))
+        if self.quantization != 'none' and state['index'] is not None and os.path.exists(quantized_path):
+            quantized = faiss.read_index(quantized_path)
+            if quantized.ntotal == state['index'].ntotal:
+                state['quantized'] = quantized
+                state['trained_on'] = quantized.ntotal
+
+        changes, state['log_bytes'] = _read_changes(os.path.join(directory, CHANGE_LOG_FILE))
+        for change in changes:
+            self._apply(namespace, state, change)
+
+        if self.quantization != 'none' and state['quantized'] is None and state['index'] is not None and state['index'].ntotal >= self.quantize_min_vectors:
+            self._build_quantized(state)
+            if not state['log_bytes']:
+                faiss.write_index(state['quantized'], quantized_path + '.tmp')
+                os.replace(quantized_path + '.tmp', quantized_path)
+
+    def _convert_legacy(self, directory: str) -> tuple:
+        """Convert a LangChain FAISS.save_local directory into an ID-mapped cosine index."""
+        legacy = faiss.read_index(os.path.join(directory, LEGACY_INDEX_FILE))
+        with open(os.path.join(directory, LEGACY_DOCSTORE_FILE), 'rb') as f:
+            docstore, index_to_docstore_id = _LegacyUnpickler(f).load()
+
+        vectors = legacy.reconstruct_n(0, legacy.ntotal)
+        faiss.normalize_L2(vectors)
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(legacy.d))
+        chunk_ids = [index_to_docstore_id[position] for position in range(legacy.ntotal)]
+        docs = {}
+        for chunk_id in chunk_ids:
+            document = docstore._dict[chunk_id]
+            metadata = {key: value.item() if isinstance(value, np.generic) else value for key, value in document.metadata.items()}
+            docs[chunk_id] = {'text': document.page_content, 'metadata': metadata}
+        index.add_with_ids(vectors, np.array([faiss_id(chunk_id) for chunk_id in chunk_ids], dtype='int64'))
+        print(f"Converted LangChain FAISS index in {directory} ({index.ntotal} vectors)")
+        return index, docs
+
+    def _make_writable(self, namespace: str, state: Dict[str, Any], dimension: int):
+        """Swap a memory-mapped index for a private in-memory copy before changing it."""
+        if state['index'] is None:
+            state['index'] = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+            state['owned'] = True
+        elif not state['owned']:
+            state['index'] = faiss.read_index(os.path.join(self._version_dir(namespace, state['version']), INDEX_FILE))
+            state['owned'] = True
+
+    def _apply(self, namespace: str, state: Dict[str, Any], change: Dict[str, Any]):
+        """Apply an upsert or delete to the in-memory index and docstore of a namespace."""
+        if change['op'] == 'upsert':
+            self._make_writable(namespace, state, change['vectors'].shape[1])
+            int_ids = np.array([faiss_id(chunk_id) for chunk_id in change['ids']], dtype='int64')
+            replaced = [int_id for int_id in int_ids.tolist() if int_id in state['ids']]
+            if replaced:
+                self._unindex_metadata(state, [(int_id, state['ids'][int_id]) for int_id in replaced])
+                state['index'].remove_ids(np.array(replaced, dtype='int64'))
+            state['index'].add_with_ids(change['vectors'], int_ids)
+            self._update_quantized(state, replaced, change['vectors'], int_ids)
+            for chunk_id, int_id, text, metadata in zip(change['ids'], int_ids.tolist(), change['texts'], change['metadatas']):
+                state['docs'][chunk_id] = {'text': text, 'metadata': metadata}
+                state['ids'][int_id] = chunk_id
+            self._index_metadata(state, zip(int_ids.tolist(), change['ids']))
+        else:
+            present = [chunk_id for chunk_id in change['ids'] if chunk_id in state['docs']]
+            if not present:
+                return
+            self._make_writable(namespace, state, state['index'].d)
+            int_ids = [faiss_id(chunk_id) for chunk_id in present]
+            self._unindex_metadata(state, zip(int_ids, present))
+            state['index'].remove_ids(np.array(int_ids, dtype='int64'))
+            self._update_quantized(state, int_ids)
+            for chunk_id, int_id in zip(present, int_ids):
+                del state['docs'][chunk_id]
+                state['ids'].pop(int_id, None)
+
+    def _build_quantized(self, state: Dict[str, Any]):
+        """Train a compressed index on a namespace's exact vectors and fill it."""
+        index = state['index']
+        vectors = index.index.reconstruct_n(0, index.ntotal)
+        int_ids = faiss.vector_to_array(index.id_map)
+        dimension = index.d
+        if self.quantization == 'sq8':
+            quantized = faiss.IndexIDMap2(faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT))
+        else:
+            # PQ needs the sub-vector count to divide the dimension; IVF wants ~39 training points per list
+            m = max(divisor for divisor in range(1, min(self.pq_m, dimension) + 1) if dimension % divisor == 0)
+            nlist = max(1, min(int(4 * np.sqrt(index.ntotal)), index.ntotal // 39))
+            quantized = faiss.IndexIVFPQ(faiss.IndexFlatIP(dimension), dimension, nlist, m, 8, faiss.METRIC_INNER_PRODUCT)
+        if len(vectors) > MAX_TRAINING_VECTORS:
+            quantized.train(vectors[np.random.default_rng(0).choice(len(vectors), MAX_TRAINING_VECTORS, replace=False)])
+        else:
+            quantized.train(vectors)
+        quantized.add_with_ids(vectors, int_ids)
+        state['quantized'] = quantized
+        state['trained_on'] = index.ntotal
+
+    def _update_quantized(self, state: Dict[str, Any], removed: List[int], vectors: np.ndarray = None, int_ids: np.ndarray = None):
+        """Apply a change of the exact index to the compressed one, building or retraining it when due."""
+        if self.quantization == 'none':
+            return
+        total = state['index'].ntotal
+        quantized = state['quantized']
+        if quantized is None or total > state['trained_on'] * REBUILD_GROWTH:
+            if total >= self.quantize_min_vectors:
+                self._build_quantized(state)
+            return
+        if removed:
+            quantized.remove_ids(np.array(removed, dtype='int64'))
+        if vectors is not None and len(vectors):
+            quantized.add_with_ids(vectors, int_ids)
+
+    def _index_metadata(self, state: Dict[str, Any], entries):
+        """Add chunks, as (int ID, chunk ID) pairs already in the docstore, to the metadata indexes."""
+        timestamps = []
+        for int_id, chunk_id in entries:
+            metadata = state['docs'][chunk_id]['metadata']
+            for field in KEYWORD_FIELDS:
+                for value in _keyword_values(metadata.get(field)):
+                    state['keywords'][field].setdefault(value, set()).add(int_id)
+            timestamp = _range_value(metadata.get(RANGE_FIELD))
+            if timestamp is not None:
+                timestamps.append((timestamp, int_id))
+        if len(timestamps) > len(state['timestamps']) // 8:
+            state['timestamps'].extend(timestamps)
+            state['timestamps'].sort()
+        else:
+            for entry in timestamps:
+                bisect.insort(state['timestamps'], entry)
+
+    def _unindex_metadata(self, state: Dict[str, Any], entries):
+        """Remove chunks, as (int ID, chunk ID) pairs still in the docstore, from the metadata indexes."""
+        for int_id, chunk_id in entries:
+            metadata = state['docs'][chunk_id]['metadata']
+            for field in KEYWORD_FIELDS:
+                postings = state['keywords'][field]
+                for value in _keyword_values(metadata.get(field)):
+                    int_ids = postings.get(value)
+                    if int_ids is not None:
+                        int_ids.discard(int_id)
+                        if not int_ids:
+                            del postings[value]
+            timestamp = _range_value(metadata.get(RANGE_FIELD))
+            if timestamp is not None:
+                position = bisect.bisect_left(state['timestamps'], (timestamp, int_id))
+                if position < len(state['timestamps']) and state['timestamps'][position] == (timestamp, int_id):
+                    del state['timestamps'][position]
+
+    def _filter_candidates(self, state: Dict[str, Any], filter: Dict[str, Any]) -> Optional[set]:
+        """Get the int IDs allowed by the indexed clauses of a filter.
+
+        Returns:
+            A superset of the chunks matching the filter, or None if no clause is indexed
+        """
+        candidates = None
+        for field, condition in filter.items():
+            if field in ('$and', '$or'):
+                found = [self._filter_candidates(state, clause) for clause in condition]
+                if field == '$and':
+                    found = [allowed for allowed in found if allowed is not None]
+                    allowed = set.intersection(*found) if found else None
+                else:
+                    allowed = set().union(*found) if found and None not in found else None
+            elif field in KEYWORD_FIELDS:
+                allowed = _keyword_candidates(state['keywords'][field], condition)
+            elif field == RANGE_FIELD:
+                allowed = _range_candidates(state['timestamps'], condition)
+            else:
+                allowed = None
+            if allowed is not None:
+                candidates = allowed if candidates is None else candidates & allowed
+        return candidates
+
+    def _write_lock(self, namespace: str) -> threading.Lock:
+        with self._lock:
+            return self._write_locks.setdefault(namespace, threading.Lock())
+
+    def _lock_namespace(self, namespace: str):
+        """Take the inter-process write lock of a namespace (a no-op without fcntl).
+
+        Returns:
+            The open lock file, to pass to _unlock_namespace
+        """
+        if not HAS_FCNTL:
+            return None
+        directory = self._namespace_dir(namespace)
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(os.path.join(directory, LOCK_FILE), 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _unlock_namespace(self, lock_file):
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    @contextmanager
+    def _writing(self, namespace: str):
+        """Hold the write locks of a namespace and give the writer its state, up to date with the store.
+
+        Writers of a namespace are serialized within the process and across processes
+        sharing the store, and start from everything written before them, so a write
+        never reverts one made by another process.
+        """
+        with self._write_lock(namespace):
+            lock_file = self._lock_namespace(namespace)
+            try:
+                state = self._catch_up(namespace, self._state(namespace))
+                # New entries must follow the last complete one, not an entry torn by a crashed writer
+                log_path = os.path.join(self._version_dir(namespace, state['version']), CHANGE_LOG_FILE)
+                if _file_size(log_path) > state['log_bytes']:
+                    with open(log_path, 'r+b') as f:
+                        f.truncate(state['log_bytes'])
+                yield state
+            finally:
+                self._unlock_namespace(lock_file)
+
+    def _log(self, namespace: str, state: Dict[str, Any], change: Dict[str, Any]):
+        """Append an applied change to the change log of the current version, checkpointing when it grows too long."""
+        directory = self._version_dir(namespace, state['version'])
+        os.makedirs(directory, exist_ok=True)
+        entry = _encode_change(change)
+        with open(os.path.join(directory, CHANGE_LOG_FILE), 'ab') as f:
+            f.write(entry)
+        state['log_bytes'] += len(entry)
+        if self._log_too_long(state):
+            self._save(namespace, state)
+
+    def _log_too_long(self, state: Dict[str, Any]) -> bool:
+        return state['log_bytes'] > max(CHECKPOINT_MIN_BYTES, CHECKPOINT_RATIO * state['base_bytes'])
+
+    def _save(self, namespace: str, state: Dict[str, Any]):
+        """Write the index and docstore of the current version atomically and clear its change log.
+
+        Files are replaced rather than rewritten, so older versions hard-linking them keep
+        their own copy. Replaying a change is idempotent, so a crash before the log is
+        removed only replays changes the saved files already hold.
+        """
+        directory = self._version_dir(namespace, state['version'])
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, INDEX_FILE)
+        faiss.write_index(state['index'], index_path + '.tmp')
+        os.replace(index_path + '.tmp', index_path)
+        # A compressed index of another setting no longer matches the exact one
+        for kind in QUANTIZATIONS[1:]:
+            stale_path = os.path.join(directory, QUANTIZED_INDEX_FILE.format(kind))
+            if kind != self.quantization and os.path.exists(stale_path):
+                os.remove(stale_path)
+        if state['quantized'] is not None:
+            quantized_path = os.path.join(directory, QUANTIZED_INDEX_FILE.format(self.quantization))
+            faiss.write_index(state['quantized'], quantized_path + '.tmp')
+            os.replace(quantized_path + '.tmp', quantized_path)
+            if self.use_mmap:
+                # Searches only need the exact vectors of re-ranked candidates, so map them from disk again
+                state['index'] = faiss.read_index(index_path, MMAP_FLAGS)
+                state['owned'] = False
+        docstore_path = os.path.join(directory, DOCSTORE_FILE)
+        with open(docstore_path + '.tmp', 'w') as f:
+            json.dump(state['docs'], f)
+        os.replace(docstore_path + '.tmp', docstore_path)
+
+        log_path = os.path.join(directory, CHANGE_LOG_FILE)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        state['base_bytes'] = os.path.getsize(index_path) + os.path.getsize(docstore_path)
+        state['base_id'] = _file_id(index_path)
+        state['log_bytes'] = 0
+
+    def checkpoint(self, namespace: str):
+        """Fold the change log of a namespace into a full save now.
+
+        Args:
+            namespace: Namespace to save
+        """
+        with self._writing(namespace) as state:
+            with state['lock']:
+                if state['index'] is not None and state['log_bytes']:
+                    self._save(namespace, state)
+
+    def _version_numbers(self, namespace: str) -> List[int]:
+        directory = self._namespace_dir(namespace)
+        if not os.path.isdir(directory):
+            return []
+        return [int(match.group(1)) for match in map(VERSION_PATTERN.match, os.listdir(directory)) if match]
+
+    def _publish(self, namespace: str, state: Dict[str, Any], changes: List[Dict[str, Any]]):
+        """Write changes as a new version of a namespace and make it the one that loads.
+
+        The new version hard-links the saved files of the current one and gets a copy of
+        its change log with the changes appended, so publishing costs time proportional
+        to the log rather than to the namespace. It is staged under a temporary name and
+        renamed into place before CURRENT points at it.
+        """
+        directory = self._namespace_dir(namespace)
+        current = self._version_dir(namespace, state['version'])
+        if state['index'] is not None and not os.path.exists(os.path.join(current, INDEX_FILE)):
+            # A converted LangChain index has no saved files to link to yet
+            with state['lock']:
+                self._save(namespace, state)
+        version = VERSION_DIR.format(max(self._version_numbers(namespace), default=0) + 1)
+
+        staging = os.path.join(directory, version + '.tmp')
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in (INDEX_FILE, DOCSTORE_FILE, QUANTIZED_INDEX_FILE.format(self.quantization)):
+            if os.path.exists(os.path.join(current, name)):
+                _link_or_copy(os.path.join(current, name), os.path.join(staging, name))
+        with open(os.path.join(staging, CHANGE_LOG_FILE), 'wb') as f:
+            if state['log_bytes']:
+                with open(os.path.join(current, CHANGE_LOG_FILE), 'rb') as log:
+                    f.write(log.read(state['log_bytes']))
+            for change in changes:
+                f.write(_encode_change(change))
+            log_bytes = f.tell()
+        os.rename(staging, os.path.join(directory, version))
+
+        with state['lock']:
+            for change in changes:
+                self._apply(namespace, state, change)
+            self._set_current(namespace, version)
+            state['version'] = version
+            state['log_bytes'] = log_bytes
+            if self._log_too_long(state):
+                self._save(namespace, state)
+        self._collect_garbage(namespace)
+
+    def _set_current(self, namespace: str, version: str):
+        """Point a namespace at a version by atomically replacing its pointer file."""
+        pointer_path = os.path.join(self._namespace_dir(namespace), VERSION_POINTER_FILE)
+        with open(pointer_path + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(pointer_path + '.tmp', pointer_path)
+
+    def _collect_garbage(self, namespace: str):
+        """Delete versions beyond the newest keep_versions, abandoned builds and the files from before the first build."""
+        directory = self._namespace_dir(namespace)
+        current = self.current_version(namespace)
+        keep = set(VERSION_DIR.format(number) for number in sorted(self._version_numbers(namespace))[-self.keep_versions:])
+        keep.add(current)
+        unversioned = [INDEX_FILE, DOCSTORE_FILE, CHANGE_LOG_FILE] + [QUANTIZED_INDEX_FILE.format(kind) for kind in QUANTIZATIONS[1:]]
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            match = VERSION_PATTERN.match(name)
+            try:
+                if match and match.group(2):
+                    if time.time() - os.path.getmtime(path) > STALE_BUILD_SECONDS:
+                        shutil.rmtree(path)
+                elif match and name not in keep:
+                    # Memory-mapped files of a removed version stay readable until unmapped
+                    shutil.rmtree(path)
+                elif name in unversioned:
+                    os.remove(path)
+            except OSError as e:
+                print(f"Error removing old FAISS version {path}: {e}")
+
+    def versions(self, namespace: str) -> List[str]:
+        """List the versions of a namespace kept on disk, oldest first."""
+        directory = self._namespace_dir(namespace)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory) if VERSION_PATTERN.match(name) and not name.endswith('.tmp'))
+
+    def rollback(self, namespace: str, version: str = None) -> str:
+        """Make an earlier version of a namespace current again.
+
+        Versions newer than the restored one are deleted, so the next build follows it.
+        Other processes pick up the rollback within their reload_interval.
+
+        Args:
+            namespace: Namespace to roll back
+            version: Version to restore (optional, defaults to the one before the current version)
+
+        Returns:
+            The version now current
+        """
+        with self._write_lock(namespace):
+            lock_file = self._lock_namespace(namespace)
+            try:
+                current = self.current_version(namespace)
+                available = self.versions(namespace)
+                if version is None:
+                    earlier = [candidate for candidate in available if current is None or candidate < current]
+                    if not earlier:
+                        raise ValueError(f"No earlier version of FAISS namespace {namespace} to roll back to")
+                    version = earlier[-1]
+                elif version not in available:
+                    raise ValueError(f"Unknown version of FAISS namespace {namespace}: {version}")
+                state = self._empty_state()
+                self._load(namespace, state, version)
+                self._set_current(namespace, version)
+                with self._lock:
+                    self._namespaces[namespace] = state
+                for newer in available:
+                    if newer > version:
+                        shutil.rmtree(os.path.join(self._namespace_dir(namespace), newer), ignore_errors=True)
+            finally:
+                self._unlock_namespace(lock_file)
+        return version
+
+    def begin_build(self, namespace: str) -> str:
+        build = f"{namespace}{BUILD_SEPARATOR}{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._builds[build] = {'namespace': namespace, 'changes': [], 'ids': set(), 'dimension': None}
+        return build
+
+    def publish_build(self, build: str):
+        with self._lock:
+            entry = self._builds.pop(build, None)
+        if entry is None:
+            raise ValueError(f"Unknown FAISS build: {build}")
+        if not entry['changes']:
+            return
+        with self._writing(entry['namespace']) as state:
+            self._publish(entry['namespace'], state, entry['changes'])
+
+    def abort_build(self, build: str):
+        with self._lock:
+            self._builds.pop(build, None)
+
+    def _build(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the open build a write is addressed to, or None for a write to a namespace."""
+        if BUILD_SEPARATOR not in name:
+            return None
+        with self._lock:
+            entry = self._builds.get(name)
+        if entry is None:
+            raise ValueError(f"Unknown FAISS build: {name}")
+        return entry
+
+    def upsert(self, namespace: str, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        if not ids:
+            return 0
+        # A later occurrence of an ID in the same batch wins
+        latest = {chunk_id: position for position, chunk_id in enumerate(ids)}
+        positions = list(latest.values())
+        matrix = np.asarray(vectors, dtype='float32')[positions]
+        faiss.normalize_L2(matrix)
+
+        change = {
+            'op': 'upsert',
+            'ids': [ids[p] for p in positions],
+            'texts': [texts[p] for p in positions],
+            'metadatas': [metadatas[p] for p in positions],
+            'vectors': matrix
+        }
+
+        build = self._build(namespace)
+        if build is not None:
+            # Staged until the build is published
+            state = self._fresh_state(build['namespace'])
+            dimension = build['dimension'] or (state['index'].d if state['index'] is not None else None)
+            if dimension is not None and dimension != matrix.shape[1]:
+                raise ValueError(f"Namespace {build['namespace']} holds {dimension}-dimensional vectors, got {matrix.shape[1]}")
+            with self._lock:
+                build['dimension'] = matrix.shape[1]
+                build['changes'].append(change)
+                build['ids'].update(change['ids'])
+            return len(positions)
+
+        with self._writing(namespace) as state:
+            with state['lock']:
+                if state['index'] is not None and state['index'].d != matrix.shape[1]:
+                    raise ValueError(f"Namespace {namespace} holds {state['index'].d}-dimensional vectors, got {matrix.shape[1]}")
+                self._apply(namespace, state, change)
+                self._log(namespace, state, change)
+        return len(positions)
+
+    def search(self, namespace: str, vector: List[float], k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        state = self._fresh_state(namespace)
+        query = np.asarray([vector], dtype='float32')
+        faiss.normalize_L2(query)
+        with state['lock']:
+            index = state['index']
+            if index is None or index.ntotal == 0:
+                return []
+            selector = None
+            if filter:
+                # Only the chunks the metadata indexes allow are checked against the whole filter
+                candidates = self._filter_candidates(state, filter)
+                pool = state['ids'].items() if candidates is None else [(int_id, state['ids'][int_id]) for int_id in candidates if int_id in state['ids']]
+                allowed = [int_id for int_id, chunk_id in pool if matches_filter(state['docs'][chunk_id]['metadata'], filter)]
+                if not allowed:
+                    return []
+                selector = faiss.IDSelectorBatch(np.array(allowed, dtype='int64'))
+
+            quantized = state['quantized']
+            if quantized is None:
+                params = faiss.SearchParameters(sel=selector) if selector is not None else None
+                scores, int_ids = index.search(query, min(k, index.ntotal), params=params)
+                ranked = zip(scores[0].tolist(), int_ids[0].tolist())
+            else:
+                ranked = self._quantized_search(state, query, k, selector)
+
+            results = []
+            for score, int_id in ranked:
+                chunk_id = state['ids'].get(int_id)
+                if int_id == -1 or chunk_id is None:
+                    continue
+                doc = state['docs'][chunk_id]
+                results.append({'id': chunk_id, 'content': doc['text'], 'metadata': doc['metadata'], 'score': score})
+            return results
+
+    def _quantized_search(self, state: Dict[str, Any], query: np.ndarray, k: int, selector: Any) -> List[tuple]:
+        """Search the compressed index and re-rank its top candidates with the exact vectors."""
+        quantized = state['quantized']
+        if self.quantization == 'ivfpq':
+            params = faiss.SearchParametersIVF()
+            params.nprobe = self.nprobe
+        else:
+            params = faiss.SearchParameters()
+        if selector is not None:
+            params.sel = selector
+        candidates = min(k * max(self.rerank_factor, 1), quantized.ntotal)
+        scores, int_ids = quantized.search(query, candidates, params=params)
+        ranked = [(score, int_id) for score, int_id in zip(scores[0].tolist(), int_ids[0].tolist()) if int_id != -1]
+        if self.rerank_factor:
+            exact = state['index']
+            ranked = [(float(query[0] @ exact.reconstruct(int_id)), int_id) for _, int_id in ranked]
+            ranked.sort(reverse=True)
+        return ranked[:k]
+
+    def memory_report(self, namespace: str) -> Dict[str, Any]:
+        """Report how much memory the vectors of a namespace take.
+
+        Args:
+            namespace: Namespace to inspect
+
+        Returns:
+            Dictionary with vector count, dimension, quantization, exact and compressed index bytes,
+            and the bytes per vector searches keep in memory
+        """
+        state = self._fresh_state(namespace)
+        with state['lock']:
+            index = state['index']
+            if index is None:
+                return {'vectors': 0, 'dimension': 0, 'quantization': self.quantization, 'exact_bytes': 0, 'quantized_bytes': 0, 'resident_bytes_per_vector': 0.0}
+            exact_bytes = index.ntotal * index.d * 4
+            quantized_bytes = faiss.serialize_index(state['quantized']).nbytes if state['quantized'] is not None else 0
+            # A memory-mapped exact index is paged in on demand rather than held in memory
+            resident = quantized_bytes if quantized_bytes and not state['owned'] else exact_bytes + quantized_bytes
+            return {
+                'vectors': index.ntotal,
+                'dimension': index.d,
+                'quantization': self.quantization if state['quantized'] is not None else 'none',
+                'exact_bytes': exact_bytes,
+                'quantized_bytes': quantized_bytes,
+                'resident_bytes_per_vector': resident / index.ntotal if index.ntotal else 0.0
+            }
+
+    def delete(self, namespace: str, ids: List[str]) -> int:
+        build = self._build(namespace)
+        if build is not None:
+            state = self._fresh_state(build['namespace'])
+            with self._lock:
+                present = list(dict.fromkeys(chunk_id for chunk_id in ids if chunk_id in state['docs'] or chunk_id in build['ids']))
+                if present:
+                    build['changes'].append({'op': 'delete', 'ids': present})
+                    build['ids'].difference_update(present)
+            return len(present)
+
+        with self._writing(namespace) as state:
+            with state['lock']:
+                present = list(dict.fromkeys(chunk_id for chunk_id in ids if chunk_id in state['docs']))
+                if not present:
+                    return 0
+                change = {'op': 'delete', 'ids': present}
+                self._apply(namespace, state, change)
+                self._log(namespace, state, change)
+        return len(present)
+
+    def fetch(self, namespace: str, ids: List[str], include_vectors: bool = False) -> Dict[str, Dict[str, Any]]:
+        state = self._fresh_state(namespace)
+        with state['lock']:
+            found = {}
+            for chunk_id in ids:
+                doc = state['docs'].get(chunk_id)
+                if doc is None:
+                    continue
+                found[chunk_id] = {'content': doc['text'], 'metadata': doc['metadata']}
+                if include_vectors:
+                    found[chunk_id]['vector'] = state['index'].reconstruct(faiss_id(chunk_id))
+            return found
+
+    def list_ids(self, namespace: str) -> List[str]:
+        state = self._fresh_state(namespace)
+        with state['lock']:
+            return list(state['docs'])
+
+    def namespaces(self) -> List[str]:
+        if not os.path.isdir(self.store_path):
+            return []
+        names = set(
+            name for name in os.listdir(self.store_path)
+            if any(os.path.exists(os.path.join(self._namespace_dir(name), filename)) for filename in (VERSION_POINTER_FILE, INDEX_FILE, CHANGE_LOG_FILE, LEGACY_INDEX_FILE))
+        )
+        with self._lock:
+            names.update(name for name, state in self._namespaces.items() if state['docs'])
+        return sorted(names)
@@ -0,0 +1,73 @@
+import math
+from datetime import datetime
+from typing import Dict, Any
+from retrieval.record_ids import record_key
+
+def financial_document(item: Dict[str, Any], data_type: str) -> Dict[str, Any]:
+    """Format a financial data item as a document for the vector store.
+
+    Args:
+        item: Financial data item (news article, earnings report, stock snapshot or sentiment reading)
+        data_type: Type of data (e.g., 'news', 'earnings', 'stock_data')
+
+    Returns:
+        Dictionary with the document 'content', its 'metadata' and the record 'key'
+    """
+    if data_type == 'news':
+        # Format news articles
+        content = f"Title: {item.get('title', '')}\n\nSummary: {item.get('summary', '')}\n\nSource: {item.get('source', '')}"
+        if item.get('body'):
+            # Full article text fetched by the article pipeline
+            content += f"\n\n{item['body']}"
+        metadata = {
+            'type': 'news',
+            'source': item.get('source', ''),
+            'link': item.get('link', ''),
+            'title': item.get('title', ''),
+            'symbols': item.get('tickers', []),
+            'keywords': item.get('matched_keywords', [])
+        }
+    elif data_type == 'earnings':
+        # Format earnings data
+        surprise_pct = item.get('surprise_pct', 0.0)
+        if surprise_pct is None or math.isnan(surprise_pct):
+            surprise_pct = 0.0  # Replace NaN with 0.0 or another default value
+        content = f"Company: {item.get('name', item.get('symbol', ''))}\n\nSymbol: {item.get('symbol', '')}\n\nEPS Estimate: {item.get('eps_estimate', '')}\n\nReported EPS: {item.get('reported_eps', '')}\n\nSurprise: {surprise_pct}%"
+        metadata = {
+            'type': 'earnings',
+            'symbol': item.get('symbol', ''),
+            'date': item.get('date', ''),
+            'surprise_pct': float(surprise_pct)
+        }
+    elif data_type == 'stock_data':
+        # Format stock data
+        change_pct = item.get('change_pct', 0.0)
+        if change_pct is None or math.isnan(change_pct):
+            change_pct = 0.0  # Replace NaN with 0.0 or another default value
+        content = f"Company: {item.get('name', item.get('symbol', ''))}\n\nSymbol: {item.get('symbol', '')}\n\nPrice: {item.get('price', '')}\n\nChange: {change_pct}%\n\nVolume: {item.get('volume', '')}\n\nMarket Cap: {item.get('market_cap', '')}"
+        metadata = {
+            'type': 'stock_data',
+            'symbol': item.get('symbol', ''),
+            'date': item.get('date', ''),
+            'country': item.get('country', ''),
+            'change_pct': float(change_pct)
+        }
+    elif data_type == 'sentiment':
+        # Format sentiment data; readings are dated when they are indexed unless they carry a date
+        content = f"Overall Sentiment: {item.get('overall_sentiment', '')}\n\nSentiment Score: {item.get('sentiment_score', '')}\n\nKey Indicators: {', '.join([ind.get('headline', '') for ind in item.get('key_indicators', [])])}"
+        metadata = {
+            'type': 'sentiment',
+            'date': item.get('date') or datetime.now().strftime('%Y-%m-%d'),
+            'sentiment': item.get('overall_sentiment', ''),
+            'score': item.get('sentiment_score', None)
+        }
+    else:
+        # Generic format for other data types
+        content = str(item)
+        metadata = {'type': data_type}
+
+    return {
+        'content': content,
+        'metadata': metadata,
+        'key': record_key(data_type, metadata)
+    }
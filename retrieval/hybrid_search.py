@@ -0,0 +1,46 @@
+import heapq
+from typing import List, Dict, Any, Optional
+import numpy as np
+from retrieval.vector_backend import VectorBackend, matches_filter
+from retrieval.lexical_index import BM25Index
+
+def hybrid_search(backend: VectorBackend, namespace: str, query: str, query_vector: List[float], lexical: BM25Index, k: int, lexical_weight: float = 0.3, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Fuse vector and BM25 candidates into one ranking.
+
+    Each candidate's cosine similarity is raised towards 1 in proportion to its BM25
+    score relative to the best lexical match, so lexical evidence reorders results
+    without ever lowering a semantic match below its cosine score.
+
+    Args:
+        backend: Vector store backend
+        namespace: Namespace to search
+        query: Query text
+        query_vector: Embedding of the query
+        lexical: BM25 index of the namespace
+        k: Number of results
+        lexical_weight: Share of the gap to 1 that the best lexical match closes
+        filter: Metadata filter (optional)
+
+    Returns:
+        Best k matches with id, content, metadata and fused score
+    """
+    candidates = {match['id']: match for match in backend.search(namespace, query_vector, k=k * 3, filter=filter)}
+
+    # Lexical hits the vector search missed still get an exact cosine score
+    missing = [chunk for chunk, _ in lexical.search(query, k * 3) if chunk not in candidates]
+    if missing:
+        query_array = np.asarray(query_vector, dtype='float32')
+        query_array /= np.linalg.norm(query_array) or 1.0
+        for chunk, doc in backend.fetch(namespace, missing, include_vectors=True).items():
+            if filter and not matches_filter(doc['metadata'], filter):
+                continue
+            vector = np.asarray(doc['vector'], dtype='float32')
+            cosine = float(query_array @ vector / (np.linalg.norm(vector) or 1.0))
+            candidates[chunk] = {'id': chunk, 'content': doc['content'], 'metadata': doc['metadata'], 'score': cosine}
+
+    lexical_scores = lexical.score(query, candidates)
+    best = max(lexical_scores.values(), default=0.0)
+    for chunk, match in candidates.items():
+        if best > 0:
+            match['score'] += lexical_weight * (lexical_scores[chunk] / best) * (1 - match['score'])
+    return heapq.nlargest(k, candidates.values(), key=lambda match: match['score'])
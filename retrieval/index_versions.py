@@ -0,0 +1,52 @@
+"""List the stored versions of local FAISS namespaces, or roll one back.
+
+Every re-index publishes a new version of a namespace; the newest
+FAISS_KEEP_VERSIONS are kept on disk. Rolling back makes an earlier version
+current for every process using the store, which picks it up within
+FAISS_RELOAD_INTERVAL seconds. Sharded stores (VECTOR_BACKEND=sharded) list the
+versions every shard keeps and roll all shards back together. Run from the
+repository root:
+
+    python -m retrieval.index_versions
+    python -m retrieval.index_versions --namespace news --rollback
+    python -m retrieval.index_versions --namespace news --rollback v0000000012
+"""
+import os
+import argparse
+from retrieval.vector_backend import create_vector_backend
+from retrieval.embeddings import index_model
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--namespace', action='append', help='Namespace to show or roll back (default: all)')
+    parser.add_argument('--rollback', nargs='?', const='previous', help='Restore a version (default: the one before the current version)')
+    parser.add_argument('--backend', choices=['faiss', 'sharded'], help='Local store layout (default: sharded when VECTOR_BACKEND=sharded, else faiss)')
+    args = parser.parse_args()
+
+    name = args.backend or ('sharded' if os.getenv('VECTOR_BACKEND', 'faiss').lower() == 'sharded' else 'faiss')
+    # Same index directory the retriever uses for the configured embedding model
+    backend = create_vector_backend(name, model=index_model())
+    try:
+        namespaces = args.namespace or backend.namespaces()
+        if args.rollback:
+            if len(namespaces) != 1:
+                parser.error('--rollback needs exactly one --namespace')
+            try:
+                version = backend.rollback(namespaces[0], None if args.rollback == 'previous' else args.rollback)
+            except ValueError as e:
+                print(f"Error rolling back {namespaces[0]}: {e}")
+                return
+            print(f"{namespaces[0]}: rolled back to {version}")
+            return
+
+        for namespace in namespaces:
+            current = backend.current_version(namespace)
+            versions = ', '.join(f"{version}*" if version == current else version for version in backend.versions(namespace))
+            print(f"{namespace}: {versions or 'not versioned yet'}")
+    finally:
+        if name == 'sharded':
+            # Stop the shard processes
+            backend.close()
+
+if __name__ == "__main__":
+    main()
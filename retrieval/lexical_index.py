@@ -0,0 +1,165 @@
+import math
+import heapq
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Set, Tuple
+from data_ingestion.dedup import tokenize
+
+# Metadata fields indexed alongside the chunk text
+METADATA_FIELDS = ['title', 'symbol', 'symbols', 'keywords']
+
+class BM25Index:
+    """In-memory BM25 inverted index over chunk text and metadata, updated incrementally.
+
+    Besides term postings it keeps a symbol -> chunks map, so chunks about a ticker
+    can be listed directly without scoring.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_symbols: Dict[str, Set[str]] = {}
+        self.symbols: Dict[str, Set[str]] = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, doc_id: str, text: str, metadata: Dict[str, Any]):
+        """Index a chunk, replacing any earlier version with the same ID.
+
+        Args:
+            doc_id: Chunk ID
+            text: Chunk text
+            metadata: Chunk metadata
+        """
+        parts = [text]
+        for field in METADATA_FIELDS:
+            value = metadata.get(field)
+            if isinstance(value, list):
+                parts.extend(str(item) for item in value)
+            elif value:
+                parts.append(str(value))
+        terms = Counter(tokenize(' '.join(parts)))
+        symbols = {str(s).lower() for s in ([metadata.get('symbol')] + list(metadata.get('symbols') or [])) if s}
+
+        with self._lock:
+            self.remove(doc_id)
+            self.doc_terms[doc_id] = terms
+            self.doc_lengths[doc_id] = sum(terms.values())
+            self.total_length += self.doc_lengths[doc_id]
+            for term, count in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+            self.doc_symbols[doc_id] = symbols
+            for symbol in symbols:
+                self.symbols.setdefault(symbol, set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        """Remove a chunk from the index if present."""
+        with self._lock:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            for symbol in self.doc_symbols.pop(doc_id, ()):
+                docs = self.symbols.get(symbol)
+                if docs is not None:
+                    docs.discard(doc_id)
+                    if not docs:
+                        del self.symbols[symbol]
+
+    def _idf(self, term: str) -> float:
+        """Inverse document frequency of a term. Must be called with the lock held."""
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_terms) - df + 0.5) / (df + 0.5))
+
+    def _term_score(self, term: str, doc_id: str, idf: float, average_length: float) -> float:
+        """BM25 contribution of one term to one chunk. Must be called with the lock held."""
+        tf = self.postings[term].get(doc_id, 0)
+        if not tf:
+            return 0.0
+        length = self.doc_lengths[doc_id]
+        return idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average_length))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Rank chunks by BM25 score for a query.
+
+        Args:
+            query: Query text
+            k: Number of chunks to return
+
+        Returns:
+            List of (chunk ID, score), best first
+        """
+        with self._lock:
+            if not self.doc_terms:
+                return []
+            average_length = self.total_length / len(self.doc_terms)
+            scores = {}
+            for term in set(tokenize(query)):
+                if term not in self.postings:
+                    continue
+                idf = self._idf(term)
+                for doc_id in self.postings[term]:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + self._term_score(term, doc_id, idf, average_length)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def score(self, query: str, doc_ids: Iterable[str]) -> Dict[str, float]:
+        """Compute the BM25 score of specific chunks for a query.
+
+        Args:
+            query: Query text
+            doc_ids: Chunk IDs
+
+        Returns:
+            Dictionary mapping each chunk ID to its score (0 when unknown)
+        """
+        with self._lock:
+            scores = {doc_id: 0.0 for doc_id in doc_ids}
+            if not self.doc_terms:
+                return scores
+            average_length = self.total_length / len(self.doc_terms)
+            for term in set(tokenize(query)):
+                if term not in self.postings:
+                    continue
+                idf = self._idf(term)
+                for doc_id in scores:
+                    if doc_id in self.doc_terms:
+                        scores[doc_id] += self._term_score(term, doc_id, idf, average_length)
+        return scores
+
+    def known_symbols(self, query: str) -> Set[str]:
+        """Get the indexed symbols that appear verbatim in a query (e.g. 'TSM', '005930.KS')."""
+        with self._lock:
+            return {token for token in tokenize(query) if token in self.symbols}
+
+    def symbol_docs(self, symbols: Iterable[str]) -> List[str]:
+        """List the chunks tagged with any of the given symbols.
+
+        Args:
+            symbols: Ticker symbols (any case)
+
+        Returns:
+            Chunk IDs
+        """
+        with self._lock:
+            found = set()
+            for symbol in symbols:
+                found.update(self.symbols.get(symbol.lower(), ()))
+            return list(found)
@@ -0,0 +1,126 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any, Tuple
+import numpy as np
+
+try:
+    from fastembed import TextEmbedding
+    HAS_FASTEMBED = True
+except ImportError:
+    HAS_FASTEMBED = False
+
+# Quantized ONNX build of a small English sentence model (384 dimensions)
+DEFAULT_MODEL = 'BAAI/bge-small-en-v1.5'
+
+class LocalEmbeddings:
+    """Sentence embeddings computed on the CPU with a quantized ONNX model.
+
+    Document batches are encoded directly. Queries arriving from concurrent requests
+    are collected for up to max_wait_ms and encoded together, so a burst of queries
+    costs one model call instead of one per query.
+    """
+
+    def __init__(self, model: str = None, batch_size: int = None, max_wait_ms: float = None, threads: int = None, cache_dir: str = None):
+        """Initialize the local embedding model.
+
+        Args:
+            model: fastembed model name (optional, can use LOCAL_EMBEDDING_MODEL from env)
+            batch_size: Maximum texts per model call (optional, can use from env)
+            max_wait_ms: How long a query waits for others to share its model call (optional, can use from env)
+            threads: ONNX Runtime intra-op threads (optional, can use from env; defaults to all cores)
+            cache_dir: Directory the model files are downloaded to (optional, can use from env)
+        """
+        if not HAS_FASTEMBED:
+            raise ValueError("fastembed must be installed to use local embeddings (pip install fastembed).")
+
+        self.model = model or os.getenv('LOCAL_EMBEDDING_MODEL', DEFAULT_MODEL)
+        self.batch_size = batch_size or int(os.getenv('LOCAL_EMBEDDING_BATCH_SIZE', 64))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv('LOCAL_EMBEDDING_MAX_WAIT_MS', 5))) / 1000
+        threads = threads or (int(os.getenv('LOCAL_EMBEDDING_THREADS')) if os.getenv('LOCAL_EMBEDDING_THREADS') else None)
+        cache_dir = cache_dir or os.getenv('LOCAL_EMBEDDING_CACHE_DIR')
+
+        self._model = TextEmbedding(model_name=self.model, threads=threads, cache_dir=cache_dir)
+        self.dimension = len(self._encode(['dimension probe'])[0])
+
+        self._queries = queue.Queue()
+        self._worker = threading.Thread(target=self._batch_queries, name='local-embeddings', daemon=True)
+        self._worker.start()
+
+    def _encode(self, texts: List[str]) -> List[np.ndarray]:
+        """Run the model over texts in batches of at most batch_size."""
+        return list(self._model.embed(texts, batch_size=self.batch_size))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per text
+        """
+        return [vector.tolist() for vector in self._encode(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, sharing the model call with queries arriving at the same time.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Query embedding
+        """
+        future = Future()
+        self._queries.put((text, future))
+        return future.result()
+
+    def _batch_queries(self):
+        """Collect queued queries into batches and encode them (runs on the worker thread)."""
+        while True:
+            batch: List[Tuple[str, Future]] = [self._queries.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queries.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self._encode([text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector.tolist())
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def benchmark(self, num_texts: int = 256) -> Dict[str, Any]:
+        """Measure document embedding throughput on records shaped like the indexed data.
+
+        Args:
+            num_texts: Number of texts to embed
+
+        Returns:
+            Dictionary with the model, dimension, number of texts, seconds and embeddings per second
+        """
+        texts = []
+        for i in range(num_texts):
+            if i % 2:
+                texts.append(f"Company: Example Tech {i}\n\nSymbol: EX{i}\n\nPrice: {100 + i}.25\n\nChange: {i % 7 - 3}.4%\n\nVolume: {i * 1000}\n\nMarket Cap: {i * 10 ** 9}")
+            else:
+                texts.append(f"Title: Asia chip makers rally as demand outlook improves ({i})\n\nSummary: Semiconductor shares in Taiwan and South Korea rose after suppliers raised guidance.\n\nSource: Example News")
+        start = time.perf_counter()
+        self._encode(texts)
+        elapsed = time.perf_counter() - start
+        return {
+            'model': self.model,
+            'dimension': self.dimension,
+            'texts': num_texts,
+            'seconds': elapsed,
+            'embeddings_per_sec': num_texts / elapsed if elapsed else 0.0
+        }
@@ -0,0 +1,76 @@
+import os
+from typing import List, Dict, Any, Optional
+from pinecone import Pinecone
+from retrieval.vector_backend import VectorBackend
+
+# Metadata key holding the chunk text, as written by LangChain's PineconeVectorStore
+TEXT_KEY = 'text'
+UPSERT_BATCH_SIZE = 100
+
+class PineconeBackend(VectorBackend):
+    """Vector store backed by a hosted Pinecone index.
+
+    Chunk texts are kept under the 'text' metadata key so indexes written by the
+    LangChain integration stay readable.
+    """
+
+    def __init__(self, api_key: str = None, environment: str = None, index_name: str = None):
+        """Initialize the Pinecone backend.
+
+        Args:
+            api_key: Pinecone API key (optional, can use from env)
+            environment: Pinecone environment, e.g. 'gcp-starter' (optional, can use from env)
+            index_name: Name of the Pinecone index (optional, can use from env)
+        """
+        self.api_key = api_key or os.getenv('PINECONE_API_KEY')
+        self.environment = environment or os.getenv('PINECONE_ENVIRONMENT')
+        self.index_name = index_name or os.getenv('PINECONE_INDEX_NAME')
+
+        if not self.api_key or not self.environment or not self.index_name:
+            raise ValueError("Pinecone API key, environment and index name must be provided or set as environment variables.")
+
+        self.client = Pinecone(api_key=self.api_key, environment=self.environment)
+        self.index = self.client.Index(self.index_name)
+
+    def upsert(self, namespace: str, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        records = []
+        for chunk_id, vector, text, metadata in zip(ids, vectors, texts, metadatas):
+            # Pinecone rejects null metadata values
+            metadata = {key: value for key, value in metadata.items() if value is not None}
+            metadata[TEXT_KEY] = text
+            records.append({'id': chunk_id, 'values': list(vector), 'metadata': metadata})
+        for start in range(0, len(records), UPSERT_BATCH_SIZE):
+            self.index.upsert(vectors=records[start:start + UPSERT_BATCH_SIZE], namespace=namespace)
+        return len(records)
+
+    def search(self, namespace: str, vector: List[float], k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        response = self.index.query(vector=list(vector), top_k=k, namespace=namespace, filter=filter or None, include_metadata=True)
+        results = []
+        for match in response['matches']:
+            metadata = dict(match.get('metadata') or {})
+            text = metadata.pop(TEXT_KEY, '')
+            results.append({'id': match['id'], 'content': text, 'metadata': metadata, 'score': float(match['score'])})
+        return results
+
+    def delete(self, namespace: str, ids: List[str]) -> int:
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            self.index.delete(ids=ids[start:start + UPSERT_BATCH_SIZE], namespace=namespace)
+        return len(ids)
+
+    def fetch(self, namespace: str, ids: List[str], include_vectors: bool = False) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            response = self.index.fetch(ids=ids[start:start + UPSERT_BATCH_SIZE], namespace=namespace)
+            for chunk_id, vector in response.vectors.items():
+                metadata = dict(vector.metadata or {})
+                found[chunk_id] = {'content': metadata.pop(TEXT_KEY, ''), 'metadata': metadata}
+                if include_vectors:
+                    found[chunk_id]['vector'] = list(vector.values)
+        return found
+
+    def list_ids(self, namespace: str) -> List[str]:
+        return [chunk_id for page in self.index.list(namespace=namespace) for chunk_id in page]
+
+    def namespaces(self) -> List[str]:
+        stats = self.index.describe_index_stats()
+        return sorted(name for name, summary in stats['namespaces'].items() if summary['vector_count'])
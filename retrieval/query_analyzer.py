@@ -0,0 +1,184 @@
+import re
+import calendar
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Tuple
+from data_ingestion.keyword_matcher import get_keyword_matcher
+from data_ingestion.source_registry import SourceRegistry, get_source_registry
+
+# Intent keywords and the namespaces that can answer each intent
+INTENT_KEYWORDS = {
+    'earnings': ['earnings', 'eps', 'surprise', 'surprises', 'guidance', 'quarterly', 'results', 'report', 'reported', 'reports', 'beat', 'miss', 'estimate', 'estimates'],
+    'price': ['price', 'prices', 'stock', 'stocks', 'shares', 'performance', 'performing', 'change', 'volume', 'market cap', 'trading', 'rally', 'gain', 'gains', 'drop', 'fell', 'rose', 'allocation'],
+    'sentiment': ['sentiment', 'fear', 'greed', 'mood', 'outlook', 'bullish', 'bearish'],
+    'risk': ['risk', 'risks', 'exposure', 'volatility', 'downside'],
+    'news': ['news', 'headline', 'headlines', 'announced', 'announcement', 'why', 'happened'],
+    'filings': ['filing', 'filings', 'annual report', '10-k', '20-f', 'prospectus', 'disclosure', 'disclosures']
+}
+INTENT_NAMESPACES = {
+    'earnings': ['earnings', 'news', 'filings'],
+    'price': ['stock_data', 'news'],
+    'sentiment': ['sentiment', 'news'],
+    'risk': ['stock_data', 'sentiment', 'earnings', 'news', 'filings'],
+    'news': ['news'],
+    'filings': ['filings']
+}
+# Namespaces that are actually populated by the indexing job, searched when no intent is recognized
+DEFAULT_NAMESPACES = ['news', 'earnings', 'stock_data', 'sentiment', 'filings']
+SYMBOL_NAMESPACES = ['stock_data', 'earnings', 'filings']
+# Namespaces whose chunks list the tickers they mention in 'symbols' metadata
+TAGGED_NAMESPACES = ['news']
+
+EXCHANGE_SYMBOL = re.compile(r'\b\d{4,6}\.[A-Z]{1,2}\b')
+ISO_DATE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+RELATIVE_SPAN = re.compile(r'\b(?:past|last|previous)\s+(\d+)\s+(day|week|month)s?\b', re.IGNORECASE)
+QUARTER = re.compile(r'\bQ([1-4])\s*(?:FY)?\s*(\d{4})\b', re.IGNORECASE)
+MONTH = re.compile(r'\b(' + '|'.join(calendar.month_name[1:]) + r')(?:\s+(\d{4}))?\b', re.IGNORECASE)
+
+def _day_start(day: datetime) -> datetime:
+    return day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class QueryAnalyzer:
+    """Extract tickers, company names, a date range and intent from a user query.
+
+    The result says which namespaces are worth searching and which metadata filters
+    can be pushed down to the vector store for each of them.
+    """
+
+    def __init__(self, registry: SourceRegistry = None):
+        """Initialize the query analyzer.
+
+        Args:
+            registry: Source registry providing tickers and company aliases (optional, defaults to the shared registry)
+        """
+        self.registry = registry or get_source_registry()
+        intent_keywords = {keyword: intent for intent, keywords in INTENT_KEYWORDS.items() for keyword in keywords}
+        self.intent_matcher = get_keyword_matcher(intent_keywords)
+
+    def analyze(self, query: str, now: datetime = None) -> Dict[str, Any]:
+        """Analyze a query.
+
+        Args:
+            query: User query
+            now: Reference time for relative dates (defaults to now, UTC)
+
+        Returns:
+            Dictionary with tickers, companies, date_range (start/end Unix times and label, or
+            None), intents, the namespaces to search and a metadata filter per namespace
+        """
+        now = now or datetime.now(timezone.utc)
+        ticker_matcher = get_keyword_matcher(self.registry.keywords)
+        tickers = set()
+        companies = set()
+        for _, _, index in ticker_matcher.find(query):
+            ticker = ticker_matcher.labels[index]
+            if ticker:
+                tickers.add(ticker)
+                if ticker_matcher.keywords[index] != ticker:
+                    companies.add(ticker_matcher.keywords[index])
+        tickers.update(EXCHANGE_SYMBOL.findall(query))
+
+        intents = sorted({self.intent_matcher.labels[index] for _, _, index in self.intent_matcher.find(query)})
+        namespaces = []
+        for intent in intents:
+            for namespace in INTENT_NAMESPACES[intent]:
+                if namespace not in namespaces:
+                    namespaces.append(namespace)
+        if not namespaces:
+            namespaces = list(DEFAULT_NAMESPACES)
+        if tickers:
+            # Whatever the intent, the records of a named company can answer it
+            namespaces.extend(namespace for namespace in SYMBOL_NAMESPACES if namespace not in namespaces)
+
+        date_range = self.date_range(query, now)
+        filters = {}
+        for namespace in namespaces:
+            clauses = []
+            if tickers and namespace in SYMBOL_NAMESPACES:
+                clauses.append({'symbol': {'$in': sorted(tickers)}})
+            elif tickers and namespace in TAGGED_NAMESPACES:
+                clauses.append({'symbols': {'$in': sorted(tickers)}})
+            if date_range:
+                # Ranges end at the first instant after the period
+                clauses.append({'timestamp': {'$gte': date_range['start'], '$lt': date_range['end']}})
+            if clauses:
+                filters[namespace] = clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+        return {
+            'tickers': sorted(tickers),
+            'companies': sorted(companies),
+            'date_range': date_range,
+            'intents': intents,
+            'namespaces': namespaces,
+            'filters': filters
+        }
+
+    def date_range(self, query: str, now: datetime) -> Optional[Dict[str, Any]]:
+        """Find an explicit date range in a query.
+
+        'today' and 'current' mean the latest data and produce no range; ranges come
+        from ISO dates, 'yesterday', 'this/last week|month|year', 'past N days|weeks|months',
+        quarters ('Q2 2025') and month names ('May 2025').
+
+        Args:
+            query: User query
+            now: Reference time (timezone-aware)
+
+        Returns:
+            Dictionary with start/end Unix times (end exclusive) and the matched label, or None;
+            a date that does not exist (e.g. 2025-02-30) is ignored
+        """
+        try:
+            span = self._span(query, now)
+        except ValueError:
+            return None
+        if span is None:
+            return None
+        return {'start': span[0].timestamp(), 'end': span[1].timestamp(), 'label': span[2]}
+
+    def _span(self, query: str, now: datetime) -> Optional[Tuple[datetime, datetime, str]]:
+        """Find the (start, end, label) of the date range in a query; see date_range."""
+        lowered = query.lower()
+        today = _day_start(now)
+        span: Optional[Tuple[datetime, datetime, str]] = None
+
+        match = ISO_DATE.search(query)
+        if match:
+            day = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)), tzinfo=now.tzinfo)
+            span = (day, day + timedelta(days=1), match.group(0))
+        elif 'yesterday' in lowered:
+            span = (today - timedelta(days=1), today, 'yesterday')
+        elif RELATIVE_SPAN.search(query):
+            match = RELATIVE_SPAN.search(query)
+            count, unit = int(match.group(1)), match.group(2).lower()
+            days = {'day': 1, 'week': 7, 'month': 30}[unit] * count
+            span = (now - timedelta(days=days), now, match.group(0))
+        elif 'this week' in lowered:
+            span = (today - timedelta(days=today.weekday()), now, 'this week')
+        elif 'last week' in lowered:
+            monday = today - timedelta(days=today.weekday())
+            span = (monday - timedelta(days=7), monday, 'last week')
+        elif 'this month' in lowered:
+            span = (today.replace(day=1), now, 'this month')
+        elif 'last month' in lowered:
+            first = today.replace(day=1)
+            span = ((first - timedelta(days=1)).replace(day=1), first, 'last month')
+        elif 'this year' in lowered or 'year to date' in lowered or re.search(r'\bytd\b', lowered):
+            span = (today.replace(month=1, day=1), now, 'this year')
+        elif QUARTER.search(query):
+            match = QUARTER.search(query)
+            quarter, year = int(match.group(1)), int(match.group(2))
+            start = datetime(year, 3 * quarter - 2, 1, tzinfo=now.tzinfo)
+            end = datetime(year + 1, 1, 1, tzinfo=now.tzinfo) if quarter == 4 else datetime(year, 3 * quarter + 1, 1, tzinfo=now.tzinfo)
+            span = (start, end, match.group(0))
+        else:
+            # Month names only count with a year or a preposition, so 'may' the verb is ignored
+            for match in MONTH.finditer(query):
+                if not match.group(2) and not re.search(r'\b(in|during|since|for)\s+$', query[:match.start()], re.IGNORECASE):
+                    continue
+                month = list(calendar.month_name).index(match.group(1).capitalize())
+                year = int(match.group(2)) if match.group(2) else (now.year if month <= now.month else now.year - 1)
+                start = datetime(year, month, 1, tzinfo=now.tzinfo)
+                end = datetime(year + 1, 1, 1, tzinfo=now.tzinfo) if month == 12 else datetime(year, month + 1, 1, tzinfo=now.tzinfo)
+                span = (start, end, match.group(0))
+                break
+        return span
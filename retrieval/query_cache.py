@@ -0,0 +1,218 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+import numpy as np
+
+def analysis_scope(analysis: Dict[str, Any]) -> tuple:
+    """Get the part of a query analysis two queries must share to share an answer.
+
+    Paraphrases embed close together even when they name different tickers or
+    periods ('How did TSMC do?' vs 'How did Samsung do?'), so those must match exactly.
+    """
+    date_range = analysis.get('date_range')
+    return (
+        tuple(analysis.get('tickers', [])),
+        tuple(analysis.get('namespaces', [])),
+        (int(date_range['start']) // 3600, int(date_range['end']) // 3600) if date_range else None
+    )
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for exact lookups, ignoring case, punctuation and spacing."""
+    return ' '.join(re.findall(r'\w+', query.lower()))
+
+class QueryCache:
+    """Cache of /query responses looked up by query embedding similarity.
+
+    Recent query embeddings live in one normalized float32 matrix, so a lookup is a
+    single matrix-vector product over at most max_entries rows. An entry is reused when
+    its cosine similarity to the new query reaches the threshold, its analysis scope
+    matches, it is younger than the TTL and none of the namespaces it was answered
+    from has been re-indexed since.
+
+    Queries answered without an embedding (ticker and record lookups) are cached by
+    their normalized text instead, under the same scope and freshness rules. Every
+    entry can also be found by its text, so an exact repeat skips the matrix product.
+    """
+
+    def __init__(self, namespace_version: Callable[[str], int], max_entries: int = None, threshold: float = None, ttl: float = None, audio_dir: str = None):
+        """Initialize the query cache.
+
+        Args:
+            namespace_version: Function returning a namespace's current index version
+            max_entries: Maximum cached queries, least recently used evicted first (optional, can use from env)
+            threshold: Minimum cosine similarity for a hit (optional, can use from env)
+            ttl: Seconds an entry stays valid (optional, can use from env)
+            audio_dir: Directory cached audio files are kept in (optional, defaults to the temp directory)
+        """
+        self.namespace_version = namespace_version
+        self.max_entries = max_entries or int(os.getenv('QUERY_CACHE_SIZE', 512))
+        self.threshold = threshold if threshold is not None else float(os.getenv('QUERY_CACHE_THRESHOLD', 0.95))
+        self.ttl = ttl if ttl is not None else float(os.getenv('QUERY_CACHE_TTL', 3600))
+        self.audio_dir = audio_dir or tempfile.gettempdir()
+
+        self._matrix = None
+        self._valid = np.zeros(self.max_entries, dtype=bool)
+        self._rows: Dict[int, int] = {}
+        self._entries: Dict[int, Dict[str, Any]] = OrderedDict()
+        self._texts: Dict[tuple, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def versions(self, namespaces: List[str]) -> Dict[str, int]:
+        """Snapshot the index versions of namespaces before answering a query from them."""
+        return {namespace: self.namespace_version(namespace) for namespace in namespaces}
+
+    def _evict(self, entry_id: int):
+        """Drop an entry, its matrix row and its audio file. Must be called with the lock held."""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        if entry['slot'] is not None:
+            self._rows.pop(entry['slot'], None)
+            self._valid[entry['slot']] = False
+        if self._texts.get(entry['text_key']) == entry_id:
+            del self._texts[entry['text_key']]
+        if entry.get('audio_file'):
+            try:
+                os.remove(entry['audio_file'])
+            except OSError:
+                pass
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        """Check an entry's age and the versions of the namespaces it was answered from."""
+        if now - entry['created_at'] > self.ttl:
+            return False
+        return all(self.namespace_version(namespace) == version for namespace, version in entry['versions'].items())
+
+    def _hit(self, entry_id: int, scope: tuple, now: float) -> Optional[Dict[str, Any]]:
+        """Get a candidate entry if it is still valid for the scope, evicting it when stale. Must be called with the lock held."""
+        entry = self._entries[entry_id]
+        if entry['scope'] != scope:
+            return None
+        if not self._is_fresh(entry, now):
+            self._evict(entry_id)
+            self._stats['invalidations'] += 1
+            return None
+        self._entries.move_to_end(entry_id)
+        self._stats['hits'] += 1
+        return entry
+
+    def lookup(self, query_vector: Optional[List[float]], scope: tuple, query: str = None) -> Optional[Dict[str, Any]]:
+        """Find the cached response of the same or a near-duplicate query.
+
+        Args:
+            query_vector: Embedding of the query (None for queries answered without one)
+            scope: analysis_scope of the query
+            query: Query text, matched exactly after normalization (optional)
+
+        Returns:
+            Cached entry with answer, confidence, sources and audio_file (or None), or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            if query is not None:
+                entry_id = self._texts.get((normalize_query(query), scope))
+                entry = self._hit(entry_id, scope, now) if entry_id is not None else None
+                if entry is not None:
+                    return entry
+
+            if query_vector is not None:
+                vector = np.asarray(query_vector, dtype='float32')
+                vector = vector / (np.linalg.norm(vector) or 1.0)
+                if self._matrix is not None and self._matrix.shape[1] == vector.shape[0] and self._valid.any():
+                    scores = self._matrix @ vector
+                    scores[~self._valid] = -np.inf
+                    candidates = np.flatnonzero(scores >= self.threshold)
+                    for slot in candidates[np.argsort(-scores[candidates])]:
+                        entry = self._hit(self._rows[int(slot)], scope, now)
+                        if entry is not None:
+                            return entry
+            self._stats['misses'] += 1
+            return None
+
+    def store(self, query_vector: Optional[List[float]], scope: tuple, versions: Dict[str, int], response: Dict[str, Any], audio_file: str = None, query: str = None) -> Dict[str, Any]:
+        """Cache the response to a query.
+
+        Args:
+            query_vector: Embedding of the query (None for queries answered without one)
+            scope: analysis_scope of the query
+            versions: Namespace versions taken before the query was answered
+            response: Dictionary with answer, confidence and sources
+            audio_file: Spoken answer to keep a copy of (optional)
+            query: Query text, so exact repeats are found without an embedding (optional)
+
+        Returns:
+            The cached entry
+        """
+        text_key = (normalize_query(query), scope) if query is not None else None
+        entry = dict(response, scope=scope, versions=dict(versions), created_at=time.time(), audio_file=None, slot=None, text_key=text_key)
+        with self._lock:
+            if text_key in self._texts:
+                self._evict(self._texts[text_key])
+            if len(self._entries) >= self.max_entries:
+                self._evict(next(iter(self._entries)))
+            entry_id = self._next_id
+            self._next_id += 1
+
+            if query_vector is not None:
+                vector = np.asarray(query_vector, dtype='float32')
+                vector = vector / (np.linalg.norm(vector) or 1.0)
+                if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                    # First embedded query, or the embedding model changed: drop the old rows
+                    for old_id in [self._rows[slot] for slot in list(self._rows)]:
+                        self._evict(old_id)
+                    self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype='float32')
+                slot = int(np.flatnonzero(~self._valid)[0])
+                self._matrix[slot] = vector
+                self._valid[slot] = True
+                self._rows[slot] = entry_id
+                entry['slot'] = slot
+
+            self._entries[entry_id] = entry
+            if text_key is not None:
+                self._texts[text_key] = entry_id
+            if audio_file:
+                self._keep_audio(entry, audio_file)
+        return entry
+
+    def attach_audio(self, entry: Dict[str, Any], audio_file: str):
+        """Keep the spoken answer of an entry that was cached without audio."""
+        with self._lock:
+            if entry in self._entries.values() and not entry['audio_file']:
+                self._keep_audio(entry, audio_file)
+
+    def _keep_audio(self, entry: Dict[str, Any], audio_file: str):
+        """Copy an audio file next to the other cached audio. Must be called with the lock held."""
+        try:
+            target = os.path.join(self.audio_dir, f"query_cache_{uuid.uuid4().hex}.mp3")
+            shutil.copyfile(audio_file, target)
+            entry['audio_file'] = target
+        except OSError as e:
+            print(f"Error caching query audio: {e}")
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            for entry_id in list(self._entries):
+                self._evict(entry_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+
+        Returns:
+            Dictionary with hits, misses, invalidations, hit rate, entries and settings
+        """
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['threshold'] = self.threshold
+        stats['ttl'] = self.ttl
+        return stats
@@ -0,0 +1,46 @@
+import hashlib
+from typing import Dict, Any, Optional
+from data_ingestion.dedup import normalize_url
+
+def record_key(data_type: str, fields: Dict[str, Any]) -> Optional[str]:
+    """Get the natural key of a record, shared by every version of it.
+
+    Works on the raw item as well as on the metadata stored with its chunks.
+
+    Args:
+        data_type: Type of data (e.g., 'news', 'earnings', 'stock_data')
+        fields: Record or chunk metadata
+
+    Returns:
+        Record key, or None if the record type has no natural key
+    """
+    if data_type == 'news' and fields.get('link'):
+        return normalize_url(fields['link'])
+    if data_type in ('earnings', 'stock_data') and fields.get('symbol'):
+        return f"{fields['symbol']}:{fields['date']}" if fields.get('date') else fields['symbol']
+    if data_type == 'sentiment' and fields.get('date'):
+        return fields['date']
+    if data_type == 'filings' and fields.get('source'):
+        return normalize_url(fields['source']) if '://' in fields['source'] else fields['source']
+    return None
+
+def content_key(content: str) -> str:
+    """Key a record without a natural key by its content."""
+    return 'sha256:' + hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def chunk_prefix(namespace: str, key: str) -> str:
+    """Get the ID prefix shared by all chunks of a record."""
+    return f"{namespace}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}-"
+
+def chunk_id(namespace: str, key: str, index: int) -> str:
+    """Get the deterministic vector ID of a record chunk.
+
+    Args:
+        namespace: Namespace the record is indexed in
+        key: Record key (see record_key and content_key)
+        index: Position of the chunk within the record
+
+    Returns:
+        Vector ID, stable across runs so re-indexing overwrites instead of duplicating
+    """
+    return f"{chunk_prefix(namespace, key)}{index}"
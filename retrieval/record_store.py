@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Set
+from data_ingestion.dedup import tokenize
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'records.db')
+
+# Typed columns of each structured data type, after the key columns
+TABLES = {
+    'stock_data': {
+        'key': ['symbol', 'date'],
+        'columns': {'name': 'TEXT', 'country': 'TEXT', 'price': 'REAL', 'change_pct': 'REAL', 'volume': 'INTEGER', 'market_cap': 'INTEGER'},
+        'rank': 'ABS(change_pct)'
+    },
+    'earnings': {
+        'key': ['symbol', 'date'],
+        'columns': {'name': 'TEXT', 'eps_estimate': 'REAL', 'reported_eps': 'REAL', 'surprise_pct': 'REAL'},
+        'rank': 'ABS(surprise_pct)'
+    },
+    'sentiment': {
+        'key': ['date'],
+        'columns': {'overall_sentiment': 'TEXT', 'sentiment_score': 'REAL', 'key_indicators': 'TEXT'},
+        'rank': 'ABS(sentiment_score)'
+    }
+}
+
+def _number(value: Any) -> Optional[float]:
+    """Coerce a numeric field, mapping missing, non-numeric and NaN values to None."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+class RecordStore:
+    """SQLite tables of structured records (stock snapshots, earnings, sentiment) keyed by symbol and date.
+
+    These records are looked up by symbol and date instead of being embedded: an
+    index on the key answers 'what did TSM report' exactly, and the latest record
+    per symbol is one indexed query.
+    """
+
+    def __init__(self, db_path: str = None):
+        """Initialize the record store.
+
+        Args:
+            db_path: Path of the SQLite database (optional, can use RECORD_STORE_PATH from env)
+        """
+        self.db_path = db_path or os.getenv('RECORD_STORE_PATH', DEFAULT_DB_PATH)
+        self._lock = threading.Lock()
+        self._symbols: Optional[Set[str]] = None
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        statements = ['PRAGMA journal_mode=WAL;']
+        for table, spec in TABLES.items():
+            key_columns = ', '.join(f"{column} TEXT NOT NULL" for column in spec['key'])
+            value_columns = ', '.join(f"{column} {kind}" for column, kind in spec['columns'].items())
+            statements.append(f"CREATE TABLE IF NOT EXISTS {table} ({key_columns}, {value_columns}, indexed_at REAL NOT NULL, PRIMARY KEY ({', '.join(spec['key'])})) WITHOUT ROWID;")
+            statements.append(f"CREATE INDEX IF NOT EXISTS {table}_date ON {table} (date);")
+        self.conn.executescript('\n'.join(statements))
+        self.conn.commit()
+
+    def upsert(self, data_type: str, items: List[Dict[str, Any]]) -> int:
+        """Store structured records, replacing earlier versions with the same key.
+
+        Args:
+            data_type: 'stock_data', 'earnings' or 'sentiment'
+            items: Records as returned by the API agent or the analysis agent
+
+        Returns:
+            Number of records stored
+        """
+        spec = TABLES[data_type]
+        columns = spec['key'] + list(spec['columns']) + ['indexed_at']
+        now = time.time()
+        rows = []
+        for item in items:
+            row = dict(item)
+            if data_type == 'sentiment':
+                row['date'] = item.get('date') or time.strftime('%Y-%m-%d')
+                row['key_indicators'] = json.dumps([indicator.get('headline', '') for indicator in item.get('key_indicators', [])])
+            if not all(row.get(column) for column in spec['key']):
+                continue
+            values = []
+            for column in columns:
+                if column == 'indexed_at':
+                    values.append(now)
+                elif column in spec['key']:
+                    values.append(str(row[column])[:10] if column == 'date' else str(row[column]).upper())
+                elif spec['columns'][column] == 'TEXT':
+                    values.append(row.get(column))
+                else:
+                    number = _number(row.get(column))
+                    values.append(int(number) if number is not None and spec['columns'][column] == 'INTEGER' else number)
+            rows.append(values)
+
+        with self._lock:
+            self.conn.executemany(f"INSERT OR REPLACE INTO {data_type} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+            self.conn.commit()
+            self._symbols = None
+        return len(rows)
+
+    def query(self, data_type: str, symbols: Iterable[str] = None, start: str = None, end: str = None, latest: bool = True, limit: int = 10) -> List[Dict[str, Any]]:
+        """Look up structured records.
+
+        Args:
+            data_type: 'stock_data', 'earnings' or 'sentiment'
+            symbols: Only these symbols, any case (optional)
+            start: Earliest date, YYYY-MM-DD inclusive (optional)
+            end: Latest date, YYYY-MM-DD exclusive (optional)
+            latest: Keep only the most recent record per symbol
+            limit: Maximum records
+
+        Returns:
+            Records as dictionaries, newest first; without symbols the largest moves
+            (price change, earnings surprise) come first
+        """
+        spec = TABLES[data_type]
+        conditions, params = [], []
+        symbols = sorted({symbol.upper() for symbol in symbols or []})
+        if symbols and 'symbol' in spec['key']:
+            conditions.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params.extend(symbols)
+        if start:
+            conditions.append("date >= ?")
+            params.append(start)
+        if end:
+            conditions.append("date < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        if latest and 'symbol' in spec['key']:
+            sql = f"""
+                SELECT * FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS version FROM {data_type} {where}
+                ) WHERE version = 1
+            """
+        else:
+            sql = f"SELECT * FROM {data_type} {where}"
+        order = "date DESC" if symbols or 'symbol' not in spec['key'] else f"{spec['rank']} DESC, date DESC"
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        records = []
+        for row in rows:
+            record = {key: row[key] for key in row.keys() if key != 'version'}
+            if data_type == 'sentiment':
+                record['key_indicators'] = [{'headline': headline} for headline in json.loads(record['key_indicators'] or '[]')]
+            records.append(record)
+        return records
+
+    def count(self, data_type: str) -> int:
+        """Count the records of a data type."""
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {data_type}").fetchone()[0]
+
+    def known_symbols(self, query: str) -> Set[str]:
+        """Get the stored symbols that appear verbatim in a query (e.g. 'TSM', '005930.KS')."""
+        with self._lock:
+            if self._symbols is None:
+                self._symbols = set()
+                for table, spec in TABLES.items():
+                    if 'symbol' in spec['key']:
+                        self._symbols.update(row[0].lower() for row in self.conn.execute(f"SELECT DISTINCT symbol FROM {table}"))
+            symbols = self._symbols
+        return {token.upper() for token in tokenize(query) if token in symbols}
+
+    def prune(self, data_type: str, max_age_days: float = 0, keep_latest: int = 0, dry_run: bool = False) -> int:
+        """Delete records older than an age, or beyond the latest N per symbol.
+
+        Args:
+            data_type: 'stock_data', 'earnings' or 'sentiment'
+            max_age_days: Delete records dated more than this many days ago (0 keeps all)
+            keep_latest: Keep only this many most recent records per symbol (0 keeps all)
+            dry_run: Only count the records that would be deleted
+
+        Returns:
+            Number of records deleted (or that would be)
+        """
+        spec = TABLES[data_type]
+        conditions, params = [], []
+        if max_age_days:
+            conditions.append("date < ?")
+            params.append(time.strftime('%Y-%m-%d', time.gmtime(time.time() - max_age_days * 86400)))
+        if keep_latest and 'symbol' in spec['key']:
+            conditions.append("version > ?")
+            params.append(keep_latest)
+        if not conditions:
+            return 0
+
+        keys = ', '.join(spec['key'])
+        version = ", ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS version" if 'symbol' in spec['key'] else ''
+        expired = f"SELECT {keys} FROM (SELECT {keys}{version} FROM {data_type}) WHERE {' OR '.join(conditions)}"
+        with self._lock:
+            if dry_run:
+                return self.conn.execute(f"SELECT COUNT(*) FROM ({expired})", params).fetchone()[0]
+            deleted = self.conn.execute(f"DELETE FROM {data_type} WHERE ({keys}) IN ({expired})", params).rowcount
+            self.conn.commit()
+            self._symbols = None
+        return deleted
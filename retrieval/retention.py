@@ -0,0 +1,236 @@
+"""Enforce per-namespace retention rules on the vector store.
+
+News, stock snapshots and sentiment readings go stale within days. Each namespace
+can drop records older than a number of days, keep only the latest N versions of
+each symbol's records, or both. Expired chunks are collected for the whole
+namespace and deleted in one batch, and the size of every namespace after each run
+is appended to a history file.
+
+Rules come from env (RETENTION_<NAMESPACE>_DAYS / RETENTION_<NAMESPACE>_VERSIONS,
+0 disables a rule). Run once from the repository root:
+
+    python -m retrieval.retention --dry-run
+    python -m retrieval.retention --namespace news
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Callable
+from retrieval.vector_backend import VectorBackend, create_vector_backend
+from retrieval.record_store import RecordStore, TABLES as RECORD_TABLES
+from retrieval.embeddings import index_model
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'index_size.jsonl')
+
+# Default rules: days to keep and latest record versions to keep per symbol (0 = no limit)
+DEFAULT_POLICIES = {
+    'news': {'max_age_days': 14, 'keep_latest': 0},
+    'stock_data': {'max_age_days': 0, 'keep_latest': 5},
+    'sentiment': {'max_age_days': 30, 'keep_latest': 0},
+    'earnings': {'max_age_days': 0, 'keep_latest': 8}
+}
+
+FETCH_BATCH_SIZE = 100
+
+def load_policies() -> Dict[str, Dict[str, float]]:
+    """Get the retention rule of each namespace, with env overrides applied.
+
+    Returns:
+        Mapping of namespace to max_age_days and keep_latest
+    """
+    policies = {}
+    for namespace, policy in DEFAULT_POLICIES.items():
+        prefix = f"RETENTION_{namespace.upper()}"
+        policies[namespace] = {
+            'max_age_days': float(os.getenv(f"{prefix}_DAYS", policy['max_age_days'])),
+            'keep_latest': int(os.getenv(f"{prefix}_VERSIONS", policy['keep_latest']))
+        }
+    return policies
+
+def _record_time(metadata: Dict[str, Any]) -> Optional[float]:
+    """Get when a record was current: its date if it has one, else when it was indexed."""
+    value = metadata.get('timestamp', metadata.get('indexed_at'))
+    return float(value) if value is not None else None
+
+def expired_chunks(backend: VectorBackend, namespace: str, policy: Dict[str, float], now: float = None) -> Dict[str, Any]:
+    """Find the chunks of a namespace that its retention rule expires.
+
+    Chunks indexed before records carried timestamps have no age and are kept.
+
+    Args:
+        backend: Vector store backend
+        namespace: Namespace to scan
+        policy: Dictionary with max_age_days and keep_latest
+        now: Reference Unix time (defaults to now)
+
+    Returns:
+        Dictionary with the chunk count and the expired chunk IDs
+    """
+    now = now or time.time()
+    cutoff = now - policy['max_age_days'] * 86400 if policy['max_age_days'] else None
+    ids = backend.list_ids(namespace)
+
+    expired = []
+    records = {}
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        for stored_id, chunk in backend.fetch(namespace, ids[start:start + FETCH_BATCH_SIZE]).items():
+            metadata = chunk['metadata']
+            record_time = _record_time(metadata)
+            if cutoff is not None and record_time is not None and record_time < cutoff:
+                expired.append(stored_id)
+                continue
+            if policy['keep_latest'] and metadata.get('symbol') and metadata.get('record_key'):
+                record = records.setdefault(metadata['symbol'], {}).setdefault(metadata['record_key'], {'time': record_time or 0.0, 'ids': []})
+                record['ids'].append(stored_id)
+
+    # Versions of a symbol are whole records (e.g. one per date), newest first
+    for versions in records.values():
+        ordered = sorted(versions.values(), key=lambda record: record['time'], reverse=True)
+        for record in ordered[policy['keep_latest']:]:
+            expired.extend(record['ids'])
+
+    return {'chunks': len(ids), 'expired': expired}
+
+class RetentionJob:
+    """Background job that applies the retention rules at a fixed interval.
+
+    Deletions go through delete_chunks, so a caller that keeps derived state (the
+    retriever's lexical index and namespace versions) can stay in step. Structured
+    records in a record store are pruned by the same rules.
+    """
+
+    def __init__(self, backend: VectorBackend, policies: Dict[str, Dict[str, float]] = None, delete_chunks: Callable[[str, List[str]], Any] = None, interval: float = None, history_path: str = None, record_store: RecordStore = None):
+        """Initialize the retention job.
+
+        Args:
+            backend: Vector store backend
+            policies: Retention rule per namespace (optional, can use from env)
+            delete_chunks: Function deleting chunk IDs from a namespace (optional, defaults to backend.delete)
+            interval: Seconds between runs (optional, can use RETENTION_INTERVAL from env)
+            history_path: JSON lines file the namespace sizes are appended to (optional, can use from env)
+            record_store: Structured record tables to prune as well (optional)
+        """
+        self.backend = backend
+        self.policies = policies or load_policies()
+        self.delete_chunks = delete_chunks or backend.delete
+        self.interval = interval or float(os.getenv('RETENTION_INTERVAL', 3600))
+        self.history_path = history_path or os.getenv('INDEX_SIZE_HISTORY_PATH', DEFAULT_HISTORY_PATH)
+        self.record_store = record_store
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, namespaces: List[str] = None, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """Apply the retention rules once.
+
+        Args:
+            namespaces: Namespaces to process (optional, defaults to every namespace with a rule)
+            dry_run: Only count what would be deleted
+
+        Returns:
+            One dictionary per namespace and store ('vectors' or 'records') with the time, chunks
+            (or records) before, removed, after and seconds taken
+        """
+        report = []
+        for namespace in namespaces or list(self.policies):
+            policy = self.policies.get(namespace)
+            if not policy:
+                continue
+            start = time.perf_counter()
+            try:
+                found = expired_chunks(self.backend, namespace, policy)
+                if found['expired'] and not dry_run:
+                    self.delete_chunks(namespace, found['expired'])
+            except Exception as e:
+                print(f"Error applying retention to {namespace}: {e}")
+                continue
+            removed = len(found['expired'])
+            report.append({
+                'time': time.time(),
+                'namespace': namespace,
+                'store': 'vectors',
+                'chunks_before': found['chunks'],
+                'removed': removed,
+                'chunks_after': found['chunks'] - (0 if dry_run else removed),
+                'seconds': time.perf_counter() - start
+            })
+
+            if self.record_store is not None and namespace in RECORD_TABLES:
+                start = time.perf_counter()
+                try:
+                    before = self.record_store.count(namespace)
+                    removed = self.record_store.prune(namespace, policy['max_age_days'], policy['keep_latest'], dry_run=dry_run)
+                except Exception as e:
+                    print(f"Error applying retention to {namespace} records: {e}")
+                    continue
+                report.append({
+                    'time': time.time(),
+                    'namespace': namespace,
+                    'store': 'records',
+                    'chunks_before': before,
+                    'removed': removed,
+                    'chunks_after': before - (0 if dry_run else removed),
+                    'seconds': time.perf_counter() - start
+                })
+
+        if report and not dry_run:
+            try:
+                os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+                with open(self.history_path, 'a') as f:
+                    for entry in report:
+                        f.write(json.dumps(entry) + '\n')
+            except OSError as e:
+                print(f"Error writing index size history: {e}")
+        return report
+
+    def history(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Get the most recent index size records, oldest first.
+
+        Args:
+            limit: Maximum number of records
+
+        Returns:
+            List of per-namespace run records
+        """
+        if not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path) as f:
+            lines = f.readlines()[-limit:]
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def start(self):
+        """Run the job on a daemon thread until stop is called."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='retention', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current run."""
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            for entry in self.run_once():
+                if entry['removed']:
+                    print(f"Retention ({entry['namespace']}, {entry['store']}): removed {entry['removed']} of {entry['chunks_before']}")
+            self._stop.wait(self.interval)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--namespace', action='append', help='Namespace to process (default: every namespace with a rule)')
+    parser.add_argument('--backend', help='faiss, sharded or pinecone (default: VECTOR_BACKEND from env)')
+    parser.add_argument('--dry-run', action='store_true', help='Report expired chunks without deleting them')
+    args = parser.parse_args()
+
+    # Same index directory the retriever uses for the configured embedding model
+    record_store = RecordStore() if os.getenv('STRUCTURED_RECORDS', 'on').lower() != 'off' else None
+    job = RetentionJob(create_vector_backend(args.backend, model=index_model()), record_store=record_store)
+    action = 'would remove' if args.dry_run else 'removed'
+    for entry in job.run_once(args.namespace, args.dry_run):
+        print(f"{entry['namespace']} ({entry['store']}): {entry['chunks_before']} before, {action} {entry['removed']}, {entry['chunks_after']} left ({entry['seconds']:.2f}s)")
+
+if __name__ == "__main__":
+    main()
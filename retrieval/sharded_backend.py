@@ -0,0 +1,293 @@
+import os
+import heapq
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import numpy as np
+from retrieval.vector_backend import VectorBackend
+from retrieval.faiss_backend import FAISSBackend, DEFAULT_STORE_PATH, BUILD_SEPARATOR, faiss_id
+
+# Shard directories are keyed by the shard count, since changing it moves every chunk
+SHARDS_DIR = 'shards-{}'
+SHARD_DIR = '{:02d}'
+
+def shard_of(chunk_id: str, shards: int) -> int:
+    """Get the shard a chunk ID is stored on (its FAISS ID hash, modulo the shard count)."""
+    return faiss_id(chunk_id) % shards
+
+def _serve(store_path: str, options: Dict[str, Any], threads: int, connection):
+    """Run one shard: answer backend calls from the parent over a pipe until told to stop."""
+    import faiss
+    # Parallelism comes from the shards; OpenMP threads per shard would oversubscribe the cores
+    faiss.omp_set_num_threads(threads)
+    backend = FAISSBackend(store_path=store_path, **options)
+    parent = os.getppid()
+    while True:
+        try:
+            if not connection.poll(1.0):
+                # Exit with the process that started the shard, even if it was killed
+                if os.getppid() != parent:
+                    break
+                continue
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args = request
+        try:
+            connection.send((True, getattr(backend, method)(*args)))
+        except Exception as e:
+            connection.send((False, f"{type(e).__name__}: {e}"))
+
+class ShardedBackend(VectorBackend):
+    """FAISS vector store split by chunk ID hash across worker processes.
+
+    Every shard is a process owning a FAISSBackend over its own directory, so each
+    keeps its own memory-mapped indexes and searches them on its own core. Writes
+    are routed to the shard of each chunk ID; searches are sent to every shard at
+    once and their top k results merged by score, which gives the same results as
+    one exact index over the whole namespace.
+
+    Builds open a build on every shard and publish them together, so the shards of
+    a namespace share its version numbers. Each shard swaps its version atomically,
+    but shards publish one after another, so a search running during a publish may
+    see the new version on some shards only. Shards pick up writes by other
+    processes (e.g. a CLI indexing into the same store) within FAISS_RELOAD_INTERVAL
+    seconds, like FAISSBackend.
+    """
+
+    def __init__(self, store_path: str = None, shards: int = None, threads: int = None, **faiss_options):
+        """Initialize the sharded backend and start its worker processes.
+
+        Args:
+            store_path: Directory holding the shard directories (optional, can use VECTOR_STORE_PATH from env)
+            shards: Number of shard processes (optional, can use VECTOR_SHARDS from env, defaults to the CPU count)
+            threads: FAISS threads per shard (optional, can use SHARD_THREADS from env)
+            faiss_options: Further FAISSBackend arguments (quantization, use_mmap, ...) for every shard
+
+        Raises:
+            ValueError: if the store holds FAISS data outside these shards while the shards are
+                still empty, which searches would silently miss
+        """
+        self.store_path = store_path or os.getenv('VECTOR_STORE_PATH', DEFAULT_STORE_PATH)
+        self.shards = shards or int(os.getenv('VECTOR_SHARDS', os.cpu_count() or 1))
+        threads = threads or int(os.getenv('SHARD_THREADS', 1))
+        shard_paths = [os.path.join(self.store_path, SHARDS_DIR.format(self.shards), SHARD_DIR.format(shard)) for shard in range(self.shards)]
+        self._check_layout(shard_paths)
+
+        # Spawned, not forked: the server process runs threads whose locks a fork would copy mid-use
+        context = multiprocessing.get_context('spawn')
+        self._connections = []
+        self.processes = []
+        for shard, shard_path in enumerate(shard_paths):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve, args=(shard_path, faiss_options, threads, child), daemon=True, name=f"vector-shard-{shard}")
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self.processes.append(process)
+
+        # One pipe per shard carries one request at a time; the executor sends to all shards at once
+        self._shard_locks = [threading.Lock() for _ in range(self.shards)]
+        self._executor = ThreadPoolExecutor(max_workers=self.shards, thread_name_prefix='shard')
+        self._builds = {}
+        self._lock = threading.Lock()
+
+    def _check_layout(self, shard_paths: List[str]):
+        """Refuse to start empty shards over a store whose data lives outside them."""
+        if any(FAISSBackend(store_path=path).namespaces() for path in shard_paths):
+            return
+        elsewhere = []
+        unsharded = FAISSBackend(store_path=self.store_path).namespaces()
+        if unsharded:
+            elsewhere.append(f"unsharded namespaces ({', '.join(unsharded)})")
+        sharded_dir = SHARDS_DIR.format(self.shards)
+        for name in sorted(os.listdir(self.store_path)) if os.path.isdir(self.store_path) else []:
+            path = os.path.join(self.store_path, name)
+            if name.startswith(SHARDS_DIR.format('')) and name != sharded_dir and os.path.isdir(path):
+                if any(FAISSBackend(store_path=os.path.join(path, shard)).namespaces() for shard in os.listdir(path)):
+                    elsewhere.append(f"shards in {name}/")
+        if elsewhere:
+            message = (f"{self.store_path} holds {' and '.join(elsewhere)} but {sharded_dir}/ is empty; "
+                       f"re-index into VECTOR_SHARDS={self.shards} or keep the previous VECTOR_BACKEND and VECTOR_SHARDS")
+            print(f"Error opening sharded vector store: {message}")
+            raise ValueError(message)
+
+    def _call(self, shard: int, method: str, *args) -> Any:
+        """Run a backend method on one shard and return its result."""
+        with self._shard_locks[shard]:
+            self._connections[shard].send((method, args))
+            ok, result = self._connections[shard].recv()
+        if not ok:
+            raise RuntimeError(f"Shard {shard} failed in {method}: {result}")
+        return result
+
+    def _scatter(self, calls: Dict[int, tuple]) -> Dict[int, Any]:
+        """Run one call per shard concurrently.
+
+        Args:
+            calls: Mapping of shard to (method, args)
+
+        Returns:
+            Mapping of shard to result
+        """
+        if len(calls) == 1:
+            shard, (method, args) = next(iter(calls.items()))
+            return {shard: self._call(shard, method, *args)}
+        futures = {shard: self._executor.submit(self._call, shard, method, *args) for shard, (method, args) in calls.items()}
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def _shard_namespace(self, namespace: str, shard: int) -> str:
+        """Translate a namespace or build name into the name a shard knows it by."""
+        with self._lock:
+            builds = self._builds.get(namespace)
+        return builds[1][shard] if builds else namespace
+
+    def _by_shard(self, ids: List[str]) -> Dict[int, List[int]]:
+        """Group the positions of chunk IDs by the shard they belong to."""
+        groups = {}
+        for position, chunk_id in enumerate(ids):
+            groups.setdefault(shard_of(chunk_id, self.shards), []).append(position)
+        return groups
+
+    def upsert(self, namespace: str, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        if not ids:
+            return 0
+        matrix = np.asarray(vectors, dtype='float32')
+        calls = {
+            shard: ('upsert', (self._shard_namespace(namespace, shard), [ids[p] for p in positions], matrix[positions],
+                               [texts[p] for p in positions], [metadatas[p] for p in positions]))
+            for shard, positions in self._by_shard(ids).items()
+        }
+        return sum(self._scatter(calls).values())
+
+    def search(self, namespace: str, vector: List[float], k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        query = np.asarray(vector, dtype='float32')
+        results = self._scatter({shard: ('search', (self._shard_namespace(namespace, shard), query, k, filter)) for shard in range(self.shards)})
+        # Every shard returns its own best k, so the best k overall are among them
+        return heapq.nlargest(k, (match for matches in results.values() for match in matches), key=lambda match: match['score'])
+
+    def delete(self, namespace: str, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        calls = {shard: ('delete', (self._shard_namespace(namespace, shard), [ids[p] for p in positions])) for shard, positions in self._by_shard(ids).items()}
+        return sum(self._scatter(calls).values())
+
+    def fetch(self, namespace: str, ids: List[str], include_vectors: bool = False) -> Dict[str, Dict[str, Any]]:
+        if not ids:
+            return {}
+        calls = {shard: ('fetch', (self._shard_namespace(namespace, shard), [ids[p] for p in positions], include_vectors)) for shard, positions in self._by_shard(ids).items()}
+        found = {}
+        for result in self._scatter(calls).values():
+            found.update(result)
+        return found
+
+    def list_ids(self, namespace: str) -> List[str]:
+        results = self._scatter({shard: ('list_ids', (self._shard_namespace(namespace, shard),)) for shard in range(self.shards)})
+        return [chunk_id for shard in range(self.shards) for chunk_id in results[shard]]
+
+    def namespaces(self) -> List[str]:
+        results = self._scatter({shard: ('namespaces', ()) for shard in range(self.shards)})
+        return sorted(set(name for names in results.values() for name in names))
+
+    def memory_report(self, namespace: str) -> Dict[str, Any]:
+        """Report how much memory the vectors of a namespace take, in total and per shard (see FAISSBackend.memory_report)."""
+        reports = self._scatter({shard: ('memory_report', (namespace,)) for shard in range(self.shards)})
+        per_shard = [reports[shard] for shard in range(self.shards)]
+        vectors = sum(report['vectors'] for report in per_shard)
+        resident = sum(report['resident_bytes_per_vector'] * report['vectors'] for report in per_shard)
+        return {
+            'vectors': vectors,
+            'exact_bytes': sum(report['exact_bytes'] for report in per_shard),
+            'quantized_bytes': sum(report['quantized_bytes'] for report in per_shard),
+            'resident_bytes_per_vector': resident / vectors if vectors else 0.0,
+            'shards': per_shard
+        }
+
+    def begin_build(self, namespace: str) -> str:
+        futures = {shard: self._executor.submit(self._call, shard, 'begin_build', namespace) for shard in range(self.shards)}
+        shard_builds = {}
+        errors = []
+        for shard, future in futures.items():
+            try:
+                shard_builds[shard] = future.result()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            for shard, shard_build in shard_builds.items():
+                try:
+                    self._call(shard, 'abort_build', shard_build)
+                except Exception as e:
+                    print(f"Error aborting build on shard {shard}: {e}")
+            raise errors[0]
+        build = f"{namespace}{BUILD_SEPARATOR}{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._builds[build] = (namespace, [shard_builds[shard] for shard in range(self.shards)])
+        return build
+
+    def publish_build(self, build: str):
+        with self._lock:
+            entry = self._builds.pop(build, None)
+        if entry is None:
+            raise ValueError(f"Unknown sharded build: {build}")
+        self._scatter({shard: ('publish_build', (shard_build,)) for shard, shard_build in enumerate(entry[1])})
+
+    def abort_build(self, build: str):
+        with self._lock:
+            entry = self._builds.pop(build, None)
+        if entry is not None:
+            self._scatter({shard: ('abort_build', (shard_build,)) for shard, shard_build in enumerate(entry[1])})
+
+    def current_version(self, namespace: str) -> Optional[str]:
+        """Get the version of a namespace the shards load from disk.
+
+        Returns:
+            The version, or None before the first published build or while the shards
+            disagree (a publish that failed part way; roll back to realign them)
+        """
+        currents = set(self._scatter({shard: ('current_version', (namespace,)) for shard in range(self.shards)}).values())
+        return currents.pop() if len(currents) == 1 else None
+
+    def versions(self, namespace: str) -> List[str]:
+        """List the versions of a namespace that every shard keeps on disk, oldest first."""
+        results = self._scatter({shard: ('versions', (namespace,)) for shard in range(self.shards)})
+        return sorted(set.intersection(*(set(versions) for versions in results.values())))
+
+    def rollback(self, namespace: str, version: str = None) -> str:
+        """Make an earlier version of a namespace current again on every shard (see FAISSBackend.rollback).
+
+        Args:
+            namespace: Namespace to roll back
+            version: Version to restore (optional, defaults to the newest one every shard keeps
+                that is older than the newest current version of any shard)
+
+        Returns:
+            The version now current
+        """
+        currents = self._scatter({shard: ('current_version', (namespace,)) for shard in range(self.shards)})
+        available = self.versions(namespace)
+        if version is None:
+            newest = max((current for current in currents.values() if current), default=None)
+            earlier = [candidate for candidate in available if newest is None or candidate < newest]
+            if not earlier:
+                raise ValueError(f"No earlier version of sharded namespace {namespace} kept by every shard")
+            version = earlier[-1]
+        elif version not in available:
+            raise ValueError(f"Unknown version of sharded namespace {namespace}: {version}")
+        self._scatter({shard: ('rollback', (namespace, version)) for shard in range(self.shards)})
+        return version
+
+    def close(self):
+        """Stop the shard processes."""
+        for shard, connection in enumerate(self._connections):
+            with self._shard_locks[shard]:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,173 @@
+import os
+from typing import List, Dict, Any, Optional
+
+class VectorBackend:
+    """Interface shared by the vector stores the retriever agent can index into.
+
+    Backends store one vector per chunk under a string ID, together with the chunk text
+    and its metadata, partitioned by namespace. Scores returned by search are cosine
+    similarities, so higher is better and 1.0 is an exact match.
+    """
+
+    def upsert(self, namespace: str, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        """Insert chunks, replacing any stored under the same IDs.
+
+        Args:
+            namespace: Namespace to write to
+            ids: Chunk IDs
+            vectors: Embedding of each chunk
+            texts: Text of each chunk
+            metadatas: Metadata of each chunk
+
+        Returns:
+            Number of chunks written
+        """
+        raise NotImplementedError
+
+    def search(self, namespace: str, vector: List[float], k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Find the chunks closest to a query vector.
+
+        Args:
+            namespace: Namespace to search in
+            vector: Query embedding
+            k: Number of chunks to return
+            filter: Metadata filter in Pinecone syntax (see matches_filter)
+
+        Returns:
+            List of dictionaries with id, content, metadata and score, best first
+        """
+        raise NotImplementedError
+
+    def delete(self, namespace: str, ids: List[str]) -> int:
+        """Delete chunks by ID.
+
+        Args:
+            namespace: Namespace to delete from
+            ids: Chunk IDs
+
+        Returns:
+            Number of chunks deleted (or requested, when the backend cannot tell)
+        """
+        raise NotImplementedError
+
+    def fetch(self, namespace: str, ids: List[str], include_vectors: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Get stored chunks by ID.
+
+        Args:
+            namespace: Namespace to read from
+            ids: Chunk IDs
+            include_vectors: Also return each chunk's stored 'vector'
+
+        Returns:
+            Dictionary mapping each found ID to its content and metadata
+        """
+        raise NotImplementedError
+
+    def list_ids(self, namespace: str) -> List[str]:
+        """List the IDs of every chunk in a namespace."""
+        raise NotImplementedError
+
+    def namespaces(self) -> List[str]:
+        """List the namespaces that hold data."""
+        raise NotImplementedError
+
+    def begin_build(self, namespace: str) -> str:
+        """Start building a new version of a namespace.
+
+        Writes to the returned name are staged, and searches see all of them at once
+        when publish_build is called. Backends without versioned namespaces write
+        through, so by default the namespace itself is returned.
+
+        Args:
+            namespace: Namespace to rebuild
+
+        Returns:
+            Name to pass to upsert and delete while building
+        """
+        return namespace
+
+    def publish_build(self, build: str):
+        """Make a build the version of its namespace that searches see."""
+
+    def abort_build(self, build: str):
+        """Discard a build, leaving the published version of its namespace in place."""
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone-style metadata filter against a chunk's metadata.
+
+    Supports field equality, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte and $and/$or.
+    A list-valued field matches $eq/$in when any of its items does.
+
+    Args:
+        metadata: Chunk metadata
+        filter: Filter dictionary (None matches everything)
+
+    Returns:
+        True if the metadata satisfies the filter
+    """
+    if not filter:
+        return True
+    for field, condition in filter.items():
+        if field == '$and':
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+            continue
+        if field == '$or':
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+            continue
+
+        value = metadata.get(field)
+        values = value if isinstance(value, list) else [value]
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, operand in condition.items():
+            if operator == '$eq':
+                ok = operand in values
+            elif operator == '$ne':
+                ok = operand not in values
+            elif operator == '$in':
+                ok = any(v in operand for v in values)
+            elif operator == '$nin':
+                ok = not any(v in operand for v in values)
+            elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    return False
+                ok = {
+                    '$gt': value > operand,
+                    '$gte': value >= operand,
+                    '$lt': value < operand,
+                    '$lte': value <= operand
+                }[operator]
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+            if not ok:
+                return False
+    return True
+
+def create_vector_backend(name: str = None, model: str = None, **pinecone_options) -> VectorBackend:
+    """Create the vector store backend selected by configuration.
+
+    Args:
+        name: 'faiss', 'sharded' (FAISS split across VECTOR_SHARDS processes) or 'pinecone'
+            (optional, can use VECTOR_BACKEND from env)
+        model: Embedding model other than the default OpenAI one; FAISS keeps its indexes
+            in a separate directory per model so vector dimensions never mix
+        pinecone_options: api_key, environment and index_name for the Pinecone backend
+            (the Pinecone index must have been created with the model's dimension)
+
+    Returns:
+        Vector backend instance
+    """
+    name = (name or os.getenv('VECTOR_BACKEND', 'faiss')).lower()
+    if name == 'faiss':
+        from retrieval.faiss_backend import FAISSBackend, model_store_path
+        return FAISSBackend(store_path=model_store_path(model))
+    if name == 'sharded':
+        from retrieval.faiss_backend import model_store_path
+        from retrieval.sharded_backend import ShardedBackend
+        return ShardedBackend(store_path=model_store_path(model))
+    if name == 'pinecone':
+        from retrieval.pinecone_backend import PineconeBackend
+        return PineconeBackend(**pinecone_options)
+    raise ValueError(f"Unknown vector backend: {name}")
@@ -0,0 +1,11 @@
+import os
+import sys
+import pytest
+
+# Tests import the packages from the repository root, as the services do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # tiktoken downloads its encoding on first use; tests count tokens offline
+    monkeypatch.setattr('retrieval.embedding_pipeline.HAS_TIKTOKEN', False)
@@ -0,0 +1,61 @@
+import time
+import threading
+import pytest
+from data_ingestion.article_pipeline import ArticlePipeline
+from data_ingestion.html_extract import HTMLExtractor, HAS_BS4, HAS_LXML
+
+pytestmark = pytest.mark.skipif(not (HAS_BS4 or HAS_LXML), reason='needs beautifulsoup4 or lxml')
+
+def page(text: str) -> str:
+    return f"<html><body><nav><p>Menu</p></nav><article><p>{text}</p><p>Second paragraph.</p></article></body></html>"
+
+class FakeClient:
+    """Serves article pages from a dict, failing for links it does not know."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def fetch(self, url, source=None):
+        time.sleep(self.delay)
+        if url.endswith('/missing'):
+            return {'status_code': 404, 'text': None, 'error': 'not found'}
+        return {'status_code': 200, 'text': page(f"Body of {url}"), 'error': None}
+
+def articles(count: int):
+    return [{'link': f"https://news.example.com/{i}", 'summary': 'teaser'} for i in range(count)]
+
+def test_every_article_reaches_the_sink_with_its_body():
+    received = []
+    stats = ArticlePipeline(client=FakeClient(), extractor=HTMLExtractor(), max_workers=3).run(articles(5), received.append)
+    assert stats['fetched'] == 5 and stats['sunk'] == 5
+    bodies = {article['link']: article['body'] for article in received}
+    assert bodies['https://news.example.com/2'] == 'Body of https://news.example.com/2\n\nSecond paragraph.'
+
+def test_failed_fetches_keep_the_teaser_and_sink_errors_are_counted():
+    received = []
+    sink = lambda article: received.append(article) or not article['link'].endswith('/0')
+    stats = ArticlePipeline(client=FakeClient(), extractor=HTMLExtractor()).run(
+        articles(2) + [{'link': 'https://news.example.com/missing', 'summary': 'teaser'}], sink)
+    assert (stats['fetched'], stats['failed'], stats['sunk'], stats['sink_errors']) == (2, 1, 2, 1)
+    missing = next(article for article in received if article['link'].endswith('/missing'))
+    assert missing['body'] == '' and missing['summary'] == 'teaser'
+
+def test_producer_is_held_back_by_max_in_flight():
+    lock = threading.Lock()
+    counts = {'produced': 0, 'sunk': 0, 'lead': 0}
+
+    def produce():
+        for article in articles(30):
+            with lock:
+                counts['produced'] += 1
+                counts['lead'] = max(counts['lead'], counts['produced'] - counts['sunk'])
+            yield article
+
+    def sink(article):
+        time.sleep(0.005)
+        with lock:
+            counts['sunk'] += 1
+
+    ArticlePipeline(client=FakeClient(delay=0.01), extractor=HTMLExtractor(), max_workers=2, max_in_flight=3).run(produce(), sink)
+    assert counts['sunk'] == 30
+    assert counts['lead'] <= 4
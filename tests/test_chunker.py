@@ -0,0 +1,42 @@
+from retrieval.chunker import Chunker
+from retrieval.embedding_pipeline import count_tokens
+
+POLICIES = {
+    'news': {'max_tokens': 50, 'overlap_tokens': 10},
+    'stock_data': {'max_tokens': 0, 'overlap_tokens': 0},
+    'default': {'max_tokens': 50, 'overlap_tokens': 0}
+}
+
+def paragraphs(count: int) -> str:
+    return '\n\n'.join(f"Paragraph {i} says the fab ran at full capacity for the quarter." for i in range(count))
+
+def test_short_record_is_one_chunk():
+    assert Chunker(POLICIES).split('  TSM closed at 180.5  ', 'news') == ['TSM closed at 180.5']
+
+def test_blank_document_has_no_chunks():
+    assert Chunker(POLICIES).split(' \n\n ', 'news') == []
+
+def test_chunks_respect_token_limit():
+    chunks = Chunker(POLICIES).split(paragraphs(30), 'news')
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+
+def test_chunks_cover_the_document_in_order():
+    text = paragraphs(30)
+    chunks = Chunker(POLICIES).split(text, 'default')
+    for i in range(30):
+        assert any(f"Paragraph {i} " in chunk for chunk in chunks)
+    assert [chunk for chunk in chunks if 'Paragraph 0 ' in chunk][0] == chunks[0]
+
+def test_records_with_zero_limit_are_kept_whole():
+    text = paragraphs(30)
+    assert Chunker(POLICIES).split(text, 'stock_data') == [text]
+
+def test_stream_matches_split_of_the_joined_parts():
+    parts = [paragraphs(5), paragraphs(7), paragraphs(3)]
+    chunker = Chunker(POLICIES)
+    assert list(chunker.iter_stream(parts, 'default')) == chunker.split('\n\n'.join(parts), 'default')
+
+def test_stream_separates_parts_without_whitespace():
+    chunks = list(Chunker(POLICIES).iter_stream(['page one end', 'Next page'], 'news'))
+    assert chunks == ['page one end\n\nNext page']
@@ -0,0 +1,48 @@
+import numpy as np
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.record_ids import record_key, chunk_id
+from retrieval.compact_index import compact_namespace
+
+def store(backend, namespace, chunks):
+    ids = [stored_id for stored_id, _, _ in chunks]
+    vectors = np.random.default_rng(len(ids)).standard_normal((len(ids), 8)).astype('float32')
+    backend.upsert(namespace, ids, vectors, [text for _, text, _ in chunks], [metadata for _, _, metadata in chunks])
+
+def test_record_keys():
+    assert record_key('earnings', {'symbol': 'TSM', 'date': '2024-01-18'}) == 'TSM:2024-01-18'
+    assert record_key('stock_data', {'symbol': 'TSM'}) == 'TSM'
+    assert record_key('sentiment', {'date': '2024-01-18'}) == '2024-01-18'
+    assert record_key('news', {}) is None
+    assert chunk_id('news', 'k', 0) != chunk_id('earnings', 'k', 0)
+
+def test_random_copies_of_keyed_records_are_removed(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    metadata = {'link': 'https://example.com/a'}
+    key = record_key('news', metadata)
+    store(backend, 'news', [
+        (chunk_id('news', key, 0), 'story', dict(metadata, record_key=key)),
+        ('uuid-1', 'story', metadata),
+        ('uuid-2', 'older story', metadata)
+    ])
+    result = compact_namespace(backend, 'news')
+    assert result == {'namespace': 'news', 'chunks': 3, 'records': 1, 'removed': 2}
+    assert backend.list_ids('news') == [chunk_id('news', key, 0)]
+
+def test_legacy_records_keep_their_newest_copy(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    store(backend, 'stock_data', [
+        ('uuid-1', 'TSM at 100', {'symbol': 'TSM', 'date': '2024-01-18', 'indexed_at': 2.0}),
+        ('uuid-2', 'TSM at 101', {'symbol': 'TSM', 'date': '2024-01-18', 'indexed_at': 1.0}),
+        ('uuid-3', 'JD at 30', {'symbol': 'JD', 'date': '2024-01-18'}),
+        ('uuid-4', 'JD at 31', {'symbol': 'JD', 'date': '2024-01-18'})
+    ])
+    assert compact_namespace(backend, 'stock_data', dry_run=True)['removed'] == 2
+    assert len(backend.list_ids('stock_data')) == 4
+    compact_namespace(backend, 'stock_data')
+    assert sorted(backend.list_ids('stock_data')) == ['uuid-1', 'uuid-4']
+
+def test_unkeyed_records_keep_one_copy_per_text(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    store(backend, 'finance', [('a', 'same', {}), ('b', 'same', {}), ('c', 'other', {})])
+    assert compact_namespace(backend, 'finance')['removed'] == 1
+    assert sorted(backend.list_ids('finance')) == ['a', 'c']
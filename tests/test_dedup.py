@@ -0,0 +1,35 @@
+from data_ingestion.dedup import ArticleDeduplicator, normalize_url
+
+def article(link: str, title: str, summary: str = '') -> dict:
+    return {'link': link, 'title': title, 'summary': summary}
+
+STORY = 'Taiwan Semiconductor lifts its full year revenue forecast on strong demand for AI chips from data centers'
+
+def test_normalize_url_drops_tracking_and_fragment():
+    assert normalize_url('https://www.Example.com/a/?utm_source=x&id=2#frag') == 'https://www.example.com/a?id=2'
+
+def test_filter_new_drops_batch_duplicates(tmp_path):
+    dedup = ArticleDeduplicator(db_path=str(tmp_path / 'dedup.db'))
+    articles = [
+        article('https://a.com/1', 'TSMC raises forecast', STORY),
+        article('https://a.com/1?utm_source=feed', 'Different title', 'different text'),
+        article('https://b.com/2', 'TSMC raises forecast', STORY),
+        article('https://c.com/3', 'Samsung memory prices climb', 'Samsung says memory chip prices will rise again next quarter')
+    ]
+    assert [a['link'] for a in dedup.filter_new(articles)] == ['https://a.com/1', 'https://c.com/3']
+
+def test_recorded_articles_are_dropped_on_later_runs(tmp_path):
+    path = str(tmp_path / 'dedup.db')
+    first = article('https://a.com/1', 'TSMC raises forecast', STORY)
+    ArticleDeduplicator(db_path=path).record([first])
+
+    dedup = ArticleDeduplicator(db_path=path)
+    republished = article('https://wire.com/x', 'TSMC raises its forecast', STORY + ' again')
+    novel = article('https://c.com/3', 'Sony image sensor sales', 'Sony expects image sensor sales to recover in the second half')
+    assert dedup.filter_new([republished, novel]) == [novel]
+
+def test_filter_new_does_not_record(tmp_path):
+    dedup = ArticleDeduplicator(db_path=str(tmp_path / 'dedup.db'))
+    item = article('https://a.com/1', 'TSMC raises forecast', STORY)
+    assert dedup.filter_new([item]) == [item]
+    assert dedup.filter_new([item]) == [item]
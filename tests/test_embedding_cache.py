@@ -0,0 +1,55 @@
+import numpy as np
+from retrieval.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+class CountingEmbeddings:
+    model = 'test-model'
+
+    def __init__(self):
+        self.document_batches = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.document_batches.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 0.0, 1.0]
+
+def test_vectors_survive_restart(tmp_path):
+    path = str(tmp_path / 'embeddings.db')
+    EmbeddingCache(db_path=path).put_many('m', ['alpha'], [[0.25, 0.5]])
+    cache = EmbeddingCache(db_path=path)
+    found = cache.get_many('m', ['alpha', 'beta'])
+    assert found[0].tolist() == [0.25, 0.5] and found[0].dtype == np.float32
+    assert found[1] is None
+    assert cache.stats()['disk_hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_keys_include_the_model(tmp_path):
+    cache = EmbeddingCache(db_path=str(tmp_path / 'embeddings.db'))
+    cache.put_many('small', ['alpha'], [[1.0]])
+    assert cache.get_many('large', ['alpha']) == [None]
+
+def test_memory_lru_is_bounded(tmp_path):
+    cache = EmbeddingCache(db_path=str(tmp_path / 'embeddings.db'), memory_items=2)
+    cache.put_many('m', ['a', 'b', 'c'], [[1.0], [2.0], [3.0]])
+    assert cache.stats()['memory_items'] == 2
+    cache.get_many('m', ['a', 'c'])
+    stats = cache.stats()
+    assert stats['memory_hits'] == 1 and stats['disk_hits'] == 1 and stats['disk_items'] == 3
+
+def test_only_distinct_misses_reach_the_model(tmp_path):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, EmbeddingCache(db_path=str(tmp_path / 'embeddings.db')))
+    first = embeddings.embed_documents(['one', 'two', 'one'])
+    second = embeddings.embed_documents(['two', 'three'])
+    assert model.document_batches == [['one', 'two'], ['three']]
+    assert first[0] == first[2] == [3.0, 1.0, 0.5]
+    assert second[0] == first[1]
+
+def test_queries_share_the_cache(tmp_path):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, EmbeddingCache(db_path=str(tmp_path / 'embeddings.db')))
+    assert embeddings.embed_query('tsmc') == embeddings.embed_query('tsmc')
+    assert model.queries == ['tsmc']
+    assert embeddings.model == 'test-model'
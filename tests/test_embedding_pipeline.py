@@ -0,0 +1,82 @@
+import time
+import threading
+from retrieval.embedding_pipeline import EmbeddingPipeline, count_tokens
+
+class RecordingBackend:
+    def __init__(self):
+        self.chunks = {}
+        self.lock = threading.Lock()
+
+    def upsert(self, namespace, ids, vectors, texts, metadatas):
+        with self.lock:
+            for chunk_id, vector in zip(ids, vectors):
+                self.chunks[chunk_id] = vector
+        return len(ids)
+
+class FakeEmbeddings:
+    def __init__(self, fail_texts=(), flaky_calls=0):
+        self.fail_texts = set(fail_texts)
+        self.flaky_calls = flaky_calls
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.flaky_calls:
+                raise RuntimeError('rate limited')
+        if self.fail_texts.intersection(texts):
+            raise RuntimeError('bad input')
+        return [[float(len(text))] for text in texts]
+
+def chunks(count: int):
+    return [(f"id-{i}", f"chunk number {i}", {}) for i in range(count)]
+
+def pipeline(embeddings, backend, **options) -> EmbeddingPipeline:
+    return EmbeddingPipeline(embeddings, backend, retry_delay=0.001, **options)
+
+def test_batches_are_bounded_by_tokens_and_size():
+    tokens = count_tokens('chunk number 1')
+    batcher = pipeline(FakeEmbeddings(), RecordingBackend(), max_batch_tokens=tokens * 3, max_batch_size=2)
+    sizes = [len(ids) for ids, _, _ in batcher.batches(chunks(5))]
+    assert sizes == [2, 2, 1]
+    batcher = pipeline(FakeEmbeddings(), RecordingBackend(), max_batch_tokens=tokens * 2, max_batch_size=10)
+    assert [len(ids) for ids, _, _ in batcher.batches(chunks(5))] == [2, 2, 1]
+
+def test_all_chunks_are_written():
+    backend = RecordingBackend()
+    stats = pipeline(FakeEmbeddings(), backend, max_batch_size=3, concurrency=2).run_stream('news', chunks(10))
+    assert stats['batches'] == 4 and stats['upserted'] == 10 and stats['failed'] == 0
+    assert backend.chunks['id-7'] == [float(len('chunk number 7'))]
+
+def test_failed_requests_are_retried():
+    embeddings = FakeEmbeddings(flaky_calls=2)
+    stats = pipeline(embeddings, RecordingBackend(), max_retries=3).run('news', ['a'], ['text'], [{}])
+    assert stats['upserted'] == 1 and embeddings.calls == 3
+
+def test_a_failing_batch_only_drops_its_own_chunks():
+    backend = RecordingBackend()
+    embeddings = FakeEmbeddings(fail_texts=['chunk number 4'])
+    stats = pipeline(embeddings, backend, max_batch_size=2, max_retries=1).run_stream('news', chunks(6))
+    assert sorted(stats['failed_ids']) == ['id-4', 'id-5']
+    assert sorted(backend.chunks) == ['id-0', 'id-1', 'id-2', 'id-3']
+
+def test_input_is_pulled_as_batches_are_formed():
+    backend = RecordingBackend()
+    leads = []
+
+    class SlowEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts):
+            time.sleep(0.01)
+            return super().embed_documents(texts)
+
+    def source():
+        for position, chunk in enumerate(chunks(20)):
+            with backend.lock:
+                leads.append(position - len(backend.chunks))
+            yield chunk
+
+    stats = pipeline(SlowEmbeddings(), backend, max_batch_size=1, concurrency=1, max_in_flight=2).run_stream('news', source())
+    assert stats['upserted'] == 20
+    # At most max_in_flight batches plus the one being formed are ahead of the writer
+    assert max(leads) <= 3
@@ -0,0 +1,300 @@
+import os
+import random
+import multiprocessing
+import numpy as np
+import pytest
+from retrieval import faiss_backend
+from retrieval.faiss_backend import FAISSBackend, CHANGE_LOG_FILE, INDEX_FILE, model_store_path
+from retrieval.embeddings import index_model
+from retrieval.vector_backend import matches_filter
+
+DIMENSION = 16
+
+def vectors(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype('float32')
+
+def add(backend: FAISSBackend, namespace: str, ids, seed: int = 0, metadatas=None) -> np.ndarray:
+    matrix = vectors(len(ids), seed)
+    backend.upsert(namespace, list(ids), matrix, [f"text {i}" for i in ids], metadatas or [{} for _ in ids])
+    return matrix
+
+def test_upsert_search_delete(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    matrix = add(backend, 'news', ['a', 'b', 'c'])
+    match = backend.search('news', matrix[1], k=1)[0]
+    assert match['id'] == 'b' and match['content'] == 'text b'
+    assert match['score'] == pytest.approx(1.0, abs=1e-5)
+    assert backend.delete('news', ['b', 'missing']) == 1
+    assert sorted(backend.list_ids('news')) == ['a', 'c']
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['a', 'c']
+
+def test_upsert_replaces_existing_ids(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    add(backend, 'news', ['a', 'b'])
+    replacement = add(backend, 'news', ['a'], seed=1)
+    assert sorted(backend.list_ids('news')) == ['a', 'b']
+    assert backend.search('news', replacement[0], k=1)[0]['score'] == pytest.approx(1.0, abs=1e-5)
+
+def test_filtered_search(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    matrix = add(backend, 'earnings', ['a', 'b', 'c'], metadatas=[{'symbol': 'TSM'}, {'symbol': 'JD'}, {'symbol': 'TSM'}])
+    found = backend.search('earnings', matrix[1], k=3, filter={'symbol': 'TSM'})
+    assert sorted(match['id'] for match in found) == ['a', 'c']
+    assert backend.search('earnings', matrix[1], k=3, filter={'symbol': 'SONY'}) == []
+
+def test_filtered_search_matches_full_scan(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    rng = random.Random(0)
+    ids = [str(i) for i in range(300)]
+    metadatas = [{'symbol': rng.choice(['TSM', 'JD', 'SONY']), 'symbols': rng.sample(['TSM', 'JD', 'SONY'], 2), 'timestamp': float(rng.randrange(1000))} for _ in ids]
+    matrix = add(backend, 'earnings', ids, metadatas=metadatas)
+    filters = [
+        {'symbol': 'TSM'},
+        {'symbol': {'$in': ['JD', 'SONY']}},
+        {'symbols': {'$in': ['TSM']}},
+        {'timestamp': {'$gte': 200.0, '$lt': 400.0}},
+        {'$and': [{'symbol': {'$in': ['TSM']}}, {'timestamp': {'$lt': 500.0}}]},
+        {'$or': [{'symbol': 'JD'}, {'timestamp': {'$gte': 900.0}}]}
+    ]
+    for filter in filters:
+        expected = {chunk_id for chunk_id, metadata in zip(ids, metadatas) if matches_filter(metadata, filter)}
+        found = backend.search('earnings', matrix[0], k=len(ids), filter=filter)
+        assert {match['id'] for match in found} == expected
+        assert [match['score'] for match in found] == sorted((match['score'] for match in found), reverse=True)
+
+def test_filter_index_follows_updates_and_deletes(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    matrix = add(backend, 'earnings', ['a', 'b'], metadatas=[{'symbol': 'TSM', 'timestamp': 1.0}, {'symbol': 'JD', 'timestamp': 2.0}])
+    backend.upsert('earnings', ['a'], matrix[:1], ['text a'], [{'symbol': 'JD', 'timestamp': 3.0}])
+    backend.delete('earnings', ['b'])
+    assert backend.search('earnings', matrix[0], k=5, filter={'symbol': 'TSM'}) == []
+    assert [match['id'] for match in backend.search('earnings', matrix[0], k=5, filter={'symbol': 'JD'})] == ['a']
+    assert backend.search('earnings', matrix[0], k=5, filter={'timestamp': {'$lt': 3.0}}) == []
+    reloaded = FAISSBackend(store_path=str(tmp_path))
+    assert [match['id'] for match in reloaded.search('earnings', matrix[0], k=5, filter={'timestamp': {'$gte': 3.0}})] == ['a']
+
+def test_writes_append_to_log_instead_of_saving(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    add(backend, 'news', ['a'])
+    add(backend, 'news', ['b'], seed=1)
+    backend.delete('news', ['a'])
+    directory = tmp_path / 'news'
+    assert not (directory / INDEX_FILE).exists()
+    assert len((directory / CHANGE_LOG_FILE).read_text().splitlines()) == 3
+
+    reloaded = FAISSBackend(store_path=str(tmp_path))
+    assert reloaded.list_ids('news') == ['b']
+    assert reloaded.search('news', vectors(1, seed=1)[0], k=1)[0]['id'] == 'b'
+
+def test_log_is_checkpointed_once_it_grows(tmp_path, monkeypatch):
+    monkeypatch.setattr(faiss_backend, 'CHECKPOINT_MIN_BYTES', 500)
+    backend = FAISSBackend(store_path=str(tmp_path))
+    for i in range(10):
+        add(backend, 'news', [str(i)], seed=i)
+    directory = tmp_path / 'news'
+    assert (directory / INDEX_FILE).exists()
+    log_path = directory / CHANGE_LOG_FILE
+    assert not log_path.exists() or os.path.getsize(log_path) < 500
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == [str(i) for i in range(10)]
+
+def test_torn_log_entry_is_dropped(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    add(backend, 'news', ['a'])
+    log_path = tmp_path / 'news' / CHANGE_LOG_FILE
+    size = os.path.getsize(log_path)
+    with open(log_path, 'ab') as f:
+        f.write(b'{"op": "upsert", "ids": ["b"')
+
+    reloaded = FAISSBackend(store_path=str(tmp_path))
+    assert reloaded.list_ids('news') == ['a']
+    # Readers leave the torn entry alone, since another process may still be writing it; the next writer drops it
+    add(reloaded, 'news', ['c'], seed=2)
+    assert len(log_path.read_bytes()[size:].splitlines()) == 1
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['a', 'c']
+
+def test_writes_to_a_memory_mapped_index(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path), use_mmap=False)
+    add(backend, 'news', ['a', 'b'])
+    backend._save('news', backend._state('news'))
+
+    mapped = FAISSBackend(store_path=str(tmp_path), use_mmap=True)
+    assert not mapped._state('news')['owned']
+    add(mapped, 'news', ['c'], seed=1)
+    mapped.delete('news', ['a'])
+    assert sorted(mapped.list_ids('news')) == ['b', 'c']
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['b', 'c']
+
+def build(backend: FAISSBackend, namespace: str, ids, seed: int = 0, delete=()) -> np.ndarray:
+    name = backend.begin_build(namespace)
+    matrix = add(backend, name, ids, seed)
+    if delete:
+        backend.delete(name, list(delete))
+    backend.publish_build(name)
+    return matrix
+
+def test_builds_publish_versions_and_prune(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path), keep_versions=2)
+    for i in range(3):
+        build(backend, 'news', [str(i)], seed=i)
+    versions = backend.versions('news')
+    assert versions == ['v0000000002', 'v0000000003']
+    assert backend.current_version('news') == versions[-1]
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['0', '1', '2']
+
+def test_single_writes_stay_in_the_current_version(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    build(backend, 'news', ['a', 'b'])
+    backend.checkpoint('news')
+    add(backend, 'news', ['c'], seed=1)
+    backend.delete('news', ['a'])
+    assert backend.versions('news') == ['v0000000001']
+    assert len((tmp_path / 'news' / 'v0000000001' / CHANGE_LOG_FILE).read_text().splitlines()) == 2
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['b', 'c']
+
+def test_publish_links_the_saved_files(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path), keep_versions=3)
+    build(backend, 'news', ['a', 'b'])
+    backend.checkpoint('news')
+    build(backend, 'news', ['c'], seed=1)
+    first, second = (tmp_path / 'news' / version / INDEX_FILE for version in backend.versions('news'))
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    # A checkpoint of the new version replaces its files and leaves the old version as it was
+    backend.checkpoint('news')
+    assert os.stat(first).st_ino != os.stat(second).st_ino
+    assert backend.rollback('news') == 'v0000000001'
+    assert sorted(backend.list_ids('news')) == ['a', 'b']
+
+def test_rollback_restores_previous_version(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path), keep_versions=3)
+    build(backend, 'news', ['a'])
+    first = backend.current_version('news')
+    build(backend, 'news', ['b'], seed=1, delete=['a'])
+    assert backend.list_ids('news') == ['b']
+    assert backend.rollback('news') == first
+    assert backend.list_ids('news') == ['a']
+    assert FAISSBackend(store_path=str(tmp_path)).list_ids('news') == ['a']
+    assert backend.versions('news') == [first]
+    with pytest.raises(ValueError):
+        backend.rollback('news')
+
+def test_build_is_invisible_until_published(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    add(backend, 'news', ['a'])
+    name = backend.begin_build('news')
+    add(backend, name, ['b', 'c'], seed=1)
+    assert backend.delete(name, ['a', 'missing']) == 1
+    assert backend.list_ids('news') == ['a']
+    assert backend.current_version('news') is None
+    backend.publish_build(name)
+    assert sorted(backend.list_ids('news')) == ['b', 'c']
+    # Files from before the first build are replaced by the version
+    assert not (tmp_path / 'news' / CHANGE_LOG_FILE).exists()
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['b', 'c']
+
+def test_aborted_build_changes_nothing(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    build(backend, 'news', ['a'])
+    version = backend.current_version('news')
+    name = backend.begin_build('news')
+    add(backend, name, ['b'], seed=1)
+    backend.abort_build(name)
+    assert backend.list_ids('news') == ['a']
+    assert backend.current_version('news') == version
+    with pytest.raises(ValueError):
+        backend.publish_build(name)
+    with pytest.raises(ValueError):
+        add(backend, name, ['c'], seed=2)
+
+def test_build_rejects_vectors_of_another_dimension(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    add(backend, 'news', ['a'])
+    name = backend.begin_build('news')
+    with pytest.raises(ValueError):
+        backend.upsert(name, ['b'], np.ones((1, DIMENSION + 1), dtype='float32'), ['text b'], [{}])
+
+def test_writes_from_another_instance_are_kept(tmp_path):
+    first = FAISSBackend(store_path=str(tmp_path), reload_interval=3600)
+    second = FAISSBackend(store_path=str(tmp_path), reload_interval=3600)
+    add(first, 'news', ['a'])
+    add(second, 'news', ['b'], seed=1)
+    build(first, 'news', ['c'], seed=2)
+    add(second, 'news', ['d'], seed=3)
+    assert sorted(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == ['a', 'b', 'c', 'd']
+
+def test_reads_pick_up_other_writers_after_the_reload_interval(tmp_path):
+    writer = FAISSBackend(store_path=str(tmp_path))
+    reader = FAISSBackend(store_path=str(tmp_path), reload_interval=0)
+    cached = FAISSBackend(store_path=str(tmp_path), reload_interval=3600)
+    build(writer, 'news', ['a'])
+    assert reader.list_ids('news') == cached.list_ids('news') == ['a']
+
+    add(writer, 'news', ['b'], seed=1)
+    assert sorted(reader.list_ids('news')) == ['a', 'b']
+    assert reader.search('news', vectors(1, seed=1)[0], k=1)[0]['id'] == 'b'
+    build(writer, 'news', ['c'], seed=2, delete=['a'])
+    assert sorted(reader.list_ids('news')) == ['b', 'c']
+    writer.rollback('news')
+    assert sorted(reader.list_ids('news')) == ['a', 'b']
+    # Not checked again within its interval
+    assert cached.list_ids('news') == ['a']
+
+def _write(store_path: str, worker: int):
+    backend = FAISSBackend(store_path=store_path)
+    for i in range(5):
+        if i % 2:
+            build(backend, 'news', [f"{worker}-{i}"], seed=worker * 10 + i)
+        else:
+            add(backend, 'news', [f"{worker}-{i}"], seed=worker * 10 + i)
+
+def test_concurrent_processes_do_not_lose_writes(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_write, args=(str(tmp_path), worker)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+    assert len(FAISSBackend(store_path=str(tmp_path)).list_ids('news')) == 15
+
+@pytest.mark.parametrize('quantization', ['sq8', 'ivfpq'])
+def test_quantized_search_reranks_to_exact_scores(tmp_path, quantization):
+    backend = FAISSBackend(store_path=str(tmp_path), quantization=quantization, quantize_min_vectors=100, pq_m=4)
+    ids = [str(i) for i in range(400)]
+    matrix = add(backend, 'news', ids)
+    assert backend.memory_report('news')['quantization'] == quantization
+    match = backend.search('news', matrix[7], k=1)[0]
+    assert match['id'] == '7' and match['score'] == pytest.approx(1.0, abs=1e-5)
+
+def test_quantized_index_follows_writes_and_reloads(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path), quantization='sq8', quantize_min_vectors=10)
+    matrix = add(backend, 'news', [str(i) for i in range(50)])
+    backend.delete('news', ['3'])
+    assert '3' not in [match['id'] for match in backend.search('news', matrix[3], k=5)]
+    backend.checkpoint('news')
+    assert os.path.exists(os.path.join(str(tmp_path), 'news', 'vectors.sq8.faiss'))
+    report = backend.memory_report('news')
+    assert report['resident_bytes_per_vector'] < report['exact_bytes'] / report['vectors']
+
+    backend.upsert('news', ['new'], vectors(1, seed=9), ['text new'], [{}])
+    reloaded = FAISSBackend(store_path=str(tmp_path), quantization='sq8', quantize_min_vectors=10)
+    assert reloaded.memory_report('news')['vectors'] == 50
+    assert reloaded.search('news', vectors(1, seed=9)[0], k=1)[0]['id'] == 'new'
+
+def test_small_namespaces_stay_exact(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path), quantization='sq8', quantize_min_vectors=100)
+    add(backend, 'news', ['a', 'b'])
+    assert backend.memory_report('news')['quantization'] == 'none'
+    with pytest.raises(ValueError):
+        FAISSBackend(store_path=str(tmp_path), quantization='pq4')
+
+def test_namespaces_with_data_are_listed(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    add(backend, 'news', ['a'])
+    (tmp_path / 'empty').mkdir()
+    assert FAISSBackend(store_path=str(tmp_path)).namespaces() == ['news']
+
+def test_each_local_model_gets_its_own_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv('LOCAL_EMBEDDING_MODEL', raising=False)
+    assert model_store_path(index_model('openai'), str(tmp_path)) == str(tmp_path)
+    local = model_store_path(index_model('local'), str(tmp_path))
+    assert local == str(tmp_path / 'models' / 'BAAI_bge-small-en-v1.5')
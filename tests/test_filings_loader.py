@@ -0,0 +1,88 @@
+import os
+import zlib
+import numpy as np
+import pytest
+from data_ingestion.filings_loader import FilingsLoader, iter_html_pages, check_url, check_local_path, check_source
+from retrieval.faiss_backend import FAISSBackend
+
+class HashingEmbeddings:
+    """Deterministic bag-of-words embeddings that need no model."""
+
+    def embed_documents(self, texts):
+        vectors = np.zeros((len(texts), 32), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % 32] += 1.0
+        return vectors.tolist()
+
+def hashing_embeddings():
+    # Runs in the spawned workers, which count tokens offline like the tests
+    import retrieval.embedding_pipeline
+    retrieval.embedding_pipeline.HAS_TIKTOKEN = False
+    return HashingEmbeddings()
+
+def write_html(path, pages):
+    body = '<hr>'.join(f"<div><h2>Page {number}</h2><p>{text}</p></div>" for number, text in enumerate(pages, 1))
+    with open(path, 'w') as f:
+        f.write(f"<html><head><style>p {{ color: black }}</style></head><body>{body}</body></html>")
+
+def test_html_pages_split_at_page_breaks(tmp_path):
+    path = tmp_path / 'report.html'
+    path.write_text(
+        '<html><head><script>var x = 1;</script></head><body>'
+        '<p>Revenue rose</p><div style="page-break-before: always"><p>Capex</p>'
+        '<table><tr><td>2024</td><td>30.0</td></tr></table></div><hr><p>Outlook</p></body></html>'
+    )
+    assert list(iter_html_pages(str(path))) == ['Revenue rose', 'Capex\n\n2024 | 30.0', 'Outlook']
+
+@pytest.mark.parametrize('url', ['ftp://example.com/report.pdf', 'file:///etc/passwd', 'http://127.0.0.1/report.pdf', 'http://10.0.0.5/report.pdf', 'http://[::1]/report.pdf', 'http://169.254.169.254/latest/meta-data'])
+def test_urls_must_be_public_http(url):
+    with pytest.raises(ValueError):
+        check_url(url, allowed_hosts=[])
+
+def test_check_url_returns_the_address_to_connect_to():
+    assert check_url('https://93.184.216.34/report.pdf', allowed_hosts=[]) == '93.184.216.34'
+    with pytest.raises(ValueError, match='FILINGS_ALLOWED_HOSTS'):
+        check_url('https://93.184.216.34/report.pdf', allowed_hosts=['sec.gov'])
+
+def test_local_filings_must_be_inside_the_filings_dir(tmp_path):
+    filings = tmp_path / 'filings'
+    filings.mkdir()
+    (filings / 'report.html').write_text('<p>ok</p>')
+    (tmp_path / 'secret.txt').write_text('secret')
+    os.symlink(tmp_path / 'secret.txt', filings / 'link.html')
+    assert check_local_path(str(filings / 'report.html'), str(filings)) == os.path.realpath(filings / 'report.html')
+    for path in (tmp_path / 'secret.txt', filings / '..' / 'secret.txt', filings / 'link.html'):
+        with pytest.raises(ValueError):
+            check_source(str(path), str(filings))
+
+def test_loading_a_filing_outside_the_filings_dir_fails(tmp_path):
+    write_html(tmp_path / 'report.html', ['Revenue rose'])
+    loader = FilingsLoader(FAISSBackend(store_path=str(tmp_path / 'store')), workers=1, embeddings_factory=hashing_embeddings, filings_dir=str(tmp_path / 'filings'))
+    assert not loader.load(str(tmp_path / 'report.html'))['success']
+
+def test_html_filing_is_published_with_page_numbers(tmp_path):
+    write_html(tmp_path / 'report.html', ['Revenue rose on chip demand', 'Capex guidance unchanged', 'Dividend raised'])
+    backend = FAISSBackend(store_path=str(tmp_path / 'store'))
+    loader = FilingsLoader(backend, workers=1, pages_per_task=1, embeddings_factory=hashing_embeddings, filings_dir=str(tmp_path))
+
+    stats = loader.load(str(tmp_path / 'report.html'), {'symbol': 'TSM', 'date': '2025-12-31'})
+    assert stats['success'] and stats['pages'] == 3 and stats['chunks'] == 3
+    assert len(backend.versions('filings')) == 1
+    chunks = backend.fetch('filings', backend.list_ids('filings'))
+    assert sorted(chunk['metadata']['page'] for chunk in chunks.values()) == [1, 2, 3]
+    assert all(chunk['metadata']['symbol'] == 'TSM' for chunk in chunks.values())
+
+def test_reloading_a_filing_drops_pages_it_no_longer_has(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path / 'store'))
+    loader = FilingsLoader(backend, workers=1, pages_per_task=2, embeddings_factory=hashing_embeddings, filings_dir=str(tmp_path))
+    write_html(tmp_path / 'report.html', ['Revenue rose', 'Capex unchanged', 'Dividend raised'])
+    loader.load(str(tmp_path / 'report.html'), {'symbol': 'TSM'})
+    first = sorted(backend.list_ids('filings'))
+
+    write_html(tmp_path / 'report.html', ['Revenue rose', 'Capex cut'])
+    assert loader.load(str(tmp_path / 'report.html'), {'symbol': 'TSM'})['success']
+    assert sorted(backend.list_ids('filings')) == first[:2]
+    chunks = backend.fetch('filings', first[:2])
+    assert sorted(chunk['content'] for chunk in chunks.values()) == ['Page 1\n\nRevenue rose', 'Page 2\n\nCapex cut']
+    assert len(backend.versions('filings')) == 2
@@ -0,0 +1,79 @@
+import os
+import pytest
+from data_ingestion.html_extract import HTMLExtractor, HAS_BS4, HAS_LXML
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'sample_pages')
+
+BACKENDS = [
+    pytest.param('bs4', False, marks=pytest.mark.skipif(not HAS_BS4, reason='beautifulsoup4 not installed')),
+    pytest.param('bs4', True, marks=pytest.mark.skipif(not HAS_BS4, reason='beautifulsoup4 not installed')),
+    pytest.param('lxml', False, marks=pytest.mark.skipif(not HAS_LXML, reason='lxml not installed')),
+    pytest.param('lxml', True, marks=pytest.mark.skipif(not HAS_LXML, reason='lxml not installed'))
+]
+
+PAGE = """
+<html><body>
+  <div class="card story"><h3><a href="/a">TSMC lifts forecast</a></h3><p class="summary">Demand for AI chips</p></div>
+  <div class="card"><h3><a href="/b">Not a story</a></h3></div>
+  <div class="card story"><h3><a href="/c">Sony sensor sales</a></h3></div>
+  <h2>Earnings Estimate</h2>
+  <table>
+    <tr><th>Currency in USD</th><th>Current Qtr.</th></tr>
+    <tr><td>Avg. Estimate</td><td>2.31</td></tr>
+  </table>
+  <h2>Revenue Estimate</h2>
+  <table><tr><th>Currency in USD</th></tr><tr><td>Avg. Estimate</td></tr></table>
+</body></html>
+"""
+
+FIELDS = {'title': ('h3 a', None), 'link': ('h3 a', 'href'), 'summary': ('p.summary', None)}
+
+@pytest.mark.parametrize('backend,partial', BACKENDS)
+def test_extract_articles(backend, partial):
+    articles = HTMLExtractor(backend=backend, partial=partial).extract_articles(PAGE, 'div.card.story', FIELDS)
+    assert articles == [
+        {'title': 'TSMC lifts forecast', 'link': '/a', 'summary': 'Demand for AI chips'},
+        {'title': 'Sony sensor sales', 'link': '/c', 'summary': None}
+    ]
+
+@pytest.mark.parametrize('backend,partial', BACKENDS)
+def test_limit_stops_early(backend, partial):
+    extractor = HTMLExtractor(backend=backend, partial=partial)
+    assert len(extractor.extract_articles(PAGE, 'div.card', FIELDS, limit=2)) == 2
+    assert extractor.select_texts(PAGE, 'h3', limit=1) == ['TSMC lifts forecast']
+
+@pytest.mark.parametrize('backend,partial', BACKENDS)
+def test_tables_after_heading(backend, partial):
+    rows = HTMLExtractor(backend=backend, partial=partial).extract_tables_after_heading(PAGE, 'Earnings Estimate')
+    assert rows == [{'Currency in USD': 'Avg. Estimate', 'Current Qtr.': '2.31'}]
+
+@pytest.mark.skipif(not (HAS_BS4 and HAS_LXML), reason='needs both backends')
+def test_backends_agree_on_sample_pages():
+    selectors = {'yahoo_news.html': 'li.js-stream-content', 'cnbc_asia.html': 'div.Card-titleContainer', 'marketwatch_asia.html': 'div.article__content'}
+    for file_name, selector in selectors.items():
+        with open(os.path.join(SAMPLE_DIR, file_name), encoding='utf-8') as f:
+            html = f.read()
+        results = [HTMLExtractor(backend=backend, partial=partial).select_texts(html, selector, limit=10) for backend in ('bs4', 'lxml') for partial in (False, True)]
+        assert results[0]
+        assert all(result == results[0] for result in results)
+
+ARTICLE = """
+<html><body>
+  <header><p>Subscribe now</p></header>
+  <div class="sidebar"><p>Related: a short teaser</p></div>
+  <div class="story"><p>TSMC raised its revenue forecast.</p><p>Demand for AI chips stays strong.</p></div>
+  <footer><p>Copyright</p></footer>
+</body></html>
+"""
+
+@pytest.mark.parametrize('backend,partial', BACKENDS)
+def test_main_text_picks_the_densest_block(backend, partial):
+    text = HTMLExtractor(backend=backend, partial=partial).extract_main_text(ARTICLE)
+    assert text == 'TSMC raised its revenue forecast.\n\nDemand for AI chips stays strong.'
+
+@pytest.mark.parametrize('backend,partial', BACKENDS)
+def test_main_text_prefers_article_element(backend, partial):
+    html = '<div><p>' + 'Long unrelated text. ' * 20 + '</p></div><article><p>The story.</p></article>'
+    extractor = HTMLExtractor(backend=backend, partial=partial)
+    assert extractor.extract_main_text(html) == 'The story.'
+    assert extractor.extract_main_text(ARTICLE, max_chars=4) == 'TSMC'
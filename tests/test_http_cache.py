@@ -0,0 +1,105 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data_ingestion.http_cache import HTTPCache
+from data_ingestion.http_client import ScrapingClient
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = server.body.encode()
+        self.send_response(200)
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests, httpd.etag, httpd.body = [], '"v1"', '<p>first</p>'
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def page(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/page"
+
+def test_store_and_lookup_survive_restart(tmp_path):
+    cache = HTTPCache(cache_dir=str(tmp_path))
+    cache.store('https://a.com/x', 'body', etag='"e1"', last_modified='Mon, 07 Jul 2025 10:00:00 GMT')
+    cache.store_parsed('https://a.com/x', {'items': [1, 2]})
+
+    reopened = HTTPCache(cache_dir=str(tmp_path))
+    assert reopened.lookup('https://a.com/x')['parsed'] == {'items': [1, 2]}
+    assert reopened.read_body('https://a.com/x') == 'body'
+    assert reopened.conditional_headers('https://a.com/x') == {'If-None-Match': '"e1"', 'If-Modified-Since': 'Mon, 07 Jul 2025 10:00:00 GMT'}
+    assert reopened.lookup('https://a.com/missing') is None
+
+def test_new_body_drops_parsed_result(tmp_path):
+    cache = HTTPCache(cache_dir=str(tmp_path))
+    cache.store('https://a.com/x', 'old')
+    cache.store_parsed('https://a.com/x', ['old'])
+    cache.store('https://a.com/x', 'new')
+    assert cache.lookup('https://a.com/x')['parsed'] is None
+    assert cache.read_body('https://a.com/x') == 'new'
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = HTTPCache(cache_dir=str(tmp_path), max_bytes=10 ** 6)
+    for i in range(3):
+        cache.store(f"https://a.com/{i}", str(i) * 1000)
+    size = cache.lookup('https://a.com/0')['size']
+    cache.read_body('https://a.com/0')
+    cache.max_bytes = 3 * size
+    cache.store('https://a.com/3', '3' * 1000)
+    assert cache.lookup('https://a.com/1') is None
+    assert all(cache.lookup(f"https://a.com/{i}") for i in (0, 2, 3))
+    assert HTTPCache(cache_dir=str(tmp_path), max_bytes=3 * size).read_body('https://a.com/1') is None
+
+def test_unchanged_page_is_revalidated_and_not_reparsed(server, tmp_path):
+    client = ScrapingClient(cache=HTTPCache(cache_dir=str(tmp_path)))
+    parses = []
+    parser = lambda html: parses.append(html) or html.upper()
+    try:
+        first = client.parse_response(client.fetch(page(server)), parser)
+        second = client.fetch(page(server))
+    finally:
+        client.close()
+    assert first == '<P>FIRST</P>'
+    assert second['not_modified'] and not second['from_cache']
+    assert client.parse_response(second, parser) == first
+    assert parses == ['<p>first</p>']
+    assert server.requests[1]['If-None-Match'] == '"v1"'
+
+def test_changed_page_is_downloaded_again(server, tmp_path):
+    client = ScrapingClient(cache=HTTPCache(cache_dir=str(tmp_path)))
+    try:
+        client.fetch(page(server))
+        server.etag, server.body = '"v2"', '<p>second</p>'
+        result = client.fetch(page(server))
+    finally:
+        client.close()
+    assert not result['not_modified'] and result['text'] == '<p>second</p>'
+
+def test_min_interval_serves_cache_without_a_request(server, tmp_path):
+    client = ScrapingClient(cache=HTTPCache(cache_dir=str(tmp_path)))
+    try:
+        first = client.fetch(page(server), min_interval=3600)
+        result = client.fetch(page(server), min_interval=3600)
+    finally:
+        client.close()
+    assert result['from_cache'] and result['text'] == '<p>first</p>'
+    assert abs(result['fetched_at'] - first['fetched_at']) < 1
+    assert len(server.requests) == 1
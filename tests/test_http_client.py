@@ -0,0 +1,107 @@
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data_ingestion.http_client import ScrapingClient
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        host = self.headers['Host'].split(':')[0]
+        with server.lock:
+            server.ports.add(self.client_address[1])
+            server.active[host] = server.active.get(host, 0) + 1
+            server.peak[host] = max(server.peak.get(host, 0), server.active[host])
+        time.sleep(float(self.path.rsplit('/', 1)[-1] or 0))
+        with server.lock:
+            server.active[host] -= 1
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that timed out have closed the connection
+        pass
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setenv('SCRAPER_CACHE', 'off')
+
+@pytest.fixture
+def server():
+    httpd = Server(('127.0.0.1', 0), Handler)
+    httpd.lock = threading.Lock()
+    httpd.ports, httpd.active, httpd.peak = set(), {}, {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def url(server, delay: float = 0, host: str = '127.0.0.1') -> str:
+    return f"http://{host}:{server.server_address[1]}/page/{delay}"
+
+def test_sequential_fetches_reuse_one_connection(server):
+    client = ScrapingClient()
+    try:
+        for _ in range(5):
+            assert client.fetch(url(server))['status_code'] == 200
+    finally:
+        client.close()
+    assert len(server.ports) == 1
+
+def test_per_host_limit_caps_concurrent_fetches(server):
+    client = ScrapingClient(max_workers=8, per_host_limit=2)
+    try:
+        results = client.fetch_all([{'url': url(server, 0.2), 'name': f"page-{i}"} for i in range(6)])
+    finally:
+        client.close()
+    assert [result['source'] for result in results] == [f"page-{i}" for i in range(6)]
+    assert all(result['status_code'] == 200 for result in results)
+    assert server.peak['127.0.0.1'] == 2
+
+def test_hosts_have_separate_limits(server):
+    client = ScrapingClient(max_workers=8, per_host_limit=1)
+    try:
+        start = time.perf_counter()
+        client.fetch_all([{'url': url(server, 0.3, host)} for host in ('127.0.0.1', 'localhost')])
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+    assert server.peak == {'127.0.0.1': 1, 'localhost': 1}
+    assert elapsed < 0.55
+
+def test_failures_are_reported_not_raised(server):
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        closed_port = unused.getsockname()[1]
+    client = ScrapingClient(read_timeout=0.1)
+    try:
+        refused = client.fetch(f"http://127.0.0.1:{closed_port}/", source='down')
+        slow = client.fetch(url(server, 0.5), source='slow')
+    finally:
+        client.close()
+    assert refused['status_code'] is None and refused['error']
+    assert slow['status_code'] is None and slow['error']
+    report = client.latency_report()
+    assert report['down']['count'] == 1 and report['slow']['count'] == 1
+
+def test_download_connects_to_the_pinned_address(server, tmp_path):
+    client = ScrapingClient()
+    try:
+        # The host does not resolve, so the request can only reach the server through the pinned address
+        result = client.download(url(server, host='filings.invalid'), str(tmp_path / 'page'), address='127.0.0.1')
+    finally:
+        client.close()
+    assert result['status_code'] == 200 and result['bytes'] == len('/page/0')
+    assert (tmp_path / 'page').read_bytes() == b'/page/0'
+    assert 'filings.invalid' in server.peak
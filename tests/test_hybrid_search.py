@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.lexical_index import BM25Index
+from retrieval.hybrid_search import hybrid_search
+from retrieval.financial_documents import financial_document
+
+def unit(*values) -> list:
+    vector = np.asarray(values, dtype='float32')
+    return (vector / np.linalg.norm(vector)).tolist()
+
+@pytest.fixture
+def store(tmp_path):
+    backend = FAISSBackend(store_path=str(tmp_path))
+    lexical = BM25Index()
+    chunks = {
+        'semantic': ('chip demand outlook', unit(1, 0, 0), {'symbol': 'TSM'}),
+        'lexical': ('foundry capex guidance', unit(0.6, 0.8, 0), {'symbol': 'TSM'}),
+        'other': ('handset sales', unit(0, 0, 1), {'symbol': 'SONY'})
+    }
+    backend.upsert('news', list(chunks), [vector for _, vector, _ in chunks.values()], [text for text, _, _ in chunks.values()], [metadata for _, _, metadata in chunks.values()])
+    for chunk, (text, _, metadata) in chunks.items():
+        lexical.add(chunk, text, metadata)
+    return backend, lexical
+
+def test_lexical_match_is_raised_but_never_lowered(store):
+    backend, lexical = store
+    plain = {match['id']: match['score'] for match in backend.search('news', unit(1, 0.3, 0), k=3)}
+    assert max(plain, key=plain.get) == 'semantic'
+    fused = hybrid_search(backend, 'news', 'foundry capex', unit(1, 0.3, 0), lexical, k=3, lexical_weight=0.9)
+    assert fused[0]['id'] == 'lexical'
+    assert all(match['score'] >= plain[match['id']] - 1e-6 for match in fused)
+    assert [match['score'] for match in fused] == sorted((match['score'] for match in fused), reverse=True)
+
+def test_lexical_hits_missed_by_the_vector_search_are_fetched(store):
+    backend, lexical = store
+    fillers = [f"filler-{i}" for i in range(3)]
+    backend.upsert('news', fillers, [unit(1, 0.1 * i, 0.1) for i in range(3)], ['memory prices'] * 3, [{}] * 3)
+    vector_ids = [match['id'] for match in backend.search('news', unit(1, 0.3, 0), k=3)]
+    assert 'other' not in vector_ids
+    fused = hybrid_search(backend, 'news', 'handset sales', unit(1, 0.3, 0), lexical, k=1, lexical_weight=1.0)
+    assert fused[0]['id'] == 'other' and fused[0]['score'] == pytest.approx(1.0)
+
+def test_filter_applies_to_lexical_hits(store):
+    backend, lexical = store
+    fused = hybrid_search(backend, 'news', 'handset sales', unit(0, 0, 1), lexical, k=3, filter={'symbol': 'TSM'})
+    assert {match['id'] for match in fused} == {'semantic', 'lexical'}
+
+def test_financial_documents_are_keyed_by_record():
+    earnings = financial_document({'symbol': 'TSM', 'date': '2025-07-17', 'surprise_pct': float('nan')}, 'earnings')
+    assert earnings['metadata']['surprise_pct'] == 0.0
+    assert earnings['key'] == financial_document({'symbol': 'TSM', 'date': '2025-07-17', 'surprise_pct': 3.0}, 'earnings')['key']
+    news = financial_document({'title': 'TSMC raises capex', 'tickers': ['TSM'], 'body': 'Full text'}, 'news')
+    assert news['metadata']['symbols'] == ['TSM'] and news['content'].endswith('Full text')
@@ -0,0 +1,23 @@
+from data_ingestion.keyword_matcher import KeywordMatcher, get_keyword_matcher, ticker_keywords
+
+def test_matches_whole_words_only():
+    matcher = KeywordMatcher({'JD': 'JD', 'TSMC': 'TSM', 'chip': None})
+    assert matcher.match('JD.com and TSMC chip orders') == {'keywords': ['JD', 'TSMC', 'chip'], 'tickers': ['JD', 'TSM']}
+    assert matcher.match('JDX ajd chips') == {'keywords': [], 'tickers': []}
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher({'taiwan semiconductor': 'TSM', 'semiconductor': None})
+    found = {matcher.keywords[index] for _, _, index in matcher.find('Taiwan Semiconductor shares')}
+    assert found == {'taiwan semiconductor', 'semiconductor'}
+
+def test_match_is_case_insensitive_across_fields():
+    matcher = KeywordMatcher({'Samsung': '005930.KS'})
+    assert matcher.match('', 'SAMSUNG results')['tickers'] == ['005930.KS']
+
+def test_get_keyword_matcher_reuses_matchers():
+    assert get_keyword_matcher(['ai', 'chip']) is get_keyword_matcher(['chip', 'ai'])
+
+def test_ticker_keywords_maps_aliases_and_topics():
+    keywords = ticker_keywords({'TSM': ['TSMC', 'Taiwan Semiconductor']}, ['foundry'])
+    assert keywords['TSMC'] == 'TSM' and keywords['Taiwan Semiconductor'] == 'TSM'
+    assert keywords['foundry'] is None
@@ -0,0 +1,34 @@
+from retrieval.lexical_index import BM25Index
+
+def index() -> BM25Index:
+    lexical = BM25Index()
+    lexical.add('a', 'TSMC raises capex on strong AI chip demand', {'symbols': ['TSM']})
+    lexical.add('b', 'Sony camera sales slow in Europe', {'symbol': 'SONY'})
+    lexical.add('c', 'Chip exports from Taiwan hit a record', {'keywords': ['semiconductors']})
+    return lexical
+
+def test_search_ranks_by_term_overlap():
+    results = index().search('AI chip demand', k=3)
+    assert [doc_id for doc_id, _ in results] == ['a', 'c']
+    assert results[0][1] > results[1][1] > 0
+
+def test_metadata_fields_are_searchable():
+    assert index().search('semiconductors')[0][0] == 'c'
+
+def test_score_of_unknown_or_unmatched_chunks_is_zero():
+    scores = index().score('camera', ['a', 'b', 'missing'])
+    assert scores['a'] == 0.0 and scores['missing'] == 0.0 and scores['b'] > 0
+
+def test_symbols_follow_updates_and_removals():
+    lexical = index()
+    assert lexical.known_symbols('How did tsm and SONY trade?') == {'tsm', 'sony'}
+    assert lexical.symbol_docs(['TSM']) == ['a']
+
+    lexical.add('a', 'TSMC guidance unchanged', {'symbols': ['2330.TW']})
+    assert lexical.symbol_docs(['TSM']) == []
+    assert lexical.search('capex') == []
+
+    lexical.remove('b')
+    lexical.remove('missing')
+    assert len(lexical) == 2
+    assert lexical.known_symbols('sony') == set()
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from retrieval.query_analyzer import QueryAnalyzer, DEFAULT_NAMESPACES
+
+NOW = datetime(2025, 7, 15, 12, 30, tzinfo=timezone.utc)
+
+def timestamp(*day) -> float:
+    return datetime(*day, tzinfo=timezone.utc).timestamp()
+
+def test_ticker_intent_and_quarter():
+    analysis = QueryAnalyzer().analyze('What did TSMC report in Q2 2025?', now=NOW)
+    assert analysis['tickers'] == ['TSM']
+    assert analysis['companies'] == ['TSMC']
+    assert analysis['intents'] == ['earnings']
+    assert analysis['namespaces'] == ['earnings', 'news', 'filings', 'stock_data']
+    assert analysis['date_range']['start'] == timestamp(2025, 4, 1)
+    assert analysis['date_range']['end'] == timestamp(2025, 7, 1)
+
+def test_filters_combine_symbol_and_exclusive_range():
+    analysis = QueryAnalyzer().analyze('What did TSMC report in Q2 2025?', now=NOW)
+    time_range = {'timestamp': {'$gte': timestamp(2025, 4, 1), '$lt': timestamp(2025, 7, 1)}}
+    assert analysis['filters']['earnings'] == {'$and': [{'symbol': {'$in': ['TSM']}}, time_range]}
+    # News chunks list the tickers they mention instead of a single symbol
+    assert analysis['filters']['news'] == {'$and': [{'symbols': {'$in': ['TSM']}}, time_range]}
+
+def test_exchange_symbols_and_company_aliases():
+    assert QueryAnalyzer().analyze('Samsung news last week', now=NOW)['tickers'] == ['005930.KS']
+    assert QueryAnalyzer().analyze('How did 6758.T trade?', now=NOW)['tickers'] == ['6758.T']
+
+def test_unknown_intent_searches_default_namespaces():
+    analysis = QueryAnalyzer().analyze('How is the market today?', now=NOW)
+    assert analysis['namespaces'] == DEFAULT_NAMESPACES
+    assert analysis['date_range'] is None
+    assert analysis['filters'] == {}
+
+def test_invalid_date_is_ignored():
+    analysis = QueryAnalyzer().analyze('price on 2025-02-30', now=NOW)
+    assert analysis['date_range'] is None
+    assert analysis['filters'] == {}
+
+def test_iso_date_covers_one_day():
+    date_range = QueryAnalyzer().date_range('news on 2025-03-04', NOW)
+    assert (date_range['start'], date_range['end']) == (timestamp(2025, 3, 4), timestamp(2025, 3, 5))
+
+def test_filing_questions_search_the_filings_namespace():
+    analysis = QueryAnalyzer().analyze('What does the TSMC 20-F filing say about capex?', now=NOW)
+    assert analysis['intents'] == ['filings']
+    assert analysis['namespaces'][0] == 'filings'
+    assert analysis['filters']['filings'] == {'symbol': {'$in': ['TSM']}}
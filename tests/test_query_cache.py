@@ -0,0 +1,71 @@
+import pytest
+from retrieval.query_cache import QueryCache, analysis_scope, normalize_query
+
+SCOPE = analysis_scope({'tickers': ['TSM'], 'namespaces': ['earnings', 'news'], 'date_range': None})
+RESPONSE = {'answer': 'TSMC beat estimates', 'confidence': 80.0, 'sources': []}
+
+@pytest.fixture
+def versions():
+    return {}
+
+@pytest.fixture
+def cache(versions, tmp_path):
+    return QueryCache(lambda namespace: versions.get(namespace, 0), max_entries=3, threshold=0.95, ttl=60, audio_dir=str(tmp_path))
+
+def test_near_duplicate_query_hits(cache):
+    cache.store([1.0, 0.0, 0.0], SCOPE, {}, RESPONSE)
+    assert cache.lookup([0.99, 0.05, 0.0], SCOPE)['answer'] == 'TSMC beat estimates'
+    assert cache.lookup([0.0, 1.0, 0.0], SCOPE) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_different_scope_misses(cache):
+    cache.store([1.0, 0.0], SCOPE, {}, RESPONSE)
+    other = analysis_scope({'tickers': ['005930.KS'], 'namespaces': ['earnings', 'news'], 'date_range': None})
+    assert cache.lookup([1.0, 0.0], other) is None
+
+def test_reindexed_namespace_invalidates(cache, versions):
+    cache.store([1.0, 0.0], SCOPE, {'earnings': 0, 'news': 0}, RESPONSE)
+    versions['news'] = 1
+    assert cache.lookup([1.0, 0.0], SCOPE) is None
+    assert cache.stats()['invalidations'] == 1 and cache.stats()['entries'] == 0
+
+def test_expired_entry_misses(cache, monkeypatch):
+    cache.store([1.0, 0.0], SCOPE, {}, RESPONSE)
+    monkeypatch.setattr('retrieval.query_cache.time.time', lambda: 10 ** 10)
+    assert cache.lookup([1.0, 0.0], SCOPE) is None
+
+def test_least_recently_used_is_evicted(cache):
+    for axis in range(3):
+        vector = [0.0] * 4
+        vector[axis] = 1.0
+        cache.store(vector, SCOPE, {}, dict(RESPONSE, answer=str(axis)))
+    assert cache.lookup([1.0, 0.0, 0.0, 0.0], SCOPE)['answer'] == '0'
+    cache.store([0.0, 0.0, 0.0, 1.0], SCOPE, {}, dict(RESPONSE, answer='3'))
+    assert cache.lookup([0.0, 1.0, 0.0, 0.0], SCOPE) is None
+    assert cache.lookup([1.0, 0.0, 0.0, 0.0], SCOPE)['answer'] == '0'
+    assert cache.stats()['entries'] == 3
+
+def test_queries_without_embedding_are_cached_by_text(cache):
+    cache.store(None, SCOPE, {}, RESPONSE, query='TSM price today?')
+    assert normalize_query('  tsm PRICE today ') == 'tsm price today'
+    assert cache.lookup(None, SCOPE, query='tsm price  today')['answer'] == 'TSMC beat estimates'
+    assert cache.lookup(None, SCOPE, query='TSM volume today') is None
+    other = analysis_scope({'tickers': ['TSM'], 'namespaces': ['stock_data'], 'date_range': None})
+    assert cache.lookup(None, other, query='TSM price today?') is None
+
+def test_storing_the_same_text_replaces_the_entry(cache):
+    cache.store([1.0, 0.0], SCOPE, {}, RESPONSE, query='How did TSMC do?')
+    cache.store([1.0, 0.0], SCOPE, {}, dict(RESPONSE, answer='newer'), query='how did tsmc do')
+    assert cache.stats()['entries'] == 1
+    assert cache.lookup([1.0, 0.0], SCOPE)['answer'] == 'newer'
+
+def test_audio_is_copied_and_removed_with_the_entry(cache, versions, tmp_path):
+    spoken = tmp_path / 'answer.mp3'
+    spoken.write_bytes(b'mp3')
+    entry = cache.store([1.0, 0.0], SCOPE, {'news': 0}, RESPONSE, audio_file=str(spoken))
+    spoken.unlink()
+    assert open(entry['audio_file'], 'rb').read() == b'mp3'
+    versions['news'] = 1
+    cache.lookup([1.0, 0.0], SCOPE)
+    with pytest.raises(OSError):
+        open(entry['audio_file'], 'rb')
@@ -0,0 +1,56 @@
+import time
+from retrieval.record_store import RecordStore
+
+def stock(symbol: str, date: str, price: float, change_pct: float) -> dict:
+    return {'symbol': symbol, 'date': date, 'name': symbol, 'price': price, 'change_pct': change_pct, 'volume': '1200'}
+
+def test_upsert_normalizes_keys_and_replaces(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    assert store.upsert('stock_data', [stock('tsm', '2025-07-01T16:00:00', 180.0, 1.0), {'symbol': 'TSM'}]) == 1
+    store.upsert('stock_data', [stock('TSM', '2025-07-01', 181.5, 1.5)])
+    records = store.query('stock_data', symbols=['tsm'])
+    assert store.count('stock_data') == 1
+    assert records[0]['symbol'] == 'TSM' and records[0]['date'] == '2025-07-01'
+    assert records[0]['price'] == 181.5 and records[0]['volume'] == 1200
+
+def test_query_latest_and_date_range(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    store.upsert('stock_data', [stock('TSM', day, 180.0 + i, 0.5) for i, day in enumerate(['2025-07-01', '2025-07-02', '2025-07-03'])])
+    assert [r['date'] for r in store.query('stock_data', symbols=['TSM'])] == ['2025-07-03']
+    history = store.query('stock_data', symbols=['TSM'], start='2025-07-01', end='2025-07-03', latest=False)
+    assert [r['date'] for r in history] == ['2025-07-02', '2025-07-01']
+
+def test_query_without_symbols_ranks_largest_moves(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    store.upsert('stock_data', [stock('TSM', '2025-07-01', 180.0, 0.5), stock('SONY', '2025-07-01', 25.0, -4.0), stock('JD', '2025-07-01', 33.0, 2.0)])
+    assert [r['symbol'] for r in store.query('stock_data', limit=2)] == ['SONY', 'JD']
+
+def test_sentiment_round_trips_indicators(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    store.upsert('sentiment', [{'date': '2025-07-01', 'overall_sentiment': 'bullish', 'sentiment_score': 0.4, 'key_indicators': [{'headline': 'Chip demand'}]}])
+    assert store.query('sentiment')[0]['key_indicators'] == [{'headline': 'Chip demand'}]
+
+def test_known_symbols_sees_new_records(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    assert store.known_symbols('how is tsm doing') == set()
+    store.upsert('earnings', [{'symbol': '005930.KS', 'date': '2025-07-01', 'reported_eps': 1.2}, {'symbol': 'TSM', 'date': '2025-07-01'}])
+    assert store.known_symbols('how is tsm doing vs 005930.ks') == {'TSM', '005930.KS'}
+
+def test_prune_by_age_and_count(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    today = time.strftime('%Y-%m-%d')
+    store.upsert('stock_data', [stock('TSM', '2000-01-03', 50.0, 0.1), stock('TSM', '2000-01-04', 51.0, 0.1), stock('TSM', today, 180.0, 0.1)])
+    assert store.prune('stock_data', keep_latest=2) == 1
+    assert store.prune('stock_data', max_age_days=30) == 1
+    assert [r['date'] for r in store.query('stock_data', latest=False)] == [today]
+
+def test_dry_run_counts_what_prune_would_delete(tmp_path):
+    store = RecordStore(db_path=str(tmp_path / 'records.db'))
+    today = time.strftime('%Y-%m-%d')
+    store.upsert('stock_data', [stock('TSM', '2000-01-03', 50.0, 0.1), stock('TSM', '2000-01-04', 51.0, 0.1), stock('TSM', today, 180.0, 0.1), stock('JD', '2000-01-04', 30.0, 0.1)])
+    assert store.prune('stock_data', max_age_days=30, keep_latest=2, dry_run=True) == 3
+    assert store.count('stock_data') == 4
+    assert store.prune('stock_data', max_age_days=30, keep_latest=2) == 3
+    assert store.count('stock_data') == 1
+    store.upsert('sentiment', [{'date': '2000-01-03', 'sentiment_score': 0.1}, {'date': today, 'sentiment_score': 0.2}])
+    assert store.prune('sentiment', max_age_days=30, keep_latest=1, dry_run=True) == 1
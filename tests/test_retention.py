@@ -0,0 +1,67 @@
+import numpy as np
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.record_store import RecordStore
+from retrieval.retention import RetentionJob, expired_chunks
+
+NOW = 1_750_000_000.0
+DAY = 86400
+
+def backend_with(tmp_path, namespace: str, metadatas) -> FAISSBackend:
+    backend = FAISSBackend(store_path=str(tmp_path))
+    ids = [f"chunk-{i}" for i in range(len(metadatas))]
+    vectors = np.random.default_rng(0).standard_normal((len(ids), 8)).astype('float32')
+    backend.upsert(namespace, ids, vectors, [f"text {i}" for i in ids], metadatas)
+    return backend
+
+def test_old_chunks_expire_and_untimed_chunks_are_kept(tmp_path):
+    backend = backend_with(tmp_path, 'news', [
+        {'timestamp': NOW - 20 * DAY},
+        {'timestamp': NOW - 2 * DAY},
+        {'indexed_at': NOW - 30 * DAY},
+        {}
+    ])
+    found = expired_chunks(backend, 'news', {'max_age_days': 14, 'keep_latest': 0}, now=NOW)
+    assert found['chunks'] == 4
+    assert sorted(found['expired']) == ['chunk-0', 'chunk-2']
+
+def test_only_the_latest_versions_of_each_symbol_are_kept(tmp_path):
+    backend = backend_with(tmp_path, 'stock_data', [
+        {'symbol': 'TSM', 'record_key': f"TSM:{day}", 'timestamp': NOW - day * DAY} for day in range(4)
+    ] + [
+        {'symbol': 'SONY', 'record_key': 'SONY:0', 'timestamp': NOW}
+    ])
+    found = expired_chunks(backend, 'stock_data', {'max_age_days': 0, 'keep_latest': 2}, now=NOW)
+    assert sorted(found['expired']) == ['chunk-2', 'chunk-3']
+
+def test_dry_run_reports_without_deleting(tmp_path):
+    backend = backend_with(tmp_path, 'news', [{'timestamp': 1.0}, {'timestamp': 2.0}])
+    history = tmp_path / 'history.jsonl'
+    job = RetentionJob(backend, policies={'news': {'max_age_days': 1, 'keep_latest': 0}}, history_path=str(history))
+    entry = job.run_once(dry_run=True)[0]
+    assert (entry['chunks_before'], entry['removed'], entry['chunks_after']) == (2, 2, 2)
+    assert len(backend.list_ids('news')) == 2
+    assert not history.exists()
+
+def test_run_deletes_in_one_batch_and_records_sizes(tmp_path):
+    backend = backend_with(tmp_path, 'news', [{'timestamp': 1.0}, {'timestamp': 2.0}, {'timestamp': 4e9}])
+    calls = []
+
+    def delete(namespace, ids):
+        calls.append((namespace, sorted(ids)))
+        return backend.delete(namespace, ids)
+
+    job = RetentionJob(backend, policies={'news': {'max_age_days': 1, 'keep_latest': 0}}, delete_chunks=delete, history_path=str(tmp_path / 'history.jsonl'))
+    job.run_once()
+    assert calls == [('news', ['chunk-0', 'chunk-1'])]
+    assert backend.list_ids('news') == ['chunk-2']
+    assert [(entry['namespace'], entry['chunks_after']) for entry in job.history()] == [('news', 1)]
+
+def test_dry_run_counts_expired_records(tmp_path):
+    records = RecordStore(db_path=str(tmp_path / 'records.db'))
+    records.upsert('stock_data', [{'symbol': 'TSM', 'date': f"2025-07-0{day}", 'price': 180.0} for day in range(1, 5)])
+    job = RetentionJob(FAISSBackend(store_path=str(tmp_path)), policies={'stock_data': {'max_age_days': 0, 'keep_latest': 1}}, record_store=records, history_path=str(tmp_path / 'history.jsonl'))
+    entry = [entry for entry in job.run_once(dry_run=True) if entry['store'] == 'records'][0]
+    assert (entry['chunks_before'], entry['removed'], entry['chunks_after']) == (4, 3, 4)
+    assert records.count('stock_data') == 4
+    entry = [entry for entry in job.run_once() if entry['store'] == 'records'][0]
+    assert (entry['removed'], entry['chunks_after']) == (3, 1)
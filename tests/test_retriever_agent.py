@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.record_store import RecordStore
+
+# Needs the LangChain version the agent is written against
+pytest.importorskip('langchain.embeddings.openai')
+RetrieverAgent = pytest.importorskip('agents.retriever_agent').RetrieverAgent
+
+class FakeEmbeddings:
+    """Deterministic embeddings: one axis per distinct word, counting embed calls."""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.query_calls = 0
+
+    def _embed(self, text: str):
+        vector = np.zeros(64, dtype='float32')
+        for word in text.lower().split():
+            vector[self.vocabulary.setdefault(word, len(self.vocabulary) % 64)] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return self._embed(text)
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('EMBEDDING_CACHE', 'off')
+    agent = RetrieverAgent(backend=FAISSBackend(store_path=str(tmp_path)), record_store=RecordStore(db_path=str(tmp_path / 'records.db')))
+    agent.embeddings = agent.embedding_pipeline.embeddings = FakeEmbeddings()
+    return agent
+
+def test_asia_tech_info_embeds_once_and_merges_namespaces(agent):
+    agent.index_documents([{'content': 'tsmc chip demand rises', 'metadata': {'type': 'news'}}], namespace='news')
+    agent.index_documents([{'content': 'tsmc chip earnings beat', 'metadata': {'type': 'earnings'}}], namespace='earnings')
+    agent.index_documents([{'content': 'sony camera sales', 'metadata': {'type': 'stock_data'}}], namespace='stock_data')
+
+    info = agent.retrieve_asia_tech_info('tsmc chip demand', confidence_threshold=0)
+    assert agent.embeddings.query_calls == 1
+    confidences = [result['confidence'] for result in info['results']]
+    assert confidences == sorted(confidences, reverse=True)
+    assert len(info['results']) == 3
+    assert info['top_result']['content'] == 'tsmc chip demand rises'
+
+def test_reindexing_a_record_overwrites_it_and_drops_stale_chunks(agent):
+    agent.chunker.split = lambda text, namespace: text.split('|')
+    agent.index_documents([{'content': 'one|two|three', 'metadata': {}, 'key': 'TSM'}], namespace='finance')
+    agent.index_documents([{'content': 'one|two|three', 'metadata': {}, 'key': 'TSM'}], namespace='finance')
+    assert len(agent.vector_backend.list_ids('finance')) == 3
+
+    agent.index_documents([{'content': 'uno|dos', 'metadata': {}, 'key': 'TSM'}], namespace='finance')
+    chunks = agent.vector_backend.fetch('finance', agent.vector_backend.list_ids('finance'))
+    assert sorted(chunk['content'] for chunk in chunks.values()) == ['dos', 'uno']
+    assert all(chunk['metadata']['chunk_count'] == 2 for chunk in chunks.values())
+
+def test_failed_records_keep_their_previous_chunks(agent):
+    agent.chunker.split = lambda text, namespace: text.split('|')
+    agent.embedding_pipeline.max_batch_size = 1
+    agent.embedding_pipeline.max_retries = 0
+    agent.index_documents([
+        {'content': 'tsmc old|tsmc older', 'metadata': {}, 'key': 'TSM'},
+        {'content': 'jd old', 'metadata': {}, 'key': 'JD'}
+    ], namespace='finance')
+
+    embed_documents = agent.embeddings.embed_documents
+
+    def failing(texts):
+        if 'tsmc broken' in texts:
+            raise RuntimeError('embedding failed')
+        return embed_documents(texts)
+
+    agent.embeddings.embed_documents = failing
+    assert not agent.index_documents([
+        {'content': 'tsmc new|tsmc broken|tsmc extra', 'metadata': {}, 'key': 'TSM'},
+        {'content': 'jd new', 'metadata': {}, 'key': 'JD'}
+    ], namespace='finance')
+
+    chunks = agent.vector_backend.fetch('finance', agent.vector_backend.list_ids('finance'))
+    assert sorted(chunk['content'] for chunk in chunks.values()) == ['jd new', 'tsmc old', 'tsmc older']
+    restored = agent.retrieve('tsmc old', namespace='finance', k=1)[0]
+    assert restored['content'] == 'tsmc old' and restored['score'] > 0.99
+
+def test_each_index_call_publishes_one_version(agent):
+    backend = agent.vector_backend
+    agent.index_documents([{'content': 'foundry capex rises', 'metadata': {}, 'key': 'a'}], namespace='news')
+    agent.index_documents([{'content': 'memory prices fall', 'metadata': {}, 'key': 'b'}], namespace='news')
+    assert backend.versions('news') == ['v0000000001', 'v0000000002']
+
+    with agent.batch('news'):
+        agent.index_documents([{'content': 'handset sales slow', 'metadata': {}, 'key': 'c'}], namespace='news')
+        agent.delete_chunks('news', [chunk for chunk in backend.list_ids('news') if backend.fetch('news', [chunk])[chunk]['metadata']['record_key'] == 'a'])
+        assert len(backend.list_ids('news')) == 2
+    assert backend.current_version('news') == 'v0000000003'
+    assert sorted(doc['content'] for doc in backend.fetch('news', backend.list_ids('news')).values()) == ['handset sales slow', 'memory prices fall']
+
+def test_a_failed_batch_publishes_nothing(agent):
+    agent.index_documents([{'content': 'foundry capex rises', 'metadata': {}, 'key': 'a'}], namespace='news')
+    version = agent.namespace_version('news')
+    with pytest.raises(RuntimeError):
+        with agent.batch('news'):
+            agent.index_documents([{'content': 'memory prices fall', 'metadata': {}, 'key': 'b'}], namespace='news')
+            raise RuntimeError('crawl failed')
+    assert agent.vector_backend.current_version('news') == 'v0000000001'
+    assert len(agent.vector_backend.list_ids('news')) == 1 and agent.namespace_version('news') == version
+
+def test_ticker_queries_skip_the_embedding(agent):
+    agent.index_documents([
+        {'content': 'Symbol: TSM price 180', 'metadata': {'symbol': 'TSM', 'date': '2024-01-17'}, 'key': 'TSM:2024-01-17'},
+        {'content': 'Symbol: TSM price 182', 'metadata': {'symbol': 'TSM', 'date': '2024-01-18'}, 'key': 'TSM:2024-01-18'}
+    ], namespace='stock_data')
+    results = agent.retrieve('how is TSM doing', namespace='stock_data', k=1, query_vector=agent.query_embedder('how is TSM doing'))
+    assert [result['content'] for result in results] == ['Symbol: TSM price 182']
+    assert agent.embeddings.query_calls == 0
+
+def test_lexical_index_follows_indexing(agent):
+    agent.index_documents([{'content': 'foundry capex rises', 'metadata': {}, 'key': 'a'}], namespace='news')
+    assert agent.retrieve('foundry capex', namespace='news')[0]['content'] == 'foundry capex rises'
+    agent.index_documents([{'content': 'memory prices fall', 'metadata': {}, 'key': 'a'}], namespace='news')
+    lexical = agent._lexical['news']
+    assert lexical.search('foundry') == [] and len(lexical) == 1
+
+def test_news_is_filtered_by_the_tickers_it_mentions(agent):
+    agent.index_documents([
+        {'content': 'chip demand rises at the foundry', 'metadata': {'type': 'news', 'symbols': ['TSM']}, 'key': 'a'},
+        {'content': 'chip demand rises for handsets', 'metadata': {'type': 'news', 'symbols': ['SONY']}, 'key': 'b'}
+    ], namespace='news')
+    info = agent.retrieve_asia_tech_info('TSMC chip demand news', confidence_threshold=0)
+    assert info['query_analysis']['filters']['news'] == {'symbols': {'$in': ['TSM']}}
+    assert [result['content'] for result in info['results'] if result['metadata'].get('type') == 'news'] == ['chip demand rises at the foundry']
+
+def test_reindexing_bumps_the_namespace_version(agent):
+    assert agent.namespace_version('news') == 0
+    agent.index_documents([{'content': 'foundry capex rises', 'metadata': {}, 'key': 'a'}], namespace='news')
+    assert agent.namespace_version('news') == 1
+    assert not agent.needs_query_vector({'namespaces': ['stock_data'], 'tickers': ['TSM']})
+    assert agent.needs_query_vector({'namespaces': ['stock_data', 'news'], 'tickers': ['TSM']})
+
+def test_deleted_chunks_leave_the_lexical_index(agent):
+    agent.index_documents([{'content': 'foundry capex rises', 'metadata': {}, 'key': 'a'}], namespace='news')
+    lexical = agent._lexical_index('news')
+    version = agent.namespace_version('news')
+    assert agent.delete_chunks('news', agent.vector_backend.list_ids('news')) == 1
+    assert len(lexical) == 0 and agent.namespace_version('news') == version + 1
+
+def test_structured_records_are_looked_up_without_embedding(agent):
+    agent.index_financial_data([
+        {'symbol': 'TSM', 'date': '2025-07-01', 'price': 180.0, 'change_pct': 1.0},
+        {'symbol': 'TSM', 'date': '2025-07-02', 'price': 182.0, 'change_pct': 1.1}
+    ], 'stock_data')
+    assert agent.vector_backend.list_ids('stock_data') == []
+    analysis = {'namespaces': ['stock_data'], 'tickers': ['TSM'], 'date_range': None, 'filters': {}}
+    assert not agent.needs_query_vector(analysis)
+    info = agent.retrieve_asia_tech_info('TSM price', confidence_threshold=0, analysis=analysis)
+    assert [result['metadata']['date'] for result in info['results']] == ['2025-07-02']
+    assert agent.embeddings.query_calls == 0
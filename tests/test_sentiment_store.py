@@ -0,0 +1,56 @@
+import statistics
+from data_ingestion.sentiment_store import SentimentStore, RECORD
+
+DAY = 86400.0
+NOW = 1_750_000_000.0
+
+def filled(tmp_path, scores, step=DAY, min_interval=0):
+    store = SentimentStore(store_path=str(tmp_path / 'readings.bin'), min_interval=min_interval)
+    for i, score in enumerate(scores):
+        assert store.append(score, timestamp=NOW - (len(scores) - 1 - i) * step)
+    return store
+
+def test_window_statistics_match_a_full_scan(tmp_path):
+    scores = [20, 35, 50, 65, 80, 45, 55, 60, 30, 70]
+    store = filled(tmp_path, scores)
+    stats = store.window(NOW - 5 * DAY, NOW)
+    assert stats['count'] == 5
+    assert abs(stats['mean'] - statistics.mean(scores[-5:])) < 1e-9
+    assert abs(stats['std'] - statistics.pstdev(scores[-5:])) < 1e-9
+    assert store.window(NOW + 1, NOW + DAY) == {'count': 0, 'mean': None, 'std': None}
+
+def test_min_interval_and_ordering(tmp_path):
+    store = SentimentStore(store_path=str(tmp_path / 'readings.bin'), min_interval=900)
+    assert store.append(50, timestamp=NOW)
+    assert not store.append(55, timestamp=NOW + 100)
+    assert not store.append(55, timestamp=NOW - DAY)
+    assert store.append(55, timestamp=NOW + 900)
+    assert len(store) == 2
+
+def test_trend_reports_averages_and_changes(tmp_path):
+    store = filled(tmp_path, [40] * 7 + [60])
+    trend = store.trend(now=NOW)
+    assert trend['latest'] == 60 and trend['readings'] == 8
+    assert trend['delta_7d'] == 20
+    assert abs(trend['avg_7d'] - (40 * 6 + 60) / 7) < 1e-9
+    assert store.value_at(NOW - 1) == 40
+    assert store.value_at(NOW - 30 * DAY) is None
+
+def test_readings_survive_restart_and_torn_writes(tmp_path):
+    store = filled(tmp_path, [10, 20, 30])
+    store.close()
+    with open(store.store_path, 'ab') as f:
+        f.write(RECORD.pack(NOW + 1, 40, 0, 0)[:10])
+    reopened = SentimentStore(store_path=store.store_path, min_interval=0)
+    assert len(reopened) == 3
+    assert reopened.window(0, NOW)['mean'] == 20
+
+def test_cached_indicator_page_is_not_recorded_again(tmp_path):
+    store = SentimentStore(store_path=str(tmp_path / 'readings.bin'), min_interval=0)
+    reading = {'sources': [{'name': 'CNN Fear & Greed Index', 'score': 62, 'fetched_at': NOW}], 'sentiment_score': 62}
+    assert store.record(reading)
+    # The same page served from the scraper cache keeps its fetch time
+    assert not store.record(reading)
+    assert not store.record({'sources': [], 'sentiment_score': 50})
+    assert store.record({'sources': [{'score': 64, 'fetched_at': NOW + 600}], 'sentiment_score': 64})
+    assert len(store) == 2
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from retrieval.faiss_backend import FAISSBackend
+from retrieval.sharded_backend import ShardedBackend, shard_of
+
+DIMENSION = 16
+
+@pytest.fixture
+def sharded(tmp_path):
+    backend = ShardedBackend(store_path=str(tmp_path / 'sharded'), shards=2)
+    yield backend
+    backend.close()
+
+def data(count: int):
+    ids = [f"chunk-{i}" for i in range(count)]
+    matrix = np.random.default_rng(0).standard_normal((count, DIMENSION)).astype('float32')
+    metadatas = [{'symbol': 'TSM' if i % 3 else 'JD'} for i in range(count)]
+    return ids, matrix, [f"text {i}" for i in ids], metadatas
+
+def test_writes_are_routed_by_id(sharded):
+    ids, matrix, texts, metadatas = data(40)
+    assert sharded.upsert('news', ids, matrix, texts, metadatas) == 40
+    assert {shard_of(chunk_id, 2) for chunk_id in ids} == {0, 1}
+    for shard in range(2):
+        expected = sorted(chunk_id for chunk_id in ids if shard_of(chunk_id, 2) == shard)
+        assert sorted(sharded._call(shard, 'list_ids', 'news')) == expected
+    assert sharded.delete('news', ids[:10]) == 10
+    assert sorted(sharded.list_ids('news')) == sorted(ids[10:])
+    assert sorted(sharded.fetch('news', ids[8:12])) == ids[10:12]
+
+def test_search_matches_single_index(sharded, tmp_path):
+    ids, matrix, texts, metadatas = data(60)
+    single = FAISSBackend(store_path=str(tmp_path / 'single'))
+    single.upsert('news', ids, matrix, texts, metadatas)
+    sharded.upsert('news', ids, matrix, texts, metadatas)
+    for query in matrix[:5] + 0.1:
+        for filter in (None, {'symbol': 'JD'}):
+            expected = [match['id'] for match in single.search('news', query, k=7, filter=filter)]
+            assert [match['id'] for match in sharded.search('news', query, k=7, filter=filter)] == expected
+
+def test_build_publishes_on_every_shard(sharded):
+    ids, matrix, texts, metadatas = data(20)
+    sharded.upsert('news', ids[:10], matrix[:10], texts[:10], metadatas[:10])
+    build = sharded.begin_build('news')
+    sharded.upsert(build, ids[10:], matrix[10:], texts[10:], metadatas[10:])
+    sharded.delete(build, ids[:10])
+    assert sorted(sharded.list_ids('news')) == sorted(ids[:10])
+    sharded.publish_build(build)
+    assert sorted(sharded.list_ids('news')) == sorted(ids[10:])
+
+def test_reopened_store_keeps_shards(tmp_path):
+    ids, matrix, texts, metadatas = data(20)
+    path = str(tmp_path / 'sharded')
+    writer = ShardedBackend(store_path=path, shards=2)
+    try:
+        writer.upsert('news', ids, matrix, texts, metadatas)
+    finally:
+        writer.close()
+    reader = ShardedBackend(store_path=path, shards=2)
+    try:
+        assert sorted(reader.list_ids('news')) == sorted(ids)
+    finally:
+        reader.close()
+
+def test_versions_and_rollback_cover_every_shard(sharded):
+    ids, matrix, texts, metadatas = data(20)
+    for batch in (ids[:10], ids[10:]):
+        positions = [ids.index(chunk_id) for chunk_id in batch]
+        build = sharded.begin_build('news')
+        sharded.upsert(build, batch, matrix[positions], [texts[p] for p in positions], [metadatas[p] for p in positions])
+        sharded.publish_build(build)
+    first, second = sharded.versions('news')
+    assert sharded.current_version('news') == second
+    assert sorted(sharded.list_ids('news')) == sorted(ids)
+
+    assert sharded.rollback('news') == first
+    assert sharded.current_version('news') == first
+    assert sharded.versions('news') == [first]
+    assert sorted(sharded.list_ids('news')) == sorted(ids[:10])
+    for shard in range(2):
+        assert sharded._call(shard, 'current_version', 'news') == first
+    with pytest.raises(ValueError):
+        sharded.rollback('news', second)
+
+def test_unsharded_data_is_not_hidden_behind_empty_shards(tmp_path):
+    ids, matrix, texts, metadatas = data(5)
+    FAISSBackend(store_path=str(tmp_path)).upsert('news', ids, matrix, texts, metadatas)
+    with pytest.raises(ValueError, match='unsharded namespaces'):
+        ShardedBackend(store_path=str(tmp_path), shards=2)
+
+def test_data_under_another_shard_count_is_not_hidden(tmp_path):
+    ids, matrix, texts, metadatas = data(5)
+    writer = ShardedBackend(store_path=str(tmp_path), shards=2)
+    try:
+        writer.upsert('news', ids, matrix, texts, metadatas)
+    finally:
+        writer.close()
+    with pytest.raises(ValueError, match='shards-2'):
+        ShardedBackend(store_path=str(tmp_path), shards=3)
+
+def test_shards_pick_up_builds_published_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.setenv('FAISS_RELOAD_INTERVAL', '0')
+    ids, matrix, texts, metadatas = data(20)
+    path = str(tmp_path / 'sharded')
+    writer = ShardedBackend(store_path=path, shards=2)
+    reader = ShardedBackend(store_path=path, shards=2)
+    try:
+        writer.upsert('news', ids[:10], matrix[:10], texts[:10], metadatas[:10])
+        assert sorted(reader.list_ids('news')) == sorted(ids[:10])
+        build = writer.begin_build('news')
+        writer.upsert(build, ids[10:], matrix[10:], texts[10:], metadatas[10:])
+        writer.publish_build(build)
+        assert sorted(reader.list_ids('news')) == sorted(ids)
+    finally:
+        writer.close()
+        reader.close()
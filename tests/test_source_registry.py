@@ -0,0 +1,76 @@
+import json
+import pytest
+from data_ingestion.source_registry import SourceRegistry
+from data_ingestion.html_extract import HTMLExtractor, HAS_BS4, HAS_LXML
+from data_ingestion.scraper import FinancialScraper
+
+SOURCES = {
+    'topics': ['semiconductor'],
+    'tickers': {'TSM': ['TSMC'], '005930.KS': ['Samsung']},
+    'news_sources': [
+        {'name': 'Fast', 'url': 'https://fast.example.com/news', 'article_selector': 'li.story', 'title_selector': 'h3',
+         'link_selector': 'a', 'summary_selector': 'p', 'crawl_interval': 60, 'max_articles': 2},
+        {'name': 'Slow', 'url': 'https://slow.example.com/news', 'article_selector': 'li.story', 'title_selector': 'h3',
+         'link_selector': 'a', 'summary_selector': 'p', 'crawl_interval': 3600}
+    ]
+}
+
+@pytest.fixture
+def paths(tmp_path):
+    config_path = tmp_path / 'sources.json'
+    config_path.write_text(json.dumps(SOURCES))
+    return str(config_path), str(tmp_path / 'state.json')
+
+def article(link: str, title: str = 'TSMC news', summary: str = '') -> dict:
+    return {'source': 'Fast', 'title': title, 'link': link, 'summary': summary}
+
+def test_config_defaults_and_keywords(paths):
+    registry = SourceRegistry(*paths)
+    assert registry.keywords == {'semiconductor': None, 'TSM': 'TSM', 'TSMC': 'TSM', '005930.KS': '005930.KS', 'Samsung': '005930.KS'}
+    assert registry.sources[1]['max_articles'] == 20
+
+def test_only_due_sources_are_crawled(paths):
+    registry = SourceRegistry(*paths)
+    assert [source['name'] for source in registry.due_sources()] == ['Fast', 'Slow']
+    registry.mark_crawled(registry.sources[0], [])
+    assert [source['name'] for source in registry.due_sources()] == ['Slow']
+    assert len(registry.due_sources(force=True)) == 2
+
+def test_watermark_skips_seen_articles_across_runs(paths):
+    registry = SourceRegistry(*paths)
+    fast = registry.sources[0]
+    fresh = registry.new_articles(fast, [article('/1'), article('/2'), article('/3')])
+    assert [a['link'] for a in fresh] == ['/1', '/2']
+    registry.mark_crawled(fast, fresh)
+
+    reopened = SourceRegistry(*paths)
+    assert [a['link'] for a in reopened.new_articles(reopened.sources[0], [article('/4'), article('/1'), article('/3')])] == ['/4', '/3']
+
+class FakeClient:
+    """Serves fixed listing pages in place of the network."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    def fetch_all(self, targets):
+        self.fetched.extend(target['url'] for target in targets)
+        return [{'url': target['url'], 'status_code': 200, 'text': self.pages[target['url']], 'parsed': None} for target in targets]
+
+    def parse_response(self, result, parser):
+        return parser(result['text'])
+
+@pytest.mark.skipif(not (HAS_BS4 or HAS_LXML), reason='needs beautifulsoup4 or lxml')
+def test_scraper_returns_only_new_matching_articles(paths):
+    listing = ''.join(f'<li class="story"><h3>{title}</h3><a href="/{i}">more</a><p>summary</p></li>'
+                      for i, title in enumerate(['TSMC ships 2nm', 'Oil prices', 'Samsung memory']))
+    client = FakeClient({'https://fast.example.com/news': listing, 'https://slow.example.com/news': '<ul></ul>'})
+    scraper = FinancialScraper(client=client, extractor=HTMLExtractor(), registry=SourceRegistry(*paths))
+
+    first = scraper.scrape_financial_news()
+    assert [a['link'] for a in first] == ['https://fast.example.com/0']
+    assert first[0]['matched_keywords'] == ['TSMC'] and first[0]['tickers'] == ['TSM']
+    assert scraper.scrape_financial_news() == []
+    assert client.fetched == ['https://fast.example.com/news', 'https://slow.example.com/news']
+    # A forced crawl skips links under the watermark and picks up the one left over by max_articles
+    assert [a['link'] for a in scraper.scrape_financial_news(force=True)] == ['https://fast.example.com/2']